@@ -0,0 +1,55 @@
+"""``DATABASES`` entries from URLs such as ``DATABASE_URL``.
+
+Supported schemes are ``postgres://``/``postgresql://`` and
+``sqlite:///relative/path`` or ``sqlite:////absolute/path``. Query
+string parameters become connection ``OPTIONS``, e.g.
+``?sslmode=require``.
+"""
+
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    "postgres": "django.db.backends.postgresql",
+    "postgresql": "django.db.backends.postgresql",
+    "sqlite": "django.db.backends.sqlite3",
+}
+
+
+def parse_database_url(url, conn_max_age=0, pgbouncer=False):
+    """A ``DATABASES`` entry for ``url``
+
+    ``conn_max_age`` keeps connections open between requests, checked
+    with ``CONN_HEALTH_CHECKS`` before reuse. ``pgbouncer`` disables
+    server-side cursors, which do not survive transaction pooling.
+    """
+    parts = urlsplit(url)
+    try:
+        engine = ENGINES[parts.scheme]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unsupported database URL scheme: {url!r}")
+
+    database = {
+        "ENGINE": engine,
+        "CONN_MAX_AGE": conn_max_age,
+        "CONN_HEALTH_CHECKS": conn_max_age != 0,
+    }
+    if parts.scheme == "sqlite":
+        database["NAME"] = unquote(parts.path[1:]) or ":memory:"
+        return database
+
+    database.update(
+        {
+            "NAME": unquote(parts.path[1:]),
+            "USER": unquote(parts.username or ""),
+            "PASSWORD": unquote(parts.password or ""),
+            # A %2F-quoted host is a Unix socket directory
+            "HOST": unquote(parts.hostname or ""),
+            "PORT": str(parts.port or ""),
+            "OPTIONS": dict(parse_qsl(parts.query)),
+        }
+    )
+    if pgbouncer:
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+    return database
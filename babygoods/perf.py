@@ -0,0 +1,277 @@
+"""Per-request performance instrumentation.
+
+``RequestProfileMiddleware`` measures every request: query count and
+total time spent in the database, template render time, hits and misses
+of the queryset and page caches, and total latency.
+
+- Staff responses get a ``Server-Timing`` header, which browsers show in
+  the network panel. The user is only loaded for requests with a session
+  cookie, and not again when the view already loaded it.
+- A sample of requests (``PERF_SAMPLE_RATE``) is written as one JSON
+  object per line to the ``babygoods.perf.requests`` logger, which
+  ``settings.LOGGING`` points at a rotating file when ``PERF_LOG_FILE``
+  is set.
+- Requests that run more queries than their route's budget
+  (``PERF_QUERY_BUDGETS``, keyed by URL name, else
+  ``PERF_DEFAULT_QUERY_BUDGET``) are always written, and logged as a
+  warning with the fingerprints of their most repeated queries.
+
+Queries are counted by an execute wrapper that every database connection
+gets when it opens, and templates by ``ProfiledDjangoTemplates``, the
+template backend in ``TEMPLATES``. Both do nothing outside a request.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger(__name__)
+records = logging.getLogger(f"{__name__}.requests")
+
+DEFAULT_QUERY_BUDGET = 50
+DEFAULT_SAMPLE_RATE = 0.05
+REPORTED_FINGERPRINTS = 5
+
+_COLUMNS = re.compile(r"^SELECT .*? FROM ", re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """``sql`` with columns, literals and parameter lists replaced, for grouping"""
+    sql = _COLUMNS.sub("SELECT ... FROM ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_ns: int = 0
+    template_ns: int = 0
+    template_depth: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Keyed by the raw SQL; fingerprinted only when reported
+    statements: Counter = field(default_factory=Counter)
+    statement_ns: Counter = field(default_factory=Counter)
+
+    def repeated_queries(self, limit=REPORTED_FINGERPRINTS):
+        counts = Counter()
+        durations = Counter()
+        for sql, count in self.statements.items():
+            key = fingerprint(sql)
+            counts[key] += count
+            durations[key] += self.statement_ns[sql]
+        return [
+            {"sql": sql, "count": count, "ms": round(durations[sql] / 1e6, 2)}
+            for sql, count in counts.most_common(limit)
+        ]
+
+
+_request_profile = ContextVar("request_profile", default=None)
+
+
+def record_cache(hit):
+    """Count a cache lookup against the current request, if any"""
+    profile = _request_profile.get()
+    if profile is not None:
+        if hit:
+            profile.cache_hits += 1
+        else:
+            profile.cache_misses += 1
+
+
+def _profile_query(execute, sql, params, many, context):
+    profile = _request_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter_ns() - started
+        profile.queries += 1
+        profile.db_ns += elapsed
+        profile.statements[sql] += 1
+        profile.statement_ns[sql] += elapsed
+
+
+def instrument(connection, **kwargs):
+    if _profile_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_query)
+
+
+connection_created.connect(instrument)
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _request_profile.get()
+        if profile is None:
+            return super().render(context, request)
+        # Templates rendered from inside another template count once
+        profile.template_depth += 1
+        started = time.perf_counter_ns()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_ns += time.perf_counter_ns() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing renders for ``RequestProfile``"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    return match.view_name or match.route
+
+
+def _loaded_user(request):
+    """``request.user`` when the request has evaluated it, else None"""
+    user = getattr(request, "user", None)
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+def _signed_in(request):
+    # Only a session can belong to staff; anonymous visitors cost nothing
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+class RequestProfileMiddleware:
+    """Measure each request; place it first in ``MIDDLEWARE``"""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, "PERF_QUERY_BUDGETS", {})
+        self.default_budget = getattr(
+            settings, "PERF_DEFAULT_QUERY_BUDGET", DEFAULT_QUERY_BUDGET
+        )
+        self.sample_rate = getattr(settings, "PERF_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _request_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_profile.reset(token)
+        user = getattr(request, "user", None) if _signed_in(request) else None
+        return self.finish(request, response, profile, user)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _request_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_profile.reset(token)
+        user = None
+        if _signed_in(request):
+            user = _loaded_user(request)
+            if user is None and hasattr(request, "auser"):
+                user = await request.auser()
+        return self.finish(request, response, profile, user)
+
+    def finish(self, request, response, profile, user):
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        route = _route(request)
+        budget = self.budgets.get(route, self.default_budget)
+        over_budget = profile.queries > budget
+
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = server_timing(profile, total_ms)
+
+        if over_budget:
+            logger.warning(
+                "%s %s ran %d queries (budget %d): %s",
+                request.method,
+                request.path,
+                profile.queries,
+                budget,
+                "; ".join(
+                    f"{query['count']}x {query['sql']}"
+                    for query in profile.repeated_queries()
+                ),
+            )
+        if (
+            over_budget or random.random() < self.sample_rate
+        ) and records.isEnabledFor(logging.INFO):
+            record = {
+                "request_id": request.headers.get("X-Request-ID") or uuid.uuid4().hex,
+                "time": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "route": route,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+                "queries": profile.queries,
+                "db_ms": round(profile.db_ns / 1e6, 2),
+                "template_ms": round(profile.template_ns / 1e6, 2),
+                "cache_hits": profile.cache_hits,
+                "cache_misses": profile.cache_misses,
+                "query_budget": budget,
+                "over_budget": over_budget,
+            }
+            if over_budget:
+                record["repeated_queries"] = profile.repeated_queries()
+            records.info(json.dumps(record))
+        return response
+
+
+def server_timing(profile, total_ms):
+    return ", ".join(
+        [
+            f'db;dur={profile.db_ns / 1e6:.1f};desc="{profile.queries} queries"',
+            f"tpl;dur={profile.template_ns / 1e6:.1f}",
+            f'cache;desc="{profile.cache_hits} hit {profile.cache_misses} miss"',
+            f"total;dur={total_ms:.1f}",
+        ]
+    )
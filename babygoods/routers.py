@@ -0,0 +1,121 @@
+"""Primary/replica database routing.
+
+Replicas are the ``DATABASES`` aliases starting with ``replica``. During
+a request, ``PrimaryReplicaMiddleware`` picks one replica for the whole
+request and ``PrimaryReplicaRouter`` sends reads of storefront and
+catalog models (``DATABASE_REPLICA_APPS``) to it. Everything else uses
+the primary:
+
+- writes, and every read after the request's first write
+- reads inside a transaction on the primary (including ``select_for_update``)
+- requests that are not GET/HEAD/OPTIONS, and editor paths
+  (``DATABASE_PRIMARY_PATHS``), so editors always read their own changes
+- management commands and other work outside a request
+"""
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_APPS = {
+    "products",
+    "catalog",
+    "wagtailcore",
+    "wagtailimages",
+    "wagtaildocs",
+    "taggit",
+}
+PRIMARY_PATHS = ("/admin/", "/cms/")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@dataclass
+class RequestRouting:
+    replica: str
+    wrote: bool = False
+
+
+_request_routing = ContextVar("request_routing", default=None)
+
+
+@cache
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+@cache
+def replica_apps():
+    return frozenset(getattr(settings, "DATABASE_REPLICA_APPS", REPLICA_APPS))
+
+
+class PrimaryReplicaMiddleware:
+    """Choose the replica, or the primary, that serves the request's reads"""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.primary_paths = tuple(
+            getattr(settings, "DATABASE_PRIMARY_PATHS", PRIMARY_PATHS)
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def routing(self, request):
+        replicas = replica_aliases()
+        if (
+            not replicas
+            or request.method not in SAFE_METHODS
+            or request.path.startswith(self.primary_paths)
+        ):
+            return None
+        return RequestRouting(replica=random.choice(replicas))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_routing.set(self.routing(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _request_routing.reset(token)
+
+    async def __acall__(self, request):
+        # Async ORM calls copy this context into the ORM thread
+        token = _request_routing.set(self.routing(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _request_routing.get()
+        if (
+            routing is None
+            or routing.wrote
+            or model._meta.app_label not in replica_apps()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
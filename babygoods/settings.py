@@ -12,6 +12,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import Csv, config
+
+from .database import parse_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,11 +59,15 @@ INSTALLED_APPS = [
     "wagtail.contrib.redirects",
     # Custom apps
     "products",
+    "catalog",
 ]
 
 MIDDLEWARE = [
+    "babygoods.perf.RequestProfileMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "babygoods.routers.PrimaryReplicaMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "catalog.page_cache.SurrogateKeyCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -73,7 +81,8 @@ ROOT_URLCONF = "babygoods.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates, with render times for babygoods.perf
+        "BACKEND": "babygoods.perf.ProfiledDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -96,13 +105,113 @@ WSGI_APPLICATION = "babygoods.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL is the primary; DATABASE_REPLICA_URLS (comma separated)
+# adds read replicas used by babygoods.routers. Set DATABASE_PGBOUNCER
+# when connecting through pgbouncer in transaction pooling mode.
+
+DATABASE_URL = config("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+DATABASE_REPLICA_URLS = config("DATABASE_REPLICA_URLS", default="", cast=Csv())
+DATABASE_CONN_MAX_AGE = config("DATABASE_CONN_MAX_AGE", default=60, cast=int)
+DATABASE_PGBOUNCER = config("DATABASE_PGBOUNCER", default=False, cast=bool)
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+    "default": parse_database_url(
+        DATABASE_URL, DATABASE_CONN_MAX_AGE, pgbouncer=DATABASE_PGBOUNCER
+    )
+}
+for number, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f"replica_{number}"] = {
+        **parse_database_url(
+            replica_url, DATABASE_CONN_MAX_AGE, pgbouncer=DATABASE_PGBOUNCER
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["babygoods.routers.PrimaryReplicaRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Redis when REDIS_URL is set, otherwise a file cache in CACHE_DIR (shared
+# by local worker processes) or per-process local memory
+
+REDIS_URL = config("REDIS_URL", default="")
+CACHE_DIR = config("CACHE_DIR", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "babygoods",
+            "OPTIONS": {
+                # Fail fast so callers fall back to the database
+                "socket_connect_timeout": 1,
+                "socket_timeout": 1,
+            },
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            "KEY_PREFIX": "babygoods",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "babygoods",
+        }
     }
+
+
+# Request profiling
+# babygoods.perf writes a sample of requests, and every request over its
+# query budget, as JSON lines to PERF_LOG_FILE (rotated at
+# PERF_LOG_MAX_BYTES). Budgets are keyed by URL name.
+
+PERF_LOG_FILE = config("PERF_LOG_FILE", default="")
+PERF_LOG_MAX_BYTES = config("PERF_LOG_MAX_BYTES", default=50 * 1024 * 1024, cast=int)
+PERF_LOG_BACKUPS = config("PERF_LOG_BACKUPS", default=5, cast=int)
+PERF_SAMPLE_RATE = config("PERF_SAMPLE_RATE", default=0.05, cast=float)
+PERF_DEFAULT_QUERY_BUDGET = config("PERF_DEFAULT_QUERY_BUDGET", default=50, cast=int)
+PERF_QUERY_BUDGETS = {
+    "home": 10,
+    "products:api_product_list": 5,
+    "products:api_product_detail": 8,
+    "products:api_product_facets": 10,
 }
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"jsonl": {"format": "%(message)s"}},
+    "handlers": {},
+    "loggers": {},
+}
+if PERF_LOG_FILE:
+    LOGGING["handlers"]["perf_file"] = {
+        "class": "logging.handlers.RotatingFileHandler",
+        "filename": PERF_LOG_FILE,
+        "maxBytes": PERF_LOG_MAX_BYTES,
+        "backupCount": PERF_LOG_BACKUPS,
+        "formatter": "jsonl",
+    }
+    LOGGING["loggers"]["babygoods.perf.requests"] = {
+        "handlers": ["perf_file"],
+        "level": "INFO",
+        "propagate": False,
+    }
+
+
+# Merchant feed
+# ISO 4217 currency of the prices in the Google Merchant feed
+
+MERCHANT_FEED_CURRENCY = config("MERCHANT_FEED_CURRENCY", default="USD")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
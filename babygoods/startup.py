@@ -0,0 +1,122 @@
+"""Timed application startup for the production entry points.
+
+``load_wsgi_application()`` performs the steps ``get_wsgi_application()``
+would, one phase at a time, and reports how long each took:
+
+- ``settings``: importing the settings module
+- ``apps``: ``django.setup()``, which imports every app and its models
+- ``middleware``: building the handler's middleware chain
+- ``urlconf``: importing the URL conf and views and building reverse lookups
+
+``warm_up()`` sends one request through the full stack, which loads
+templates and everything imported lazily on first use. gunicorn.conf.py
+calls it in each worker after the fork, so the request never runs in the
+master or at import time, and reports it as that worker's ``warmup`` phase.
+
+Set ``STARTUP_PROFILE`` to a file path to also write cProfile stats for
+the whole startup.
+"""
+
+import cProfile
+import os
+import sys
+import time
+from contextlib import contextmanager
+from wsgiref.util import setup_testing_defaults
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = []
+        self.notes = []
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self, stream=None):
+        total = sum(seconds for _, seconds in self.phases)
+        timings = ", ".join(
+            f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases
+        )
+        notes = "".join(f" ({note})" for note in self.notes)
+        stream = stream or sys.stderr
+        stream.write(
+            f"[{os.getpid()}] startup {total * 1000:.0f} ms: {timings}{notes}\n"
+        )
+        stream.flush()
+
+
+def request_host(allowed_hosts):
+    """A host name ``allowed_hosts`` accepts, for requests made in-process"""
+    for host in allowed_hosts:
+        if host and "*" not in host and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+def warm_up(application, path):
+    """Send one GET for ``path`` through ``application``, return the status"""
+    from django.conf import settings
+
+    path, _, query = path.partition("?")
+    environ = {
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "HTTP_HOST": request_host(settings.ALLOWED_HOSTS),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Fires request_finished, which closes the database connections
+        response.close()
+    return statuses[0] if statuses else None
+
+
+def _load(timer):
+    with timer.phase("settings"):
+        from django.conf import settings
+
+        settings.INSTALLED_APPS
+
+    with timer.phase("apps"):
+        import django
+
+        django.setup(set_prefix=False)
+
+    with timer.phase("middleware"):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        application = WSGIHandler()
+
+    with timer.phase("urlconf"):
+        from django.urls import get_resolver
+
+        get_resolver().reverse_dict
+    return application
+
+
+def load_wsgi_application():
+    """The WSGI application, loaded phase by phase with timings on stderr"""
+    timer = StartupTimer()
+    profile_path = os.environ.get("STARTUP_PROFILE")
+    if profile_path:
+        profiler = cProfile.Profile()
+        application = profiler.runcall(_load, timer)
+        profiler.dump_stats(profile_path)
+    else:
+        application = _load(timer)
+    timer.report()
+    return application
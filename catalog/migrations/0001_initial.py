@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:05
+
+import catalog.models
+import catalog.page_cache
+import django.db.models.deletion
+import wagtail.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0011_product_created_index'),
+        ('wagtailcore', '0098_apitoken'),
+        ('wagtailimages', '0027_image_description'),
+        migrations.swappable_dependency(settings.WAGTAIL_PAGE_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to=settings.WAGTAIL_PAGE_MODEL)),
+                ('author', models.CharField(max_length=100)),
+                ('reading_time', models.PositiveIntegerField(help_text='Estimated reading time in minutes')),
+                ('content', wagtail.fields.StreamField([('content', 0), ('baby_tips', 4), ('safety_guide', 9), ('age_products', 16), ('image', 17)], block_lookup={0: ('wagtail.blocks.RichTextBlock', (), {}), 1: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 2: ('wagtail.blocks.MultipleChoiceBlock', [], {'choices': [('newborn', 'Newborn (0-2 months)'), ('infant', 'Infant (3-11 months)'), ('toddler', 'Toddler (1-3 years)')], 'required': False}), 3: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': False}), 4: ('wagtail.blocks.StructBlock', [[('title', 1), ('age_groups', 2), ('featured_image', 3)]], {}), 5: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'ASTM F963-17'", 'max_length': 100}), 6: ('wagtail.blocks.CharBlock', (), {'max_length': 200}), 7: ('wagtail.blocks.ListBlock', (6,), {'help_text': 'Key safety points for parents'}), 8: ('wagtail.blocks.TextBlock', (), {'help_text': 'Any warnings or precautions', 'required': False}), 9: ('wagtail.blocks.StructBlock', [[('title', 1), ('safety_standard', 5), ('key_points', 7), ('warning_text', 8)]], {}), 10: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., '6-12 months'", 'max_length': 50}), 11: ('products.choosers.ProductChooserBlock', (), {'label': 'Select Product'}), 12: ('wagtail.blocks.BooleanBlock', (), {'default': True, 'required': False}), 13: ('wagtail.blocks.StructBlock', [[('product', 11), ('show_description', 12), ('show_price', 12)]], {}), 14: ('wagtail.blocks.ListBlock', (13,), {'help_text': 'Select products suitable for this age group'}), 15: ('wagtail.blocks.TextBlock', (), {'required': False}), 16: ('wagtail.blocks.StructBlock', [[('age_group_title', 1), ('age_range', 10), ('products', 14), ('custom_message', 15)]], {}), 17: ('wagtail.images.blocks.ImageChooserBlock', (), {})})),
+                ('tags', models.CharField(help_text='Comma-separated tags', max_length=200)),
+                ('featured_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Blog Post',
+            },
+            bases=(catalog.models.ProductStreamMixin, 'wagtailcore.page'),
+        ),
+        migrations.CreateModel(
+            name='HomePage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to=settings.WAGTAIL_PAGE_MODEL)),
+                ('hero_title', models.CharField(default='Premium Baby Products', max_length=200)),
+                ('hero_subtitle', models.TextField(default='Safe, organic, and certified products for your little ones')),
+                ('featured_products', wagtail.fields.StreamField([('featured_products', 3), ('baby_tips', 7), ('safety_guide', 12), ('age_products', 16)], blank=True, block_lookup={0: ('products.choosers.ProductChooserBlock', (), {'label': 'Select Product'}), 1: ('wagtail.blocks.BooleanBlock', (), {'default': True, 'required': False}), 2: ('wagtail.blocks.StructBlock', [[('product', 0), ('show_description', 1), ('show_price', 1)]], {}), 3: ('wagtail.blocks.ListBlock', (2,), {}), 4: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 5: ('wagtail.blocks.MultipleChoiceBlock', [], {'choices': [('newborn', 'Newborn (0-2 months)'), ('infant', 'Infant (3-11 months)'), ('toddler', 'Toddler (1-3 years)')], 'required': False}), 6: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': False}), 7: ('wagtail.blocks.StructBlock', [[('title', 4), ('age_groups', 5), ('featured_image', 6)]], {}), 8: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'ASTM F963-17'", 'max_length': 100}), 9: ('wagtail.blocks.CharBlock', (), {'max_length': 200}), 10: ('wagtail.blocks.ListBlock', (9,), {'help_text': 'Key safety points for parents'}), 11: ('wagtail.blocks.TextBlock', (), {'help_text': 'Any warnings or precautions', 'required': False}), 12: ('wagtail.blocks.StructBlock', [[('title', 4), ('safety_standard', 8), ('key_points', 10), ('warning_text', 11)]], {}), 13: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., '6-12 months'", 'max_length': 50}), 14: ('wagtail.blocks.ListBlock', (2,), {'help_text': 'Select products suitable for this age group'}), 15: ('wagtail.blocks.TextBlock', (), {'required': False}), 16: ('wagtail.blocks.StructBlock', [[('age_group_title', 4), ('age_range', 13), ('products', 14), ('custom_message', 15)]], {})})),
+                ('hero_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Home Page',
+            },
+            bases=(catalog.page_cache.SurrogateKeyPageMixin, catalog.models.ProductStreamMixin, 'wagtailcore.page'),
+        ),
+        migrations.CreateModel(
+            name='ProductCategoryPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to=settings.WAGTAIL_PAGE_MODEL)),
+                ('intro_text', wagtail.fields.RichTextField(blank=True)),
+                ('safety_info', wagtail.fields.StreamField([('safety_guide', 5), ('baby_tips', 8)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 1: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'ASTM F963-17'", 'max_length': 100}), 2: ('wagtail.blocks.CharBlock', (), {'max_length': 200}), 3: ('wagtail.blocks.ListBlock', (2,), {'help_text': 'Key safety points for parents'}), 4: ('wagtail.blocks.TextBlock', (), {'help_text': 'Any warnings or precautions', 'required': False}), 5: ('wagtail.blocks.StructBlock', [[('title', 0), ('safety_standard', 1), ('key_points', 3), ('warning_text', 4)]], {}), 6: ('wagtail.blocks.MultipleChoiceBlock', [], {'choices': [('newborn', 'Newborn (0-2 months)'), ('infant', 'Infant (3-11 months)'), ('toddler', 'Toddler (1-3 years)')], 'required': False}), 7: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': False}), 8: ('wagtail.blocks.StructBlock', [[('title', 0), ('age_groups', 6), ('featured_image', 7)]], {})})),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='page', to='products.category')),
+                ('featured_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Product Category Page',
+            },
+            bases=(catalog.page_cache.SurrogateKeyPageMixin, 'wagtailcore.page'),
+        ),
+        migrations.CreateModel(
+            name='ProductDetailPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to=settings.WAGTAIL_PAGE_MODEL)),
+                ('additional_content', wagtail.fields.StreamField([('safety_info', 5), ('baby_tips', 8), ('age_recommendations', 15), ('related_content', 16)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 1: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'ASTM F963-17'", 'max_length': 100}), 2: ('wagtail.blocks.CharBlock', (), {'max_length': 200}), 3: ('wagtail.blocks.ListBlock', (2,), {'help_text': 'Key safety points for parents'}), 4: ('wagtail.blocks.TextBlock', (), {'help_text': 'Any warnings or precautions', 'required': False}), 5: ('wagtail.blocks.StructBlock', [[('title', 0), ('safety_standard', 1), ('key_points', 3), ('warning_text', 4)]], {}), 6: ('wagtail.blocks.MultipleChoiceBlock', [], {'choices': [('newborn', 'Newborn (0-2 months)'), ('infant', 'Infant (3-11 months)'), ('toddler', 'Toddler (1-3 years)')], 'required': False}), 7: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': False}), 8: ('wagtail.blocks.StructBlock', [[('title', 0), ('age_groups', 6), ('featured_image', 7)]], {}), 9: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., '6-12 months'", 'max_length': 50}), 10: ('products.choosers.ProductChooserBlock', (), {'label': 'Select Product'}), 11: ('wagtail.blocks.BooleanBlock', (), {'default': True, 'required': False}), 12: ('wagtail.blocks.StructBlock', [[('product', 10), ('show_description', 11), ('show_price', 11)]], {}), 13: ('wagtail.blocks.ListBlock', (12,), {'help_text': 'Select products suitable for this age group'}), 14: ('wagtail.blocks.TextBlock', (), {'required': False}), 15: ('wagtail.blocks.StructBlock', [[('age_group_title', 0), ('age_range', 9), ('products', 13), ('custom_message', 14)]], {}), 16: ('wagtail.blocks.RichTextBlock', (), {})})),
+                ('care_instructions', wagtail.fields.RichTextField(blank=True)),
+                ('safety_warnings', wagtail.fields.RichTextField(blank=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='page', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product Detail Page',
+            },
+            bases=(catalog.page_cache.SurrogateKeyPageMixin, catalog.models.ProductStreamMixin, 'wagtailcore.page'),
+        ),
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(help_text='Why this product is recommended', max_length=200)),
+                ('sort_order', models.PositiveIntegerField(default=0)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_recommendations', to=settings.WAGTAIL_PAGE_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+            ],
+            options={
+                'ordering': ['sort_order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SafetyGuidePage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to=settings.WAGTAIL_PAGE_MODEL)),
+                ('target_age_group', models.CharField(help_text="e.g., 'Newborns', 'Infants 6-12 months'", max_length=100)),
+                ('safety_standards', wagtail.fields.RichTextField()),
+                ('key_guidelines', wagtail.fields.StreamField([('safety_guide', 5), ('baby_tips', 8)], block_lookup={0: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 1: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'ASTM F963-17'", 'max_length': 100}), 2: ('wagtail.blocks.CharBlock', (), {'max_length': 200}), 3: ('wagtail.blocks.ListBlock', (2,), {'help_text': 'Key safety points for parents'}), 4: ('wagtail.blocks.TextBlock', (), {'help_text': 'Any warnings or precautions', 'required': False}), 5: ('wagtail.blocks.StructBlock', [[('title', 0), ('safety_standard', 1), ('key_points', 3), ('warning_text', 4)]], {}), 6: ('wagtail.blocks.MultipleChoiceBlock', [], {'choices': [('newborn', 'Newborn (0-2 months)'), ('infant', 'Infant (3-11 months)'), ('toddler', 'Toddler (1-3 years)')], 'required': False}), 7: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': False}), 8: ('wagtail.blocks.StructBlock', [[('title', 0), ('age_groups', 6), ('featured_image', 7)]], {})})),
+                ('featured_products', models.ManyToManyField(blank=True, related_name='safety_guides', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Safety Guide Page',
+            },
+            bases=(catalog.page_cache.SurrogateKeyPageMixin, 'wagtailcore.page'),
+        ),
+    ]
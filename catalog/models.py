@@ -6,17 +6,17 @@ from wagtail import blocks
 from wagtail.search import index
 from django.db import models
 from django.utils.text import slugify
+from products.choosers import ProductChooserBlock, preload_products
 from products.models import Product, Category
 
+from .page_cache import SurrogateKeyPageMixin
+
 
 # Custom StreamField blocks for baby products
 class ProductBlock(blocks.StructBlock):
     """Product block to feature specific baby products"""
 
-    product = blocks.ChoiceBlock(
-        choices=[],  # Will be populated dynamically
-        label="Select Product",
-    )
+    product = ProductChooserBlock(label="Select Product")
     show_description = blocks.BooleanBlock(default=True, required=False)
     show_price = blocks.BooleanBlock(default=True, required=False)
 
@@ -24,6 +24,16 @@ class ProductBlock(blocks.StructBlock):
         icon = "tag"
         template = "blocks/product_block.html"
 
+    def get_context(self, value, parent_context=None):
+        context = super().get_context(value, parent_context=parent_context)
+        product = value.get("product")
+        context["product"] = product
+        context["primary_image"] = None
+        if product is not None:
+            gallery = getattr(product, "primary_images", None) or [None]
+            context["primary_image"] = product.featured_image or gallery[0]
+        return context
+
 
 class BabyTipsBlock(blocks.StructBlock):
     """Block for baby care tips and safety guides"""
@@ -77,8 +87,51 @@ class AgeBasedProductBlock(blocks.StructBlock):
         template = "blocks/age_based_products.html"
 
 
+def stream_product_ids(stream_value):
+    """Product IDs chosen in ``ProductBlock``s anywhere in a StreamField
+
+    Reads the stored JSON, so no product is loaded.
+    """
+    ids = set()
+    pending = list(stream_value.raw_data)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            product = node.get("product")
+            if isinstance(product, (int, str)) and str(product).isdigit():
+                ids.add(int(product))
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return ids
+
+
+class ProductStreamMixin:
+    """Resolve the products of every StreamField in one query per render
+
+    ``product_stream_fields`` names the StreamFields to walk; the IDs are
+    read from their stored JSON, loaded together, and product blocks take
+    their values from that map while the page renders.
+    """
+
+    product_stream_fields = []
+
+    def get_stream_product_ids(self):
+        ids = set()
+        for name in self.product_stream_fields:
+            ids |= stream_product_ids(getattr(self, name))
+        return ids
+
+    def serve(self, request, *args, **kwargs):
+        response = super().serve(request, *args, **kwargs)
+        if hasattr(response, "render"):
+            with preload_products(self.get_stream_product_ids()):
+                response.render()
+        return response
+
+
 # Main content page models
-class HomePage(Page):
+class HomePage(SurrogateKeyPageMixin, ProductStreamMixin, Page):
     """Home page with featured products and baby guides"""
 
     hero_title = models.CharField(max_length=200, default="Premium Baby Products")
@@ -111,15 +164,24 @@ class HomePage(Page):
         FieldPanel("featured_products"),
     ]
 
+    product_stream_fields = ["featured_products"]
+
     class Meta:
         verbose_name = "Home Page"
 
+    def get_surrogate_keys(self):
+        return super().get_surrogate_keys() + [
+            f"product:{pk}" for pk in self.get_stream_product_ids()
+        ]
+
 
-class ProductCategoryPage(Page):
+class ProductCategoryPage(SurrogateKeyPageMixin, Page):
     """Page for product categories"""
 
+    # PROTECT, not CASCADE: a database cascade would bypass Wagtail's tree
+    # bookkeeping. The admin lists the page as protected; delete it first.
     category = models.OneToOneField(
-        Category, on_delete=models.CASCADE, related_name="page"
+        Category, on_delete=models.PROTECT, related_name="page"
     )
 
     intro_text = RichTextField(blank=True)
@@ -150,12 +212,38 @@ class ProductCategoryPage(Page):
     class Meta:
         verbose_name = "Product Category Page"
 
+    @property
+    def breadcrumbs(self):
+        """Category ancestry (root first) from the stored materialized path"""
+        return self.category.breadcrumb
+
+    # Newest products shown on the page; the products API pages through the rest
+    listing_size = 24
+
+    def get_products(self):
+        return Product.objects.in_category_tree(self.category).filter(is_active=True)
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        context["products"] = self.get_products().order_by("-created_at", "-id")[
+            : self.listing_size
+        ]
+        return context
+
+    def get_surrogate_keys(self):
+        # The listing covers the whole subtree, so any category in it purges
+        subtree = self.category.descendants(include_self=True)
+        return super().get_surrogate_keys() + [
+            f"category:{pk}" for pk in subtree.values_list("pk", flat=True)
+        ]
 
-class ProductDetailPage(Page):
+
+class ProductDetailPage(SurrogateKeyPageMixin, ProductStreamMixin, Page):
     """Detailed product page with Wagtail integration"""
 
+    # PROTECT for the same reason as ProductCategoryPage.category
     product = models.OneToOneField(
-        Product, on_delete=models.CASCADE, related_name="page"
+        Product, on_delete=models.PROTECT, related_name="page"
     )
 
     additional_content = StreamField(
@@ -184,11 +272,18 @@ class ProductDetailPage(Page):
         index.SearchField("safety_warnings"),
     ]
 
+    product_stream_fields = ["additional_content"]
+
     class Meta:
         verbose_name = "Product Detail Page"
 
+    def get_surrogate_keys(self):
+        return super().get_surrogate_keys() + [
+            f"product:{pk}" for pk in {self.product_id, *self.get_stream_product_ids()}
+        ]
+
 
-class SafetyGuidePage(Page):
+class SafetyGuidePage(SurrogateKeyPageMixin, Page):
     """Page for comprehensive safety guides"""
 
     target_age_group = models.CharField(
@@ -222,8 +317,12 @@ class SafetyGuidePage(Page):
     class Meta:
         verbose_name = "Safety Guide Page"
 
+    def get_surrogate_keys(self):
+        product_ids = self.featured_products.values_list("pk", flat=True)
+        return super().get_surrogate_keys() + [f"product:{pk}" for pk in product_ids]
 
-class BlogPage(Page):
+
+class BlogPage(ProductStreamMixin, Page):
     """Blog for parenting tips and baby care advice"""
 
     featured_image = models.ForeignKey(
@@ -265,6 +364,8 @@ class BlogPage(Page):
         index.SearchField("tags"),
     ]
 
+    product_stream_fields = ["content"]
+
     class Meta:
         verbose_name = "Blog Post"
 
@@ -0,0 +1,155 @@
+"""Full-page cache for Wagtail pages with surrogate-key purging.
+
+Pages that mix in ``SurrogateKeyPageMixin`` tag their responses with a
+``Surrogate-Key`` header (``page:<id>``, ``product:<id>``,
+``category:<id>``) that an upstream cache such as Fastly can purge by.
+``SurrogateKeyCacheMiddleware`` also stores those responses per URL in
+the Django cache, which is local memory or Redis depending on
+``CACHES``.
+
+Purging is generation based: every key has a counter in the cache, each
+stored page records the counters of its keys, and ``purge()`` bumps the
+counters. A page is served only while all of its counters still match,
+so a purge invalidates exactly the pages carrying the key without having
+to track which URLs those are. ``surrogate_keys_purged`` is sent after
+each purge for upstream integrations to forward.
+"""
+
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.http import HttpResponse
+
+from babygoods.perf import record_cache
+from products.cache import bump_generations, generations
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+DEFAULT_TIMEOUT = 60 * 10
+PAGE_KEY = "catalog:page-cache:page:{}"
+GENERATION_KEY = "catalog:page-cache:key:{}"
+
+# Sent with ``keys`` after they are purged locally
+surrogate_keys_purged = Signal()
+
+
+def _generations(keys):
+    cache_keys = {GENERATION_KEY.format(key): key for key in keys}
+    found = generations(list(cache_keys))
+    return {cache_keys[cache_key]: value for cache_key, value in found.items()}
+
+
+def purge(keys):
+    """Invalidate every cached page tagged with any of ``keys``"""
+    keys = sorted(set(keys))
+    bump_generations(GENERATION_KEY.format(key) for key in keys)
+    if keys:
+        surrogate_keys_purged.send(sender=None, keys=keys)
+
+
+def _page_key(request):
+    url = request.build_absolute_uri()
+    return PAGE_KEY.format(hashlib.md5(url.encode()).hexdigest())
+
+
+def _cacheable_request(request):
+    # Editors carry a session; they always get fresh pages
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def _cacheable_response(request, response):
+    cache_control = response.get("Cache-Control", "")
+    return (
+        response.status_code == 200
+        and SURROGATE_KEY_HEADER in response
+        and not response.streaming
+        and not response.cookies
+        and not getattr(request, "is_preview", False)
+        and "private" not in cache_control
+        and "no-store" not in cache_control
+    )
+
+
+class SurrogateKeyCacheMiddleware:
+    """Serve and store pages that carry a ``Surrogate-Key`` header
+
+    Place it high in ``MIDDLEWARE`` so a hit skips sessions, auth and
+    page routing entirely. Under ASGI the cache is read and written off
+    the event loop.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, "PAGE_CACHE_SECONDS", DEFAULT_TIMEOUT)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _cacheable_request(request):
+            return self.get_response(request)
+        return self.cached_response(request) or self.store(
+            request, self.get_response(request)
+        )
+
+    async def __acall__(self, request):
+        if not _cacheable_request(request):
+            return await self.get_response(request)
+        response = await sync_to_async(self.cached_response)(request)
+        if response is None:
+            response = await self.get_response(request)
+            response = await sync_to_async(self.store)(request, response)
+        return response
+
+    def cached_response(self, request):
+        entry = cache.get(_page_key(request))
+        if entry and _generations(entry["keys"]) == entry["keys"]:
+            record_cache(hit=True)
+            response = HttpResponse(entry["content"], status=entry["status"])
+            for header, value in entry["headers"]:
+                response[header] = value
+            response["X-Page-Cache"] = "hit"
+            return response
+        return None
+
+    def store(self, request, response):
+        if _cacheable_response(request, response):
+            keys = response[SURROGATE_KEY_HEADER].split()
+            entry = {
+                "content": response.content,
+                "status": response.status_code,
+                "headers": list(response.items()),
+                "keys": _generations(keys),
+            }
+            cache.set(_page_key(request), entry, self.timeout)
+            response["X-Page-Cache"] = "miss"
+            record_cache(hit=False)
+        return response
+
+
+class SurrogateKeyPageMixin:
+    """Tag served pages with their surrogate keys
+
+    Subclasses extend ``get_surrogate_keys()`` with the records the page
+    renders.
+    """
+
+    def get_surrogate_keys(self):
+        return [f"page:{self.pk}"]
+
+    def serve(self, request, *args, **kwargs):
+        response = super().serve(request, *args, **kwargs)
+        if getattr(request, "is_preview", False):
+            return response
+        keys = sorted(set(self.get_surrogate_keys()))
+        response[SURROGATE_KEY_HEADER] = " ".join(keys)
+        return response
@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from wagtail.signals import page_published, page_unpublished
+
+from products.cache import products_changed
+from products.models import Category, Product, ProductVariant
+
+from .page_cache import purge
+
+
+def purge_on_commit(keys):
+    transaction.on_commit(lambda: purge(keys))
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_category(sender, instance, **kwargs):
+    # A product moving category must also leave its old listing
+    if instance.pk:
+        instance._previous_category_id = (
+            Product.objects.filter(pk=instance.pk)
+            .values_list("category_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_category_id", None)
+    category_ids = {instance.category_id, previous} - {None}
+    purge_on_commit(
+        [f"product:{instance.pk}"] + [f"category:{pk}" for pk in category_ids]
+    )
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def variant_changed(sender, instance, **kwargs):
+    purge_on_commit([f"product:{instance.product_id}"])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # The parent's listing (and through its key, every ancestor's) includes
+    # this subtree, which matters when the category was moved under it
+    category_ids = {instance.pk, instance.parent_id} - {None}
+    purge_on_commit([f"category:{pk}" for pk in category_ids])
+
+
+@receiver(products_changed)
+def products_written(sender, product_ids, category_ids, **kwargs):
+    # Bulk writes and stock updates; sent after commit, so purge directly
+    category_ids = category_ids | set(
+        Product.objects.filter(pk__in=product_ids).values_list("category_id", flat=True)
+    )
+    purge(
+        [f"product:{pk}" for pk in product_ids]
+        + [f"category:{pk}" for pk in category_ids]
+    )
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def page_changed(sender, instance, **kwargs):
+    purge_on_commit([f"page:{instance.pk}"])
@@ -1,3 +1,88 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from wagtail.models import Site
 
-# Create your tests here.
+from products.models import Category, Product
+
+from .models import ProductDetailPage
+
+
+class ProductDetailPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(
+            name="Travel Cot",
+            slug="travel-cot",
+            sku="cot",
+            description="Folds flat.",
+            short_description="",
+            price=80,
+            materials="",
+            category=Category.objects.create(name="Nursery"),
+        )
+        self.page = ProductDetailPage(
+            title="Travel Cot", slug="travel-cot", product=self.product
+        )
+        Site.objects.get(is_default_site=True).root_page.add_child(instance=self.page)
+
+    def test_served_from_cache_until_the_product_changes(self):
+        url = self.page.url
+        first = self.client.get(url)
+        self.assertContains(first, "Folds flat.")
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.description = "Folds flat in seconds."
+            self.product.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Folds flat in seconds.")
+
+
+class ProtectedPageTests(TestCase):
+    """Products and categories with a catalog page are not deleted under it"""
+
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pw")
+        )
+        self.category = Category.objects.create(name="Nursery")
+        self.product = Product.objects.create(
+            name="Cot",
+            slug="cot",
+            sku="cot",
+            description="",
+            short_description="",
+            price=80,
+            materials="",
+            category=self.category,
+        )
+        page = ProductDetailPage(title="Cot", slug="cot", product=self.product)
+        Site.objects.get(is_default_site=True).root_page.add_child(instance=page)
+
+    def test_admin_delete_lists_the_page_as_protected(self):
+        for obj in (self.product, self.category):
+            url = reverse(
+                f"admin:products_{obj._meta.model_name}_delete", args=[obj.pk]
+            )
+            response = self.client.post(url, {"post": "yes"})
+            self.assertContains(response, "protected related objects")
+            self.assertTrue(type(obj).objects.filter(pk=obj.pk).exists())
+
+    def test_admin_bulk_delete_lists_the_page_as_protected(self):
+        url = reverse("admin:products_product_changelist")
+        response = self.client.post(
+            url,
+            {"action": "delete_selected", "_selected_action": [self.product.pk]},
+        )
+        self.assertContains(response, "protected related objects")
+        self.assertTrue(Product.objects.filter(pk=self.product.pk).exists())
+
+    def test_deleted_once_the_page_is_gone(self):
+        ProductDetailPage.objects.get().delete()
+        self.product.delete()
+        self.assertFalse(Product.objects.exists())
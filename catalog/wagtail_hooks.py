@@ -1,13 +1,7 @@
 from wagtail.snippets.models import register_snippet
-from products.models import AgeGroup, SafetyCertification
 
+from products.models import AgeGroup, SafetyCertification
 
 # Register snippets for Wagtail admin
-@register_snippet
-class AgeGroupSnippet:
-    pass
-
-
-@register_snippet
-class SafetyCertificationSnippet:
-    pass
+register_snippet(AgeGroup)
+register_snippet(SafetyCertification)
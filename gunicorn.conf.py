@@ -0,0 +1,40 @@
+"""gunicorn settings for production_wsgi:application
+
+Every value can be overridden from the environment or the command line.
+"""
+
+import os
+import time
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "3"))
+timeout = 120
+# Load the app once in the master; workers fork from it
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true")
+# Path each worker requests once before serving, e.g. "/"; empty to skip
+warmup_path = os.environ.get("WSGI_WARMUP_PATH", "")
+
+
+def pre_fork(server, worker):
+    worker.boot_started = time.monotonic()
+    if server.cfg.preload_app:
+        from django.core.cache import caches
+        from django.db import connections
+
+        # Workers must open their own connections, not share the master's
+        connections.close_all()
+        caches.close_all()
+
+
+def post_worker_init(worker):
+    if warmup_path:
+        from babygoods.startup import StartupTimer, warm_up
+
+        # Reported like the master's load phases, as its own line
+        timer = StartupTimer()
+        with timer.phase("warmup"):
+            status = warm_up(worker.wsgi, warmup_path)
+        timer.notes.append(f"warmup GET {warmup_path}: {status}")
+        timer.report()
+    boot_ms = (time.monotonic() - worker.boot_started) * 1000
+    worker.log.info("Worker %s booted in %.0f ms", worker.pid, boot_ms)
@@ -1,10 +1,19 @@
 #!/usr/bin/env python
-"""Production WSGI application for Baby Goods Dealer"""
+"""Production WSGI application for Baby Goods Dealer
+
+Importing this module only loads Django; static files are collected once
+when the image is built (see the Dockerfile), never by workers. Startup
+phase timings are written to stderr (see babygoods.startup). Warming up
+with a request is left to each gunicorn worker (``WSGI_WARMUP_PATH`` in
+gunicorn.conf.py).
+"""
 
 import os
-import sys
+
 from decouple import config
 
+from babygoods.startup import load_wsgi_application
+
 # Production settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "babygoods.settings")
 os.environ["DEBUG"] = "False"
@@ -16,25 +25,4 @@ os.environ["WAGTAILADMIN_BASE_URL"] = config(
     "WAGTAILADMIN_BASE_URL", default="http://localhost:8001"
 )
 
-try:
-    from django.core.wsgi import get_wsgi_application
-
-    application = get_wsgi_application()
-
-    # Collect static files if not already collected
-    from django.core.management import execute_from_command_line
-
-    try:
-        execute_from_command_line(["manage.py", "collectstatic", "--noinput"])
-    except:
-        pass  # Static files might already be collected
-
-except ImportError:
-    # Django not installed, provide a simple WSGI app
-    def application(environ, start_response):
-        status = "200 OK"
-        headers = [("Content-type", "text/plain")]
-        start_response(status, headers)
-        return [b"Baby Goods Dealer - Django not installed"]
-
-    sys.exit(1)
+application = load_wsgi_application()
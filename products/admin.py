@@ -1,15 +1,21 @@
 from django.contrib import admin
+from django.db.models import Q
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import (
     AgeGroup,
     SafetyCertification,
     Category,
+    LowStockAlert,
     Product,
     ProductVariant,
     ProductImage,
     ProductReview,
 )
+from .images import admin_thumbnail
+from .reviews import refresh_review_aggregates
+from .search import search_condition
+from .variants import deferred_matrix_refresh
 
 
 @admin.register(AgeGroup)
@@ -29,9 +35,7 @@ class SafetyCertificationAdmin(admin.ModelAdmin):
     search_fields = ["name", "abbreviation"]
 
     def icon_preview(self, obj):
-        if obj.icon:
-            return format_html('<img src="{}" width="50" height="50" />', obj.icon.url)
-        return "No icon"
+        return admin_thumbnail(obj.icon, 50, 50, empty="No icon")
 
     icon_preview.short_description = "Icon"
 
@@ -39,7 +43,16 @@ class SafetyCertificationAdmin(admin.ModelAdmin):
 class ProductVariantInline(admin.TabularInline):
     model = ProductVariant
     extra = 1
-    fields = ["name", "sku", "size", "color", "price", "stock", "is_active"]
+    fields = [
+        "name",
+        "sku",
+        "size",
+        "color",
+        "price",
+        "stock",
+        "low_stock_threshold",
+        "is_active",
+    ]
 
 
 class ProductImageInline(admin.TabularInline):
@@ -56,9 +69,7 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" />', obj.image.url)
-        return "No image"
+        return admin_thumbnail(obj.image, 50, 50)
 
     image_preview.short_description = "Image"
 
@@ -68,6 +79,19 @@ class CategoryAdmin(admin.ModelAdmin):
     product_count.short_description = "Products"
 
 
+class SafetyStatusFilter(admin.SimpleListFilter):
+    title = "safety status"
+    parameter_name = "safety_status"
+
+    def lookups(self, request, model_admin):
+        return [("complete", "Safe"), ("incomplete", "Incomplete")]
+
+    def queryset(self, request, queryset):
+        if self.value() in ("complete", "incomplete"):
+            return queryset.filter(safety_status=self.value())
+        return queryset
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = [
@@ -87,7 +111,9 @@ class ProductAdmin(admin.ModelAdmin):
         "is_featured",
         "age_groups",
         "safety_certifications",
+        SafetyStatusFilter,
     ]
+    list_select_related = ["category"]
     search_fields = ["name", "description", "sku"]
     prepopulated_fields = {"slug": ("name",)}
     filter_horizontal = ["age_groups", "safety_certifications"]
@@ -147,6 +173,26 @@ class ProductAdmin(admin.ModelAdmin):
         ),
     )
 
+    def changeform_view(self, *args, **kwargs):
+        # One matrix refresh for the product and all its inline variants
+        with deferred_matrix_refresh():
+            return super().changeform_view(*args, **kwargs)
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .with_safety_status()
+            .prefetch_related("age_groups")
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = search_condition(queryset, search_term)
+        return queryset.filter(matches | Q(sku=search_term)), False
+
     def stock_status(self, obj):
         if not obj.track_inventory:
             return "Not Tracked"
@@ -166,7 +212,7 @@ class ProductAdmin(admin.ModelAdmin):
     stock_status.short_description = "Stock Status"
 
     def age_groups_display(self, obj):
-        groups = list(obj.age_groups.values_list("name", flat=True))
+        groups = [group.name for group in obj.age_groups.all()]
         return ", ".join(groups[:3]) + ("..." if len(groups) > 3 else "")
 
     age_groups_display.short_description = "Age Groups"
@@ -179,12 +225,14 @@ class ProductAdmin(admin.ModelAdmin):
             return format_html('<span style="color: red;">⚠️ Incomplete</span>')
 
     safety_status.short_description = "Safety Status"
+    safety_status.admin_order_field = "safety_status"
 
 
 @admin.register(ProductVariant)
 class ProductVariantAdmin(admin.ModelAdmin):
     list_display = ["name", "product", "size", "color", "price", "stock", "is_active"]
     list_filter = ["size", "color", "is_active", "product__category"]
+    list_select_related = ["product"]
     search_fields = ["name", "sku", "product__name"]
 
     def price(self, obj):
@@ -196,16 +244,34 @@ class ProductVariantAdmin(admin.ModelAdmin):
         return "Out of stock"
 
 
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = [
+        "product",
+        "variant",
+        "stock",
+        "threshold",
+        "created_at",
+        "resolved_at",
+    ]
+    list_filter = [("resolved_at", admin.EmptyFieldListFilter)]
+    list_select_related = ["product", "variant"]
+    search_fields = ["product__name", "product__sku", "variant__sku"]
+    readonly_fields = ["product", "variant", "stock", "threshold", "created_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(ProductImage)
 class ProductImageAdmin(admin.ModelAdmin):
     list_display = ["product", "image_preview", "alt_text", "sort_order"]
+    list_select_related = ["product"]
     list_filter = ["product__category"]
     search_fields = ["product__name", "alt_text"]
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="80" height="60" />', obj.image.url)
-        return "No image"
+        return admin_thumbnail(obj.image, 80, 60)
 
     image_preview.short_description = "Image"
 
@@ -231,11 +297,15 @@ class ProductReviewAdmin(admin.ModelAdmin):
     rating_display.short_description = "Rating"
 
     def approve_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list("product_id", flat=True))
         queryset.update(is_approved=True)
+        refresh_review_aggregates(product_ids)
 
     approve_reviews.short_description = "Approve selected reviews"
 
     def reject_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list("product_id", flat=True))
         queryset.update(is_approved=False)
+        refresh_review_aggregates(product_ids)
 
     reject_reviews.short_description = "Reject selected reviews"
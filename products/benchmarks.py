@@ -0,0 +1,228 @@
+"""Repeatable timings of the storefront and admin hot paths.
+
+Each path is one in-process request through the full middleware stack
+(or, for the StreamField page, one ``Page.serve()``), timed over
+``iterations`` runs after ``warmup`` untimed ones, so caches are warm
+and the numbers describe steady state. Paths run in a fixed order with
+the garbage collector paused while timing, as ``timeit`` does. Every run
+reports p50/p95/p99 latency and the queries per request, plus the
+commit, database and catalog size it ran against, so results from
+``seed_catalog`` databases can be compared across commits.
+"""
+
+import gc
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client, RequestFactory
+from django.urls import NoReverseMatch, reverse
+
+from babygoods.startup import request_host
+
+from .models import Category, Product
+
+BENCH_USERNAME = "bench-admin"
+SEARCH_TERMS = "organic cotton"
+
+
+class Skip(Exception):
+    pass
+
+
+@contextmanager
+def count_queries():
+    """Count the queries run on every connection of this thread"""
+    counter = [0]
+
+    def count(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(count))
+        yield counter
+
+
+def _largest_root_category():
+    """Root of the leaf category holding the most products"""
+    busiest = (
+        Product.objects.order_by()
+        .values("category")
+        .annotate(n=Count("pk"))
+        .order_by("-n", "category")
+        .first()
+    )
+    if busiest is None:
+        raise Skip("no products; run seed_catalog first")
+    category = Category.objects.get(pk=busiest["category"])
+    return category.breadcrumb[0]["slug"] if category.breadcrumb else category.slug
+
+
+class Paths:
+    """The benchmarked paths, each set up once and returning a request callable"""
+
+    names = [
+        "admin_product_changelist",
+        "admin_product_search",
+        "category_listing",
+        "home_page",
+        "streamfield_page",
+    ]
+
+    def __init__(self):
+        host = request_host(settings.ALLOWED_HOSTS)
+        self.anonymous = Client(HTTP_HOST=host)
+        self.factory = RequestFactory(HTTP_HOST=host)
+        self._staff = None
+
+    @property
+    def staff(self):
+        if self._staff is None:
+            user, _ = User.objects.get_or_create(
+                username=BENCH_USERNAME,
+                defaults={"is_staff": True, "is_superuser": True},
+            )
+            self._staff = Client(HTTP_HOST=self.anonymous.defaults["HTTP_HOST"])
+            self._staff.force_login(user)
+        return self._staff
+
+    def admin_product_changelist(self):
+        url = reverse("admin:products_product_changelist")
+        return lambda: self.staff.get(url)
+
+    def admin_product_search(self):
+        url = reverse("admin:products_product_changelist")
+        return lambda: self.staff.get(url, {"q": SEARCH_TERMS})
+
+    def category_listing(self):
+        url = reverse("products:api_product_list")
+        slug = _largest_root_category()
+        return lambda: self.anonymous.get(url, {"category": slug})
+
+    def home_page(self):
+        url = reverse("home")
+        return lambda: self.anonymous.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+
+    def streamfield_page(self):
+        if not apps.is_installed("catalog"):
+            raise Skip("the catalog app is not installed")
+        HomePage = apps.get_model("catalog", "HomePage")
+        page = HomePage.objects.live().exclude(featured_products=[]).order_by("pk").first()
+        if page is None:
+            raise Skip("no live catalog home page with a StreamField")
+
+        def serve():
+            request = self.factory.get(page.url or "/")
+            request.user = AnonymousUser()
+            return page.serve(request)
+
+        return serve
+
+
+def _summary(samples, queries, status):
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "iterations": len(samples),
+        "status": status,
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "queries": statistics.median_low(queries),
+        "queries_max": max(queries),
+    }
+
+
+def measure(request, iterations, warmup):
+    for _ in range(warmup):
+        request()
+    samples, queries = [], []
+    status = None
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            with count_queries() as counter:
+                started = time.perf_counter()
+                response = request()
+                samples.append((time.perf_counter() - started) * 1000)
+            queries.append(counter[0])
+            status = response.status_code
+    finally:
+        gc.enable()
+    return _summary(samples, queries, status)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(iterations, warmup):
+    return {
+        "commit": _git_commit(),
+        "database": connection.vendor,
+        "products": Product.objects.count(),
+        "categories": Category.objects.count(),
+        "iterations": iterations,
+        "warmup": warmup,
+        "debug": settings.DEBUG,
+        "cache": settings.CACHES["default"]["BACKEND"],
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "timestamp": int(time.time()),
+    }
+
+
+def run_benchmarks(iterations=50, warmup=3, only=None, progress=None):
+    """Results for every path (or those named in ``only``), in a fixed order"""
+    paths = Paths()
+    results = {}
+    for name in paths.names:
+        if only and name not in only:
+            continue
+        try:
+            request = getattr(paths, name)()
+        except Skip as exc:
+            results[name] = {"skipped": str(exc)}
+        except NoReverseMatch:
+            results[name] = {"skipped": "not in the URL conf"}
+        else:
+            results[name] = measure(request, iterations, warmup)
+        if progress:
+            progress(name, results[name])
+    return {"environment": environment(iterations, warmup), "paths": results}
+
+
+def compare(baseline, current, keys=("p50_ms", "p95_ms", "p99_ms", "queries")):
+    """(path, key, before, after, percent change) for paths in both runs"""
+    rows = []
+    for name, result in current["paths"].items():
+        before = baseline["paths"].get(name, {})
+        for key in keys:
+            if key in result and key in before:
+                change = (
+                    (result[key] - before[key]) / before[key] * 100 if before[key] else None
+                )
+                rows.append((name, key, before[key], result[key], change))
+    return rows
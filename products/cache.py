@@ -0,0 +1,245 @@
+"""Versioned queryset cache.
+
+``cached_queryset(key, queryset, deps=[Product, Category])`` keeps the
+rows of a queryset (or the result of a callable) in the shared cache.
+Every model has a generation counter in the cache that signal handlers
+bump when a row is saved or deleted, and ``invalidate_models()`` bumps
+for bulk writes that skip signals. ``generations()`` and
+``bump_generations()`` are the counters' read and write side; the page
+cache, facet index, home page and safety memo key their entries by them
+as well. An entry records the generations of
+its ``deps`` and is only a hit while all of them still match, so callers
+never have to know which keys a write affects. Bulk writes also call
+``products_written()``, which sends ``products_changed`` after commit
+for caches kept outside this module, such as the catalog page cache.
+
+Rebuilds are guarded by a lock: when an entry expires or is invalidated,
+one process recomputes it while the others keep serving the previous
+value (kept ``STALE_SECONDS`` past its timeout) or, when there is none,
+wait up to ``WAIT_SECONDS`` for it. If the cache itself fails, e.g.
+Redis is unreachable, the queryset is evaluated directly.
+
+Hit, stale, miss and error counts and lookup/build times are counted
+per process and added to shared counters every ``STATS_FLUSH_SECONDS``;
+``cache_stats()`` returns the totals.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+from babygoods.perf import record_cache
+
+try:
+    from redis.exceptions import RedisError
+except ImportError:  # only needed with the Redis backend
+    CACHE_ERRORS = (OSError,)
+else:
+    CACHE_ERRORS = (OSError, RedisError)
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "cache:generation:{}"
+ENTRY_KEY = "cache:queryset:{}"
+LOCK_KEY = "cache:queryset:{}:lock"
+STATS_KEY = "cache:stats:{}"
+DEFAULT_TIMEOUT = 60 * 5
+STALE_SECONDS = 60
+LOCK_SECONDS = 30
+WAIT_SECONDS = 2
+STATS_FLUSH_SECONDS = 10
+STATS = ["hit", "stale", "miss", "error", "lookup_us", "build_us"]
+
+# Sent with ``product_ids`` and ``category_ids`` after writes that send no
+# model signals (queryset updates, bulk_create and bulk_update)
+products_changed = Signal()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed = time.monotonic()
+
+
+def generations(keys, extra=()):
+    """Current values of the generation counters ``keys``
+
+    Missing counters are seeded with a fresh value, so an evicted counter
+    never matches entries stored under its old value. ``extra`` keys are
+    read in the same round trip and included when found.
+    """
+    found = cache.get_many([*extra, *keys])
+    missing = [key for key in keys if key not in found]
+    if missing:
+        seed = time.time_ns()
+        for key in missing:
+            cache.add(key, seed, None)
+        found.update(cache.get_many(missing))
+    return found
+
+
+def bump_generations(keys):
+    """Invalidate everything stored under the counters ``keys``"""
+    for key in sorted(set(keys)):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def _generation_keys(models):
+    return {GENERATION_KEY.format(model._meta.label_lower) for model in models}
+
+
+def invalidate_models(*models):
+    """Invalidate every cached queryset that depends on ``models``"""
+    bump_generations(_generation_keys(models))
+
+
+def products_written(product_ids, category_ids=()):
+    """Send ``products_changed`` once the current transaction commits"""
+    product_ids, category_ids = set(product_ids), set(category_ids) - {None}
+    if not product_ids and not category_ids:
+        return
+
+    def send():
+        products_changed.send(
+            sender=None, product_ids=product_ids, category_ids=category_ids
+        )
+
+    # robust: a failed purge must not fail the write that committed
+    transaction.on_commit(send, robust=True)
+
+
+def _lookup(key, deps):
+    """The stored entry and the current generations of ``deps``"""
+    entry_key = ENTRY_KEY.format(key)
+    generation_keys = sorted(_generation_keys(deps))
+    found = generations(generation_keys, extra=[entry_key])
+    return found.get(entry_key), [found.get(k) for k in generation_keys]
+
+
+def _store(key, value, generations, timeout):
+    entry = {
+        "value": value,
+        "generations": generations,
+        "fresh_until": time.time() + timeout,
+    }
+    cache.set(ENTRY_KEY.format(key), entry, timeout + STALE_SECONDS)
+
+
+def _unlock(key):
+    try:
+        cache.delete(LOCK_KEY.format(key))
+    except CACHE_ERRORS:
+        pass  # expires after LOCK_SECONDS
+
+
+def _wait_for(key, deps):
+    """Wait for another process's rebuild to land"""
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry, generations = _lookup(key, deps)
+        if entry and entry["generations"] == generations:
+            return entry
+    return None
+
+
+def cached_queryset(key, queryset, deps=None, timeout=DEFAULT_TIMEOUT):
+    """Cached ``list(queryset)``, or ``queryset()`` when it is a callable
+
+    ``deps`` are the models the result is read from; they default to the
+    queryset's model and must be given for callables.
+    """
+    if deps is None:
+        deps = [queryset.model]
+    build = queryset if callable(queryset) else lambda: list(queryset)
+
+    started = time.perf_counter_ns()
+    try:
+        entry, generations = _lookup(key, deps)
+        current = entry is not None and entry["generations"] == generations
+        if current and entry["fresh_until"] > time.time():
+            _record("hit", "lookup_us", started)
+            return entry["value"]
+
+        locked = cache.add(LOCK_KEY.format(key), 1, LOCK_SECONDS)
+        if not locked:
+            # Someone else is rebuilding it
+            if entry is None:
+                entry = _wait_for(key, deps)
+            if entry is not None:
+                _record("stale", "lookup_us", started)
+                return entry["value"]
+    except CACHE_ERRORS:
+        logger.warning("Cache unavailable for %s", key, exc_info=True)
+        _record("error", "build_us", started)
+        return build()
+
+    try:
+        value = build()
+        try:
+            _store(key, value, generations, timeout)
+        except CACHE_ERRORS:
+            logger.warning("Could not store %s", key, exc_info=True)
+    finally:
+        if locked:
+            _unlock(key)
+    _record("miss", "build_us", started)
+    return value
+
+
+def _record(outcome, timer, started):
+    global _stats_flushed
+
+    record_cache(hit=outcome in ("hit", "stale"))
+    with _stats_lock:
+        _stats[outcome] += 1
+        _stats[timer] += (time.perf_counter_ns() - started) // 1000
+        if time.monotonic() - _stats_flushed < STATS_FLUSH_SECONDS:
+            return
+        pending = dict(_stats)
+        _stats.clear()
+        _stats_flushed = time.monotonic()
+    _flush(pending)
+
+
+def _flush(pending):
+    try:
+        for name, value in pending.items():
+            stats_key = STATS_KEY.format(name)
+            cache.add(stats_key, 0, None)
+            cache.incr(stats_key, value)
+    except (ValueError, *CACHE_ERRORS):
+        logger.warning("Could not flush cache stats", exc_info=True)
+
+
+def cache_stats():
+    """Totals across processes, including this process's unflushed counts"""
+    with _stats_lock:
+        pending = dict(_stats)
+        _stats.clear()
+    _flush(pending)
+
+    found = cache.get_many([STATS_KEY.format(name) for name in STATS])
+    stats = {name: found.get(STATS_KEY.format(name), 0) for name in STATS}
+    lookups = stats["hit"] + stats["stale"]
+    builds = stats["miss"] + stats["error"]
+    total = lookups + builds
+    return {
+        "hit": stats["hit"],
+        "stale": stats["stale"],
+        "miss": stats["miss"],
+        "error": stats["error"],
+        "hit_ratio": round(lookups / total, 4) if total else None,
+        "avg_lookup_ms": round(stats["lookup_us"] / lookups / 1000, 3)
+        if lookups
+        else None,
+        "avg_build_ms": round(stats["build_us"] / builds / 1000, 3)
+        if builds
+        else None,
+    }
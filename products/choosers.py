@@ -0,0 +1,157 @@
+"""Wagtail chooser for products.
+
+The modal lists active products newest first, 20 per page, using the
+``product_active_created`` index and a count capped at 1000 rows, and searches with the catalog's
+full-text index (``Product.objects.search``). Blocks and form widgets
+built from it store only the product ID, so editor forms never load the
+catalog.
+
+When a page renders, ``preload_products()`` loads every product its
+StreamFields reference in one query (with category and first gallery
+image) and ``ProductChooserBlock`` resolves its values from that map
+instead of querying per block.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django import forms
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
+from wagtail.admin.forms.choosers import BaseFilterForm
+from wagtail.admin.paginator import WagtailPaginator
+from wagtail.admin.ui.tables import Column
+from wagtail.admin.viewsets.chooser import ChooserViewSet
+from wagtail.admin.views.generic.chooser import ChooseResultsView, ChooseView
+from wagtail.blocks import ChooserBlock
+
+from .models import Product, ProductImage
+
+_preloaded_products = ContextVar("preloaded_products", default=None)
+
+
+def product_render_queryset():
+    """Products with everything a product block renders"""
+    return Product.objects.select_related("category").prefetch_related(
+        Prefetch(
+            "images",
+            queryset=ProductImage.objects.order_by("sort_order", "pk")[:1],
+            to_attr="primary_images",
+        )
+    )
+
+
+@contextmanager
+def preload_products(ids):
+    """Resolve product chooser values from one bulk query while active"""
+    # Missing (deleted) products resolve to None without another query
+    products = dict.fromkeys(ids)
+    if ids:
+        products.update(product_render_queryset().in_bulk(ids))
+    token = _preloaded_products.set(products)
+    try:
+        yield products
+    finally:
+        _preloaded_products.reset(token)
+
+
+class CappedCountPaginator(WagtailPaginator):
+    """Counts at most ``max_count`` rows instead of the whole catalog
+
+    Browsing is limited to the first ``max_count`` results; anything
+    further back is found by searching.
+    """
+
+    max_count = 1000
+
+    @cached_property
+    def count(self):
+        return self.object_list[: self.max_count + 1].count()
+
+    @cached_property
+    def is_capped(self):
+        return self.count > self.max_count
+
+    @cached_property
+    def num_pages(self):
+        count = min(self.count, self.max_count)
+        return max(1, -(-count // self.per_page))
+
+    @cached_property
+    def items_count_label(self):
+        if self.is_capped:
+            return f"{self.max_count}+ {self.verbose_name_plural}"
+        return super().items_count_label
+
+
+class ProductSearchFilterForm(BaseFilterForm):
+    q = forms.CharField(
+        label="Search term",
+        widget=forms.TextInput(attrs={"placeholder": "Search name or SKU"}),
+        required=False,
+    )
+
+    def filter(self, objects):
+        objects = super().filter(objects)
+        search_query = self.cleaned_data.get("q")
+        if search_query:
+            sku_match = objects.filter(sku=search_query.strip())
+            if sku_match.exists():
+                objects = sku_match
+            else:
+                objects = objects.search(search_query)
+            self.is_searching = True
+            self.search_query = search_query
+        return objects
+
+
+class ProductChooseMixin:
+    filter_form_class = ProductSearchFilterForm
+    paginator_class = CappedCountPaginator
+    ordering = ["-created_at", "-id"]
+
+    def get_object_list(self):
+        return Product.objects.filter(is_active=True).only(
+            "name", "sku", "price", "created_at"
+        )
+
+    @property
+    def columns(self):
+        return super().columns + [Column("sku", label="SKU"), Column("price")]
+
+
+class ProductChooseView(ProductChooseMixin, ChooseView):
+    pass
+
+
+class ProductChooseResultsView(ProductChooseMixin, ChooseResultsView):
+    pass
+
+
+class ProductChooserBlockBase(ChooserBlock):
+    def bulk_to_python(self, values):
+        # Blocks saved by the old ChoiceBlock hold IDs as strings
+        values = [int(v) if isinstance(v, str) and v.isdigit() else v for v in values]
+        products = _preloaded_products.get()
+        if products is None or not set(values) - {None} <= products.keys():
+            products = product_render_queryset().in_bulk(values)
+        return [products.get(value) for value in values]
+
+
+class ProductChooserViewSet(ChooserViewSet):
+    model = Product
+    icon = "tag"
+    choose_one_text = "Choose a product"
+    choose_another_text = "Choose another product"
+    edit_item_text = "Edit this product"
+    per_page = 20
+    choose_view_class = ProductChooseView
+    choose_results_view_class = ProductChooseResultsView
+    base_block_class = ProductChooserBlockBase
+
+
+product_chooser_viewset = ProductChooserViewSet("product_chooser")
+
+ProductChooserBlock = product_chooser_viewset.get_block_class(
+    name="ProductChooserBlock", module_path="products.choosers"
+)
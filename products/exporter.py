@@ -0,0 +1,255 @@
+"""Streaming catalog exports: CSV, JSONL and a Google Merchant-style feed.
+
+Products are read with ``.iterator(chunk_size=...)`` and their variants
+and images are prefetched per chunk, so an export of any size holds one
+chunk in memory. Every writer is a generator of ``bytes`` that can be
+fed to a file or a ``StreamingHttpResponse``, optionally gzip-compressed
+on the fly.
+
+Item links point at the product's live catalog page, looked up once per
+chunk, or at its detail API when it has none.
+"""
+
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from .models import Product, ProductImage, ProductVariant
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "xml": "application/xml",
+}
+
+CSV_COLUMNS = [
+    "id",
+    "item_group_id",
+    "title",
+    "description",
+    "link",
+    "image_link",
+    "additional_image_links",
+    "price",
+    "sale_price",
+    "availability",
+    "stock",
+    "condition",
+    "gender",
+    "category",
+    "size",
+    "color",
+]
+
+MERCHANT_CONDITIONS = {"NEW": "new", "LIKE_NEW": "used", "GOOD": "used", "FAIR": "used"}
+MERCHANT_GENDERS = {"U": "unisex", "M": "male", "F": "female"}
+
+
+def export_queryset():
+    return (
+        Product.objects.filter(is_active=True)
+        .select_related("category")
+        .prefetch_related(
+            Prefetch("variants", queryset=ProductVariant.objects.filter(is_active=True)),
+            Prefetch("images", queryset=ProductImage.objects.all()),
+        )
+        .order_by("pk")
+    )
+
+
+def _absolute(base_url, path):
+    if not path:
+        return ""
+    if path.startswith(("http://", "https://")):
+        return path
+    return f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+
+
+def page_paths(product_ids):
+    """URLs of the live catalog pages of ``product_ids``, by product ID"""
+    if not apps.is_installed("catalog"):
+        return {}
+    page_model = apps.get_model("catalog", "ProductDetailPage")
+    pages = (
+        page_model.objects.live()
+        .filter(product_id__in=product_ids)
+        .only("product_id", "url_path")
+    )
+    return {page.product_id: page.get_url() for page in pages}
+
+
+def product_link(product, base_url, page_path=None):
+    path = page_path or reverse("products:api_product_detail", args=[product.slug])
+    return _absolute(base_url, path)
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _prices(price, compare_at_price):
+    """``(price, sale_price)``: a higher compare-at price means on sale"""
+    if compare_at_price and compare_at_price > price:
+        return str(compare_at_price), str(price)
+    return str(price), ""
+
+
+def _availability(stock, tracked, backorder):
+    if not tracked or stock > 0:
+        return "in_stock"
+    return "backorder" if backorder else "out_of_stock"
+
+
+def iter_items(base_url, chunk_size=2000):
+    """One item per active variant, or per product without variants"""
+    products = export_queryset().iterator(chunk_size=chunk_size)
+    for chunk in _chunked(products, chunk_size):
+        paths = page_paths([product.pk for product in chunk])
+        for product in chunk:
+            yield from _product_items(product, base_url, paths.get(product.pk))
+
+
+def _product_items(product, base_url, page_path):
+    images = [_absolute(base_url, i.image.url) for i in product.images.all()]
+    featured = (
+        _absolute(base_url, product.featured_image.url)
+        if product.featured_image
+        else (images[0] if images else "")
+    )
+    base = {
+        "item_group_id": product.sku,
+        "title": product.name,
+        "description": product.short_description or product.description,
+        "link": product_link(product, base_url, page_path),
+        "image_link": featured,
+        "additional_image_links": [url for url in images if url != featured][:10],
+        "condition": product.condition,
+        "gender": product.gender,
+        "category": product.category.name,
+    }
+
+    variants = list(product.variants.all())
+    if not variants:
+        price, sale_price = _prices(product.price, product.compare_at_price)
+        yield {
+            **base,
+            "id": product.sku,
+            "price": price,
+            "sale_price": sale_price,
+            "availability": _availability(
+                product.stock, product.track_inventory, product.allow_backorder
+            ),
+            "stock": product.stock,
+            "size": "",
+            "color": "",
+        }
+        return
+
+    for variant in variants:
+        # The product's compare-at price applies to every variant it exceeds
+        price, sale_price = _prices(
+            variant.price if variant.price else product.price,
+            product.compare_at_price,
+        )
+        image = _absolute(base_url, variant.image.url) if variant.image else ""
+        yield {
+            **base,
+            "id": variant.sku,
+            "title": f"{product.name} - {variant.name}",
+            "image_link": image or featured,
+            "price": price,
+            "sale_price": sale_price,
+            "availability": _availability(
+                variant.stock, variant.track_inventory, product.allow_backorder
+            ),
+            "stock": variant.stock,
+            "size": variant.size,
+            "color": variant.color,
+        }
+
+
+def write_csv(items):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for item in items:
+        writer.writerow(
+            {**item, "additional_image_links": ",".join(item["additional_image_links"])}
+        )
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def write_jsonl(items):
+    for item in items:
+        yield (json.dumps(item, ensure_ascii=False) + "\n").encode()
+
+
+def _tag(name, value):
+    return f"<g:{name}>{escape(str(value))}</g:{name}>" if value != "" else ""
+
+
+def write_merchant_xml(items, title="Baby Goods Dealer", link="", currency=None):
+    currency = currency or getattr(settings, "MERCHANT_FEED_CURRENCY", "USD")
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        f"<title>{escape(title)}</title>\n<link>{escape(link)}</link>\n"
+    ).encode()
+    for item in items:
+        price = f"{item['price']} {currency}"
+        sale_price = f"{item['sale_price']} {currency}" if item["sale_price"] else ""
+        parts = [
+            _tag("id", item["id"]),
+            _tag("item_group_id", item["item_group_id"]),
+            f"<title>{escape(item['title'])}</title>",
+            f"<description>{escape(item['description'])}</description>",
+            f"<link>{escape(item['link'])}</link>",
+            _tag("image_link", item["image_link"]),
+            *[_tag("additional_image_link", url) for url in item["additional_image_links"]],
+            _tag("price", price),
+            _tag("sale_price", sale_price),
+            _tag("availability", item["availability"]),
+            _tag("condition", MERCHANT_CONDITIONS.get(item["condition"], "new")),
+            _tag("gender", MERCHANT_GENDERS.get(item["gender"], "unisex")),
+            _tag("product_type", item["category"]),
+            _tag("size", item["size"]),
+            _tag("color", item["color"]),
+        ]
+        yield ("<item>" + "".join(parts) + "</item>\n").encode()
+    yield b"</channel>\n</rss>\n"
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "xml": write_merchant_xml}
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_catalog(fmt, base_url, compress=False, chunk_size=2000):
+    """Byte chunks of the full active catalog in ``fmt``"""
+    items = iter_items(base_url, chunk_size=chunk_size)
+    if fmt == "xml":
+        stream = write_merchant_xml(items, link=base_url)
+    else:
+        stream = WRITERS[fmt](items)
+    return gzip_stream(stream) if compress else stream
@@ -0,0 +1,269 @@
+"""In-memory bitmap index for faceted product filtering.
+
+Each facet value maps to a bitmap (a Python int with bit ``product.id``
+set) of the active products carrying that value. Filtering is AND across
+facets and OR within a facet; each facet's counts are computed against
+the other facets' selections only, so shoppers see how many products
+they would get by switching or adding a value. Many-to-many facets are
+plain bitmaps as well, so no DISTINCT or join fan-out is involved.
+
+The index is built from three queries and memoised per process. When
+product signals bump the shared version key it is rebuilt in a
+background thread (at most once per ``PRODUCT_FACET_REFRESH_SECONDS``)
+while requests keep using the previous index; only the first build in a
+process blocks.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import bump_generations, generations
+from .models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+FACET_VERSION_KEY = "products:facets:version"
+
+PRICE_BANDS = [
+    ("under-25", Decimal("0"), Decimal("25")),
+    ("25-50", Decimal("25"), Decimal("50")),
+    ("50-100", Decimal("50"), Decimal("100")),
+    ("100-250", Decimal("100"), Decimal("250")),
+    ("250-plus", Decimal("250"), None),
+]
+
+FACETS = [
+    "category",
+    "age_group",
+    "gender",
+    "condition",
+    "certification",
+    "price_band",
+]
+
+
+def price_band(price):
+    for label, low, high in PRICE_BANDS:
+        if price >= low and (high is None or price < high):
+            return label
+    return PRICE_BANDS[0][0]
+
+
+def _bitmap(positions, size):
+    data = bytearray(size)
+    for position in positions:
+        if position < size * 8:
+            data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def _bit_positions(bitmap):
+    """Set bit positions of ``bitmap`` in ascending order"""
+    positions = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            positions.append(index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+def _ancestor_ids(category_id, tree):
+    """``category_id`` and its ancestors, from ``{pk: (parent_id, path)}``
+
+    Rows written without ``save()`` (``bulk_create``, raw SQL) have no
+    materialized path yet, so their ancestry is walked through the parent
+    links instead.
+    """
+    path = tree[category_id][1]
+    if path:
+        return [int(pk) for pk in path.split("/") if pk]
+    ancestors = []
+    pk = category_id
+    while pk is not None and pk not in ancestors:
+        ancestors.append(pk)
+        pk = tree[pk][0]
+    return ancestors
+
+
+class FacetResult:
+    def __init__(self, bitmap, counts):
+        self.bitmap = bitmap
+        self.counts = counts
+
+    @property
+    def total(self):
+        return self.bitmap.bit_count()
+
+    @property
+    def product_ids(self):
+        return _bit_positions(self.bitmap)
+
+
+class FacetIndex:
+    def __init__(self):
+        self.all = 0
+        self.values = {facet: {} for facet in FACETS}
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        ids = {facet: defaultdict(list) for facet in FACETS}
+        active_ids = []
+        category_ids = defaultdict(list)
+
+        rows = (
+            Product.objects.filter(is_active=True)
+            .order_by()
+            .values_list("id", "category_id", "gender", "condition", "price")
+        )
+        for pk, category_id, gender, condition, price in rows.iterator(
+            chunk_size=5000
+        ):
+            active_ids.append(pk)
+            category_ids[category_id].append(pk)
+            ids["gender"][gender].append(pk)
+            ids["condition"][condition].append(pk)
+            ids["price_band"][price_band(price)].append(pk)
+
+        m2m = [
+            ("age_group", Product.age_groups.through, "agegroup_id"),
+            (
+                "certification",
+                Product.safety_certifications.through,
+                "safetycertification_id",
+            ),
+        ]
+        for facet, through, column in m2m:
+            rows = through.objects.order_by().values_list("product_id", column)
+            for product_id, value in rows.iterator(chunk_size=5000):
+                ids[facet][value].append(product_id)
+
+        size = max(active_ids, default=0) // 8 + 1
+        index.all = _bitmap(active_ids, size)
+        for facet in FACETS:
+            index.values[facet] = {
+                value: bitmap
+                for value, members in ids[facet].items()
+                if (bitmap := _bitmap(members, size) & index.all)
+            }
+
+        # A category matches products anywhere in its subtree
+        categories = index.values["category"]
+        tree = {
+            pk: (parent_id, path)
+            for pk, parent_id, path in Category.objects.order_by().values_list(
+                "pk", "parent_id", "path"
+            )
+        }
+        for category_id in tree:
+            members = category_ids.get(category_id)
+            if not members:
+                continue
+            bitmap = _bitmap(members, size)
+            for pk in _ancestor_ids(category_id, tree):
+                categories[pk] = categories.get(pk, 0) | bitmap
+        return index
+
+    def _selection(self, facet, selected):
+        bitmap = 0
+        for value in selected:
+            bitmap |= self.values[facet].get(value, 0)
+        return bitmap
+
+    def query(self, filters):
+        """Filter by ``{facet: values}`` and count every facet value
+
+        Returns a FacetResult with the matching bitmap and
+        ``counts[facet][value]``.
+        """
+        selections = {
+            facet: self._selection(facet, values)
+            for facet, values in filters.items()
+            if facet in self.values and values
+        }
+
+        matched = self.all
+        for bitmap in selections.values():
+            matched &= bitmap
+
+        counts = {}
+        for facet in FACETS:
+            base = self.all
+            for other, bitmap in selections.items():
+                if other != facet:
+                    base &= bitmap
+            counts[facet] = {
+                value: count
+                for value, bitmap in self.values[facet].items()
+                if (count := (bitmap & base).bit_count())
+            }
+        return FacetResult(matched, counts)
+
+
+_memo = (None, 0.0, None)
+_memo_lock = threading.Lock()
+_rebuilding = False
+
+
+def _current_version():
+    return generations([FACET_VERSION_KEY]).get(FACET_VERSION_KEY)
+
+
+def _rebuild(version):
+    global _memo, _rebuilding
+
+    try:
+        index = FacetIndex.build()
+    except Exception:
+        logger.exception("Facet index rebuild failed; serving the previous one")
+        # Keep the stale index and retry after the refresh interval
+        with _memo_lock:
+            _memo = (_memo[0], time.monotonic(), _memo[2])
+    else:
+        with _memo_lock:
+            _memo = (version, time.monotonic(), index)
+    finally:
+        _rebuilding = False
+        connections.close_all()
+
+
+def get_facet_index():
+    """The process-local facet index, refreshed when products have changed"""
+    global _memo, _rebuilding
+
+    version = _current_version()
+    memo_version, built_at, index = _memo
+    interval = getattr(settings, "PRODUCT_FACET_REFRESH_SECONDS", 30)
+    if index is not None and (
+        memo_version == version or time.monotonic() - built_at < interval
+    ):
+        return index
+
+    with _memo_lock:
+        memo_version, built_at, index = _memo
+        if index is None:
+            # Nothing to serve yet, so the first build runs in the request
+            _memo = (version, time.monotonic(), FacetIndex.build())
+            return _memo[2]
+        if memo_version != version and not _rebuilding:
+            _rebuilding = True
+            threading.Thread(
+                target=_rebuild, args=(version,), name="facet-index", daemon=True
+            ).start()
+        return index
+
+
+def invalidate_facet_index():
+    bump_generations([FACET_VERSION_KEY])
+
+
+def facet_search(filters):
+    return get_facet_index().query(filters)
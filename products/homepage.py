@@ -0,0 +1,97 @@
+"""Cached, pre-compressed storefront home page.
+
+The page is rendered from ``products/home.html`` and stored in the shared
+cache as identity, gzip and (when the ``brotli`` package is installed)
+brotli bodies together with its ETag and Last-Modified time. Entries are
+keyed by a version number that signal handlers bump whenever products,
+categories or age groups change, so a warm request costs two cache reads
+and no database queries.
+
+The template also caches its featured product, category and age group
+fragments under the same version, so re-rendering after the page entry
+expires (``HOME_PAGE_CACHE_SECONDS``, which bounds how long new image
+derivatives take to appear) does not touch the database either.
+"""
+
+import gzip
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .cache import bump_generations, generations
+from .models import AgeGroup, Category, Product
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+HOME_VERSION_KEY = "products:home:version"
+HOME_PAGE_KEY = "products:home:page:{version}"
+DEFAULT_PAGE_SECONDS = 300
+FRAGMENT_SECONDS = 60 * 60 * 24
+FEATURED_LIMIT = 8
+
+
+def home_version():
+    return generations([HOME_VERSION_KEY]).get(HOME_VERSION_KEY)
+
+
+def invalidate_home():
+    """Bump the shared version so the page and its fragments are rebuilt"""
+    bump_generations([HOME_VERSION_KEY])
+
+
+def home_context(version):
+    """Lazy querysets: a cached template fragment never evaluates its own"""
+    return {
+        "version": version,
+        "fragment_seconds": FRAGMENT_SECONDS,
+        "featured_products": Product.objects.filter(is_active=True, is_featured=True)
+        .select_related("category")
+        .only(
+            "name",
+            "slug",
+            "short_description",
+            "price",
+            "compare_at_price",
+            "featured_image",
+            "rating_avg",
+            "rating_count",
+            "category__name",
+            "category__slug",
+        )
+        .order_by("-created_at")[:FEATURED_LIMIT],
+        "categories": Category.objects.filter(is_active=True, parent__isnull=True)
+        .only("name", "slug", "description", "image")
+        .order_by("name"),
+        "age_groups": AgeGroup.objects.all(),
+    }
+
+
+def render_home_page(version):
+    body = render_to_string("products/home.html", home_context(version)).encode()
+    page = {
+        "etag": '"%s"' % hashlib.md5(body).hexdigest(),
+        "last_modified": time.time(),
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9),
+    }
+    if brotli is not None:
+        page["br"] = brotli.compress(body, quality=11)
+    return page
+
+
+def get_home_page():
+    """The current page entry, rendering and caching it on a miss"""
+    version = home_version()
+    key = HOME_PAGE_KEY.format(version=version)
+    page = cache.get(key)
+    if page is None:
+        page = render_home_page(version)
+        timeout = getattr(settings, "HOME_PAGE_CACHE_SECONDS", DEFAULT_PAGE_SECONDS)
+        cache.set(key, page, timeout)
+    return page
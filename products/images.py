@@ -0,0 +1,336 @@
+"""Responsive image derivatives for product, variant and gallery images.
+
+Saving a row with a new image file name registers the name in
+``ImageSource``; nothing is read from storage on the request path.
+``process_pending()`` (run by the ``process_images`` command) hashes
+newly registered files and links each to an ``ImageManifest`` keyed by
+the SHA-256 of the content, so identical uploads share one set of
+derivatives, then renders queued manifests in a process pool: EXIF
+orientation is applied, metadata is dropped and each configured width is
+written as WebP, AVIF (when Pillow supports it) and JPEG.
+
+Admin previews use ``admin_thumbnail()`` instead: small WebP thumbnails
+rendered on first request by the ``products:thumbnail`` view, kept in
+media storage under ``thumbnails/`` and served with long cache headers.
+"""
+
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.html import format_html
+from PIL import Image, ImageOps, features
+
+from .models import (
+    Category,
+    ImageManifest,
+    ImageSource,
+    Product,
+    ProductImage,
+    ProductVariant,
+    SafetyCertification,
+)
+
+DEFAULT_WIDTHS = [160, 320, 640, 1024, 1600]
+QUALITY = {"webp": 80, "avif": 60, "jpeg": 82}
+
+# (model, image field) pairs covered by the pipeline
+IMAGE_FIELDS = [
+    (model, model.IMAGE_FIELD)
+    for model in (Product, ProductVariant, ProductImage, Category, SafetyCertification)
+]
+
+MANIFEST_CACHE_TIMEOUT = 60 * 60
+
+# Display sizes the thumbnail view will render; stored at 2x for HiDPI
+THUMBNAIL_SIZES = {(50, 50), (80, 60)}
+
+
+def derivative_widths():
+    return getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", DEFAULT_WIDTHS)
+
+
+def derivative_formats():
+    formats = ["webp", "jpeg"]
+    if features.check("avif"):
+        formats.insert(0, "avif")
+    return formats
+
+
+def _manifest_cache_key(name):
+    return "products:image-manifest:" + hashlib.md5(name.encode()).hexdigest()
+
+
+# Registration (runs in the web process; the file is not read)
+
+
+def register_image(name):
+    """Queue a stored file for hashing and derivatives; returns its source"""
+    if not name:
+        return None
+    source, _ = ImageSource.objects.get_or_create(name=name)
+    return source
+
+
+# Hashing (runs in the process_images command)
+
+
+def hash_file(name):
+    digest = hashlib.sha256()
+    with default_storage.open(name, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_sources(batch_size=100):
+    """Link newly registered files to the manifest for their content
+
+    Returns the number of files hashed. A file missing from storage is
+    unregistered; ``backfill_images`` registers it again once it exists.
+    """
+    hashed = 0
+    unhashed = ImageSource.objects.filter(manifest__isnull=True).order_by("pk")
+    while True:
+        sources = list(unhashed[:batch_size])
+        if not sources:
+            return hashed
+        for source in sources:
+            try:
+                content_hash = hash_file(source.name)
+            except OSError:
+                source.delete()
+                continue
+            manifest, _ = ImageManifest.objects.get_or_create(
+                content_hash=content_hash, defaults={"source": source.name}
+            )
+            ImageSource.objects.filter(pk=source.pk).update(manifest=manifest)
+            # An identical upload may already have its derivatives
+            cache.delete(_manifest_cache_key(source.name))
+            hashed += 1
+
+
+# Rendering (runs in worker processes; no database access)
+
+
+def render_derivatives(data, widths, formats):
+    """Encode every derivative for one image
+
+    Returns ``(width, height, {fmt: {width: bytes}})`` of the oriented
+    original and its encoded derivatives.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    full_width, full_height = image.size
+
+    # Never upscale; an image smaller than every width gets its own size
+    targets = sorted(
+        {w for w in widths if w < full_width} | {min(full_width, max(widths))}
+    )
+    outputs = {fmt: {} for fmt in formats}
+    for width in targets:
+        height = max(1, round(full_height * width / full_width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            frame = resized
+            if fmt == "jpeg" and frame.mode not in ("RGB", "L"):
+                background = Image.new("RGB", frame.size, "white")
+                if frame.mode in ("RGBA", "LA", "P"):
+                    frame = frame.convert("RGBA")
+                    background.paste(frame, mask=frame.getchannel("A"))
+                else:
+                    background.paste(frame.convert("RGB"))
+                frame = background
+            elif frame.mode not in ("RGB", "RGBA", "L", "LA"):
+                frame = frame.convert("RGBA")
+            buffer = io.BytesIO()
+            # No exif/icc arguments: metadata is stripped from derivatives
+            frame.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+            outputs[fmt][width] = buffer.getvalue()
+    return full_width, full_height, outputs
+
+
+def _render_job(args):
+    content_hash, data, widths, formats = args
+    try:
+        return content_hash, render_derivatives(data, widths, formats), None
+    except Exception as exc:  # reported on the manifest
+        return content_hash, None, f"{type(exc).__name__}: {exc}"
+
+
+def derivative_name(content_hash, width, fmt):
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return f"derivatives/{content_hash[:2]}/{content_hash}/{width}.{ext}"
+
+
+def _save_result(manifest, result, error):
+    if error:
+        manifest.status = ImageManifest.FAILED
+        manifest.error = error
+        manifest.save(update_fields=["status", "error", "updated_at"])
+        return
+
+    width, height, outputs = result
+    derivatives = {}
+    for fmt, by_width in outputs.items():
+        derivatives[fmt] = {}
+        for target, data in by_width.items():
+            name = derivative_name(manifest.content_hash, target, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            derivatives[fmt][str(target)] = default_storage.save(name, ContentFile(data))
+
+    manifest.width, manifest.height = width, height
+    manifest.derivatives = derivatives
+    manifest.status = ImageManifest.READY
+    manifest.error = ""
+    manifest.save()
+    names = manifest.sources.values_list("name", flat=True)
+    cache.delete_many([_manifest_cache_key(name) for name in names])
+
+
+def _read_source(manifest):
+    with default_storage.open(manifest.source, "rb") as source:
+        return source.read()
+
+
+def process_pending(workers=None, batch_size=20, limit=None):
+    """Hash new uploads, then render queued manifests in a process pool
+
+    Returns the number of manifests handled.
+    """
+    hash_sources()
+    widths = derivative_widths()
+    formats = derivative_formats()
+    handled = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while limit is None or handled < limit:
+            size = batch_size if limit is None else min(batch_size, limit - handled)
+            manifests = {
+                m.content_hash: m
+                for m in ImageManifest.objects.filter(
+                    status=ImageManifest.PENDING
+                ).order_by("created_at")[:size]
+            }
+            if not manifests:
+                break
+
+            jobs = []
+            for manifest in manifests.values():
+                try:
+                    data = _read_source(manifest)
+                except OSError as exc:
+                    _save_result(manifest, None, f"Cannot read source: {exc}")
+                    continue
+                jobs.append((manifest.content_hash, data, widths, formats))
+
+            for content_hash, result, error in pool.map(_render_job, jobs):
+                _save_result(manifests[content_hash], result, error)
+            handled += len(manifests)
+    return handled
+
+
+def backfill_sources():
+    """Register every stored image that has no manifest yet"""
+    registered = 0
+    for model, field_name in IMAGE_FIELDS:
+        names = (
+            model.objects.exclude(**{field_name: ""})
+            .exclude(**{f"{field_name}__isnull": True})
+            .values_list(field_name, flat=True)
+            .distinct()
+            .iterator()
+        )
+        known = set()
+        for name in names:
+            if name in known or ImageSource.objects.filter(name=name).exists():
+                continue
+            register_image(name)
+            known.add(name)
+            registered += 1
+    return registered
+
+
+# Lookup (templates)
+
+
+def manifest_for(name):
+    """Cached manifest data for a stored file name, or None"""
+    if not name:
+        return None
+    key = _manifest_cache_key(name)
+    data = cache.get(key)
+    if data is None:
+        source = (
+            ImageSource.objects.select_related("manifest").filter(name=name).first()
+        )
+        manifest = source.manifest if source else None
+        data = (
+            {"derivatives": manifest.derivatives, "width": manifest.width}
+            if manifest and manifest.status == ImageManifest.READY
+            else {}
+        )
+        cache.set(key, data, MANIFEST_CACHE_TIMEOUT)
+    return data or None
+
+
+def srcset(field_file, fmt="webp"):
+    """``srcset`` attribute value for a stored image, or "" if not ready"""
+    if not field_file:
+        return ""
+    manifest = manifest_for(field_file.name)
+    if not manifest:
+        return ""
+    derivatives = manifest["derivatives"]
+    by_width = derivatives.get(fmt) or derivatives.get("jpeg", {})
+    return ", ".join(
+        f"{default_storage.url(name)} {width}w"
+        for width, name in sorted(by_width.items(), key=lambda item: int(item[0]))
+    )
+
+
+# Admin thumbnails (rendered lazily by views.thumbnail)
+
+
+def thumbnail_name(name, width, height):
+    return f"thumbnails/{width}x{height}/{name}.webp"
+
+
+def get_thumbnail(name, width, height):
+    """Storage name of the thumbnail for ``name``, rendering it if missing"""
+    target = thumbnail_name(name, width, height)
+    if default_storage.exists(target):
+        return target
+    with default_storage.open(name, "rb") as source, Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((width * 2, height * 2), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=QUALITY["webp"])
+    if default_storage.exists(target):
+        return target  # rendered concurrently
+    return default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def admin_thumbnail(field_file, width, height, empty="No image"):
+    """Lazy-loaded ``<img>`` pointing at a cached thumbnail of ``field_file``"""
+    if not field_file:
+        return empty
+    url = reverse(
+        "products:thumbnail",
+        kwargs={"width": width, "height": height, "name": field_file.name},
+    )
+    return format_html(
+        '<img src="{}" width="{}" height="{}" loading="lazy" decoding="async" '
+        'style="object-fit: contain;" alt="" />',
+        url,
+        width,
+        height,
+    )
@@ -0,0 +1,383 @@
+"""Streaming supplier catalog import.
+
+Rows are read one at a time from CSV or JSONL and written in batches:
+products and variants are upserted by ``sku`` with
+``bulk_create(update_conflicts=True)`` and the age group / certification
+through rows are replaced in bulk, for the rows that have that column;
+a file without it leaves the existing links alone. Category, age group and certification
+names are resolved through lookup maps loaded once up front. Memory use
+is bounded by the batch size, not the file size.
+
+A row with a ``parent_sku`` is a variant of that product; any other row
+is a product. Multi-valued columns (``age_groups``,
+``safety_certifications``) are ``|``-separated in CSV or lists in JSONL.
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils.text import slugify
+
+from .cache import invalidate_models, products_written
+from .facets import invalidate_facet_index
+from .homepage import invalidate_home
+from .models import AgeGroup, Category, Product, ProductVariant, SafetyCertification
+from .variants import refresh_variant_matrix
+
+PRODUCT_UPDATE_FIELDS = [
+    "name",
+    "description",
+    "short_description",
+    "price",
+    "compare_at_price",
+    "cost_price",
+    "track_inventory",
+    "stock",
+    "low_stock_threshold",
+    "allow_backorder",
+    "category",
+    "gender",
+    "materials",
+    "care_instructions",
+    "country_of_origin",
+    "is_active",
+    "is_featured",
+    "condition",
+    "updated_at",
+]
+VARIANT_UPDATE_FIELDS = [
+    "product",
+    "name",
+    "size",
+    "color",
+    "pattern",
+    "price",
+    "stock",
+    "track_inventory",
+    "low_stock_threshold",
+    "is_active",
+]
+
+GENDERS = {code for code, _ in Product.GENDER_CHOICES}
+CONDITIONS = {code for code, _ in Product.CONDITION_CHOICES}
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    products: int = 0
+    variants: int = 0
+    errors: int = 0
+    batches: int = 0
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, dict)`` from a CSV or JSONL text stream"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_number, exc
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _text(row, key, default=""):
+    value = row.get(key)
+    if value is None:
+        return default
+    return str(value).strip()
+
+
+def _decimal(row, key, required=False):
+    value = _text(row, key)
+    if not value:
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation as exc:
+        raise RowError(f"{key} is not a number: {value!r}") from exc
+
+
+def _int(row, key, default):
+    value = _text(row, key)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError as exc:
+        raise RowError(f"{key} is not an integer: {value!r}") from exc
+    if number < 0:
+        raise RowError(f"{key} cannot be negative")
+    return number
+
+
+def _bool(row, key, default):
+    value = row.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _names(row, key):
+    value = row.get(key) or []
+    if isinstance(value, str):
+        value = value.split("|")
+    return [str(name).strip() for name in value if str(name).strip()]
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=1000, create_categories=False, on_error=None):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.on_error = on_error
+        self.stats = ImportStats()
+        self.categories = {c.name.lower(): c.pk for c in Category.objects.all()}
+        self.age_groups = {a.name.lower(): a.pk for a in AgeGroup.objects.all()}
+        self.certifications = {
+            c.name.lower(): c.pk for c in SafetyCertification.objects.all()
+        }
+
+    def error(self, line_number, message):
+        self.stats.errors += 1
+        if self.on_error:
+            self.on_error(line_number, message)
+
+    # Row parsing
+
+    def _category_id(self, name):
+        if not name:
+            raise RowError("category is required")
+        pk = self.categories.get(name.lower())
+        if pk is None:
+            if not self.create_categories:
+                raise RowError(f"Unknown category: {name!r}")
+            pk = Category.objects.create(name=name).pk
+            self.categories[name.lower()] = pk
+        return pk
+
+    def _lookup(self, mapping, names, label):
+        ids = []
+        for name in names:
+            pk = mapping.get(name.lower())
+            if pk is None:
+                raise RowError(f"Unknown {label}: {name!r}")
+            ids.append(pk)
+        return ids
+
+    def parse_product(self, row):
+        sku = _text(row, "sku")
+        name = _text(row, "name")
+        if not sku or not name:
+            raise RowError("sku and name are required")
+        gender = _text(row, "gender", "U") or "U"
+        condition = _text(row, "condition", "NEW") or "NEW"
+        if gender not in GENDERS:
+            raise RowError(f"Unknown gender: {gender!r}")
+        if condition not in CONDITIONS:
+            raise RowError(f"Unknown condition: {condition!r}")
+
+        product = Product(
+            sku=sku,
+            name=name,
+            slug=_text(row, "slug") or slugify(f"{name}-{sku}")[:220],
+            description=_text(row, "description"),
+            short_description=_text(row, "short_description")[:200],
+            price=_decimal(row, "price", required=True),
+            compare_at_price=_decimal(row, "compare_at_price"),
+            cost_price=_decimal(row, "cost_price"),
+            track_inventory=_bool(row, "track_inventory", True),
+            stock=_int(row, "stock", 0),
+            low_stock_threshold=_int(row, "low_stock_threshold", 10),
+            allow_backorder=_bool(row, "allow_backorder", False),
+            category_id=self._category_id(_text(row, "category")),
+            gender=gender,
+            materials=_text(row, "materials"),
+            care_instructions=_text(row, "care_instructions"),
+            country_of_origin=_text(row, "country_of_origin"),
+            is_active=_bool(row, "is_active", True),
+            is_featured=_bool(row, "is_featured", False),
+            condition=condition,
+        )
+        # None when the column is absent, so the links are kept as they are
+        age_group_ids = certification_ids = None
+        if "age_groups" in row:
+            age_group_ids = self._lookup(
+                self.age_groups, _names(row, "age_groups"), "age group"
+            )
+        if "safety_certifications" in row:
+            certification_ids = self._lookup(
+                self.certifications,
+                _names(row, "safety_certifications"),
+                "certification",
+            )
+        return product, age_group_ids, certification_ids
+
+    def parse_variant(self, row):
+        sku = _text(row, "sku")
+        name = _text(row, "name")
+        if not sku or not name:
+            raise RowError("sku and name are required")
+        return _text(row, "parent_sku"), ProductVariant(
+            sku=sku,
+            name=name,
+            size=_text(row, "size"),
+            color=_text(row, "color"),
+            pattern=_text(row, "pattern"),
+            price=_decimal(row, "price"),
+            stock=_int(row, "stock", 0),
+            track_inventory=_bool(row, "track_inventory", True),
+            low_stock_threshold=_int(row, "low_stock_threshold", 10),
+            is_active=_bool(row, "is_active", True),
+        )
+
+    # Batched writes
+
+    def _write_products(self, products):
+        if not products:
+            return {}
+        skus = [product.sku for product, _, _ in products]
+        # Listings the updated products are leaving
+        previous_categories = set(
+            Product.objects.filter(sku__in=skus).values_list("category_id", flat=True)
+        )
+        Product.objects.bulk_create(
+            [product for product, _, _ in products],
+            update_conflicts=True,
+            unique_fields=["sku"],
+            update_fields=PRODUCT_UPDATE_FIELDS,
+        )
+        ids = dict(Product.objects.filter(sku__in=skus).values_list("sku", "pk"))
+
+        through_rows = [
+            (Product.age_groups.through, "agegroup_id", 1),
+            (Product.safety_certifications.through, "safetycertification_id", 2),
+        ]
+        for through, column, position in through_rows:
+            replaced = [entry for entry in products if entry[position] is not None]
+            if not replaced:
+                continue
+            through.objects.filter(
+                product_id__in=[ids[entry[0].sku] for entry in replaced]
+            ).delete()
+            through.objects.bulk_create(
+                [
+                    through(product_id=ids[entry[0].sku], **{column: value})
+                    for entry in replaced
+                    for value in set(entry[position])
+                ],
+                ignore_conflicts=True,
+            )
+        products_written(ids.values(), previous_categories)
+        return ids
+
+    def _write_variants(self, variants, product_ids):
+        if not variants:
+            return set()
+        missing = {parent for parent, _ in variants} - product_ids.keys()
+        if missing:
+            product_ids = {
+                **product_ids,
+                **dict(
+                    Product.objects.filter(sku__in=missing).values_list("sku", "pk")
+                ),
+            }
+        rows = []
+        for parent, variant in variants:
+            if parent not in product_ids:
+                raise RowError(f"Unknown parent_sku: {parent!r}")
+            variant.product_id = product_ids[parent]
+            rows.append(variant)
+        ProductVariant.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["sku"],
+            update_fields=VARIANT_UPDATE_FIELDS,
+        )
+        return {variant.product_id for variant in rows}
+
+    def _write(self, products, variants):
+        with transaction.atomic():
+            product_ids = self._write_products([entry for _, entry in products])
+            parents = self._write_variants(
+                [entry for _, entry in variants], product_ids
+            )
+            # bulk_create skips signals, so refresh the variant summaries here
+            refresh_variant_matrix(set(product_ids.values()) | parents)
+            products_written(parents)
+
+    def flush(self, products, variants):
+        """Write one batch; on failure retry row by row to isolate bad rows"""
+        if not products and not variants:
+            return
+        self.stats.batches += 1
+        try:
+            self._write(products, variants)
+        except (DatabaseError, RowError):
+            for line_number, entry in products:
+                try:
+                    self._write([(line_number, entry)], [])
+                except (DatabaseError, RowError) as exc:
+                    self.error(line_number, str(exc))
+                    continue
+                self.stats.products += 1
+            for line_number, entry in variants:
+                try:
+                    self._write([], [(line_number, entry)])
+                except (DatabaseError, RowError) as exc:
+                    self.error(line_number, str(exc))
+                    continue
+                self.stats.variants += 1
+        else:
+            self.stats.products += len(products)
+            self.stats.variants += len(variants)
+
+    def run(self, rows, progress=None):
+        products, variants = [], []
+        for line_number, row in rows:
+            self.stats.rows += 1
+            try:
+                if isinstance(row, Exception):
+                    raise RowError(f"Invalid JSON: {row}")
+                if _text(row, "parent_sku"):
+                    variants.append((line_number, self.parse_variant(row)))
+                else:
+                    products.append((line_number, self.parse_product(row)))
+            except RowError as exc:
+                self.error(line_number, str(exc))
+
+            if len(products) + len(variants) >= self.batch_size:
+                self.flush(products, variants)
+                products, variants = [], []
+                if progress:
+                    progress(self.stats)
+        self.flush(products, variants)
+        invalidate_facet_index()
+        invalidate_home()
+        invalidate_models(
+            Product,
+            ProductVariant,
+            Category,
+            Product.age_groups.through,
+            Product.safety_certifications.through,
+        )
+        return self.stats
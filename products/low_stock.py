@@ -0,0 +1,154 @@
+"""Low-stock scanner.
+
+Products and variants at or below their ``low_stock_threshold`` are found
+through the ``product_low_stock`` / ``variant_low_stock`` partial
+indexes, which only contain rows matching the scan predicate, so a scan
+reads the low rows and nothing else however large the catalog is. A
+product with active variants is judged by its variants alone: its own
+``stock`` is not maintained and would always read as out of stock.
+
+Each scan is diffed against the open ``LowStockAlert`` rows: items that
+became low open an alert, items that recovered resolve theirs, and only
+newly opened alerts go into the digest. At most one alert per item is
+open at a time (``low_stock_alert_open_item``), so overlapping scans
+cannot open it twice.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import LowStockAlert, Product, ProductVariant
+
+# Must match the conditions of the partial indexes
+LOW_STOCK = Q(
+    is_active=True, track_inventory=True, stock__lte=F("low_stock_threshold")
+)
+
+
+@dataclass
+class ScanResult:
+    opened: list = field(default_factory=list)
+    resolved: int = 0
+    open_count: int = 0
+
+
+def low_stock_items():
+    """``{(product_id, variant_id): (stock, threshold)}`` for every low item"""
+    items = {}
+    has_variants = Exists(
+        ProductVariant.objects.filter(product=OuterRef("pk"), is_active=True)
+    )
+    products = (
+        Product.objects.filter(LOW_STOCK)
+        .filter(~has_variants)
+        .order_by()
+        .values_list("pk", "stock", "low_stock_threshold")
+    )
+    for pk, stock, threshold in products:
+        items[(pk, None)] = (stock, threshold)
+
+    variants = (
+        ProductVariant.objects.filter(LOW_STOCK, product__is_active=True)
+        .order_by()
+        .values_list("product_id", "pk", "stock", "low_stock_threshold")
+    )
+    for product_id, pk, stock, threshold in variants:
+        items[(product_id, pk)] = (stock, threshold)
+    return items
+
+
+def scan(now=None):
+    """Open alerts for new low-stock items and resolve recovered ones"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        current = low_stock_items()
+        alerts = (
+            LowStockAlert.objects.filter(resolved_at__isnull=True)
+            .order_by()
+            .values_list("pk", "product_id", "variant_id", "stock", "threshold")
+        )
+        open_alerts = set()
+        recovered, changed = [], []
+        for pk, product_id, variant_id, stock, threshold in alerts:
+            key = (product_id, variant_id)
+            open_alerts.add(key)
+            if key not in current:
+                recovered.append(pk)
+            elif (stock, threshold) != current[key]:
+                # Keep open alerts current for the dashboard
+                stock, threshold = current[key]
+                changed.append(LowStockAlert(pk=pk, stock=stock, threshold=threshold))
+        if recovered:
+            LowStockAlert.objects.filter(pk__in=recovered).update(resolved_at=now)
+        LowStockAlert.objects.bulk_update(changed, ["stock", "threshold"])
+
+        new = [
+            {
+                "product_id": product_id,
+                "variant_id": variant_id,
+                "stock": stock,
+                "threshold": threshold,
+            }
+            for (product_id, variant_id), (stock, threshold) in sorted(
+                current.items(), key=lambda item: (item[0][0], item[0][1] or 0)
+            )
+            if (product_id, variant_id) not in open_alerts
+        ]
+        opened = _open_alerts(new)
+
+    opened = list(
+        LowStockAlert.objects.filter(pk__in=[alert.pk for alert in opened])
+        .select_related("product", "variant")
+        .order_by("stock", "product__name")
+    )
+    return ScanResult(opened=opened, resolved=len(recovered), open_count=len(current))
+
+
+def _open_alerts(new):
+    """Create alerts from ``new`` and return the ones this scan opened"""
+    try:
+        with transaction.atomic():
+            return LowStockAlert.objects.bulk_create(
+                LowStockAlert(**values) for values in new
+            )
+    except IntegrityError:
+        pass
+    # An overlapping scan opened some of them first; they are its to report
+    opened = []
+    for values in new:
+        alert, created = LowStockAlert.objects.get_or_create(
+            product_id=values["product_id"],
+            variant_id=values["variant_id"],
+            resolved_at=None,
+            defaults={"stock": values["stock"], "threshold": values["threshold"]},
+        )
+        if created:
+            opened.append(alert)
+    return opened
+
+
+def format_digest(result, limit=200):
+    """Plain-text digest of newly opened alerts"""
+    lines = [
+        f"Low stock: {len(result.opened)} new, {result.resolved} restocked, "
+        f"{result.open_count} open"
+    ]
+    for alert in result.opened[:limit]:
+        item = alert.variant or alert.product
+        status = "OUT" if alert.stock == 0 else "LOW"
+        lines.append(
+            f"{status}  {item.sku}  {item}  "
+            f"{alert.stock} left (threshold {alert.threshold})"
+        )
+    if len(result.opened) > limit:
+        lines.append(f"... and {len(result.opened) - limit} more")
+    return "\n".join(lines) + "\n"
+
+
+def open_alerts():
+    return LowStockAlert.objects.filter(resolved_at__isnull=True).select_related(
+        "product", "variant"
+    )
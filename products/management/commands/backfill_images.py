@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.images import backfill_sources, process_pending
+
+
+class Command(BaseCommand):
+    help = "Queue derivatives for existing media and render them in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Pool size (default: CPUs)"
+        )
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        registered = backfill_sources()
+        self.stdout.write(f"Queued {registered} existing images")
+        handled = process_pending(
+            workers=options["workers"], batch_size=options["batch_size"]
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {handled} images in {elapsed:.1f}s")
+        )
@@ -0,0 +1,82 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.benchmarks import Paths, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Time the storefront and admin hot paths and report percentiles as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--warmup", type=int, default=3, help="Untimed requests per path first"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            choices=Paths.names,
+            help="Only these paths (repeatable; default: all)",
+        )
+        parser.add_argument("--output", help="Write the JSON here instead of stdout")
+        parser.add_argument(
+            "--compare",
+            help="A previous --output file; print the change per path to stderr",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2 for percentiles")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as stream:
+                baseline = json.load(stream)
+        if settings.DEBUG:
+            self.stderr.write(
+                "DEBUG is on: queries are recorded in memory and timings inflated"
+            )
+
+        def progress(name, result):
+            if "skipped" in result:
+                self.stderr.write(f"{name}: skipped, {result['skipped']}")
+            else:
+                self.stderr.write(
+                    f"{name}: p50 {result['p50_ms']:.1f} ms, "
+                    f"p95 {result['p95_ms']:.1f} ms, "
+                    f"p99 {result['p99_ms']:.1f} ms, {result['queries']} queries"
+                )
+
+        report = run_benchmarks(
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            only=options["path"],
+            progress=progress,
+        )
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            commit = baseline["environment"].get("commit")
+            differing = [
+                key
+                for key in ("database", "products", "debug", "cache")
+                if baseline["environment"].get(key) != report["environment"][key]
+            ]
+            if differing:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"Runs differ in {', '.join(differing)}; "
+                        "the timings are not comparable"
+                    )
+                )
+            self.stderr.write(f"Compared with {commit or options['compare']}:")
+            for name, key, before, after, change in compare(baseline, report):
+                delta = f"{change:+.1f}%" if change is not None else "n/a"
+                self.stderr.write(f"  {name} {key}: {before} -> {after} ({delta})")
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products.models import Category, Product, ProductReview, ProductVariant
+
+
+class Command(BaseCommand):
+    help = "Print query plans and timings for the storefront and admin access paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed executions per query"
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Use EXPLAIN ANALYZE (PostgreSQL only)",
+        )
+
+    def access_paths(self):
+        category = Category.objects.order_by("pk").first()
+        product = Product.objects.order_by("pk").first()
+        if category is None or product is None:
+            return []
+        return [
+            (
+                "category listing",
+                Product.objects.filter(is_active=True, category=category)[:24],
+            ),
+            (
+                "featured strip",
+                Product.objects.filter(is_active=True, is_featured=True)[:8],
+            ),
+            (
+                "approved reviews",
+                ProductReview.objects.filter(product=product, is_approved=True)[:10],
+            ),
+            (
+                "active variants",
+                ProductVariant.objects.filter(product=product, is_active=True),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        if options["analyze"] and connection.vendor != "postgresql":
+            raise CommandError(
+                f"--analyze needs PostgreSQL; this database is {connection.vendor}"
+            )
+        paths = self.access_paths()
+        if not paths:
+            self.stderr.write("No products found; seed the catalog first.")
+            return
+
+        explain_options = {}
+        if options["analyze"]:
+            explain_options = {"analyze": True, "buffers": True}
+
+        for label, queryset in paths:
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write(f"best of {len(timings)}: {min(timings):.2f} ms\n")
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.exporter import FORMATS, export_catalog
+
+
+class Command(BaseCommand):
+    help = "Stream the active catalog as CSV, JSONL or a Merchant XML feed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument(
+            "--output", default="-", help="File to write (default: stdout)"
+        )
+        parser.add_argument("--gzip", action="store_true", help="Compress on the fly")
+        parser.add_argument(
+            "--base-url",
+            default=getattr(settings, "WAGTAILADMIN_BASE_URL", ""),
+            help="Prefix for product and image links",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        chunks = export_catalog(
+            options["format"],
+            options["base_url"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+
+        written = 0
+        output = options["output"]
+        target = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in chunks:
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if output != "-":
+                target.close()
+
+        if output != "-":
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote {written / 1e6:.1f} MB to {output} in {elapsed:.1f}s"
+                )
+            )
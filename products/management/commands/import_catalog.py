@@ -0,0 +1,83 @@
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSONL supplier catalog into products and variants"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV/JSONL file (optionally .gz), or - for stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--create-categories",
+            action="store_true",
+            help="Create unknown categories instead of rejecting the row",
+        )
+        parser.add_argument(
+            "--errors",
+            help="Write per-row errors as JSONL to this file (default: stderr)",
+        )
+
+    def detect_format(self, path):
+        suffixes = Path(path).suffixes
+        if ".jsonl" in suffixes or ".ndjson" in suffixes:
+            return "jsonl"
+        if ".csv" in suffixes:
+            return "csv"
+        raise CommandError("Cannot detect the format; pass --format")
+
+    def open_stream(self, path):
+        if path == "-":
+            return sys.stdin
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", newline="")
+        return open(path, encoding="utf-8", newline="")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or self.detect_format(path)
+        error_file = open(options["errors"], "w") if options["errors"] else None
+        start = time.perf_counter()
+
+        def on_error(line_number, message):
+            record = json.dumps({"line": line_number, "error": message})
+            if error_file:
+                error_file.write(record + "\n")
+            else:
+                self.stderr.write(record)
+
+        def progress(stats):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{stats.rows} rows, {stats.errors} errors, "
+                f"{stats.rows / elapsed:.0f} rows/s"
+            )
+
+        importer = CatalogImporter(
+            batch_size=options["batch_size"],
+            create_categories=options["create_categories"],
+            on_error=on_error,
+        )
+        try:
+            with self.open_stream(path) as stream:
+                stats = importer.run(read_rows(stream, fmt), progress=progress)
+        finally:
+            if error_file:
+                error_file.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats.products} products and {stats.variants} variants "
+                f"from {stats.rows} rows in {elapsed:.1f}s "
+                f"({stats.rows / max(elapsed, 1e-9):.0f} rows/s, {stats.errors} errors)"
+            )
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.images import process_pending
+
+
+class Command(BaseCommand):
+    help = "Render queued image derivatives in a worker process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Pool size (default: CPUs)"
+        )
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running, polling for new uploads every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            handled = process_pending(
+                workers=options["workers"], batch_size=options["batch_size"]
+            )
+            if handled:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"Processed {handled} images in {elapsed:.1f}s")
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
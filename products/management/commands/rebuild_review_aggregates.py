@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.reviews import rebuild_review_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuild rating_avg, rating_count and rating_histogram for all products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Products per bulk update"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = rebuild_review_aggregates(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt review aggregates for {updated} products in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.variants import rebuild_variant_matrices
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized variant matrix for all products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Products per bulk update"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = rebuild_variant_matrices(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated the variant matrices of {updated} products in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.stock import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return stock held by expired reservations (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Reservations per transaction"
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running, sweeping every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            reclaimed = release_expired(batch_size=options["batch_size"])
+            if reclaimed:
+                self.stdout.write(f"Released {reclaimed} expired reservations")
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
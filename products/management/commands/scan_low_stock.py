@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+
+from products.low_stock import format_digest, scan
+
+
+class Command(BaseCommand):
+    help = "Open and resolve low-stock alerts and send a digest of new ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--email",
+            action="append",
+            default=None,
+            help="Digest recipient (repeatable, default LOW_STOCK_DIGEST_RECIPIENTS)",
+        )
+        parser.add_argument(
+            "--output", help="Append the digest to this file instead of stdout"
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running, scanning every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        recipients = options["email"]
+        if recipients is None:
+            recipients = getattr(settings, "LOW_STOCK_DIGEST_RECIPIENTS", [])
+        while True:
+            result = scan()
+            if result.opened:
+                self.deliver(format_digest(result), recipients, options["output"])
+            elif result.resolved:
+                self.stdout.write(f"{result.resolved} low-stock alerts resolved")
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
+
+    def deliver(self, digest, recipients, output):
+        if output:
+            with open(output, "a") as fh:
+                fh.write(digest)
+        else:
+            self.stdout.write(digest, ending="")
+        if recipients:
+            subject = digest.splitlines()[0]
+            try:
+                send_mail(subject, digest, None, recipients)
+            except OSError as exc:
+                # The alerts are already recorded; keep scanning
+                self.stderr.write(f"Could not send low-stock digest: {exc}")
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.seed import DEFAULT_SEED, CatalogNotEmpty, CatalogSeeder
+
+
+class Command(BaseCommand):
+    help = "Fill an empty database with a deterministic synthetic catalog for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=DEFAULT_SEED,
+            help="The same seed and product count always give the same catalog",
+        )
+        parser.add_argument(
+            "--shoppers",
+            type=int,
+            help="Users writing reviews (default: one per 20 products, at least 100)",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{stats.products}/{options['products']} products, "
+                f"{stats.products / elapsed:.0f} products/s"
+            )
+
+        seeder = CatalogSeeder(seed=options["seed"], batch_size=options["batch_size"])
+        try:
+            stats = seeder.run(
+                options["products"], shoppers=options["shoppers"], progress=progress
+            )
+        except CatalogNotEmpty as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {stats.products} products in {stats.categories} categories "
+                f"with {stats.variants} variants, {stats.images} images and "
+                f"{stats.reviews} reviews in {elapsed:.1f}s (seed {options['seed']})"
+            )
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    nodes = {}
+    level = list(Category.objects.filter(parent__isnull=True))
+    while level:
+        for node in level:
+            parent = nodes.get(node.parent_id)
+            crumb = {"id": node.pk, "name": node.name, "slug": node.slug}
+            if parent is None:
+                node.path, node.depth, node.breadcrumb = f"{node.pk}/", 0, [crumb]
+            else:
+                node.path = f"{parent.path}{node.pk}/"
+                node.depth = parent.depth + 1
+                node.breadcrumb = parent.breadcrumb + [crumb]
+            nodes[node.pk] = node
+        Category.objects.bulk_update(level, ["path", "depth", "breadcrumb"])
+        level = list(Category.objects.filter(parent_id__in=[n.pk for n in level]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='breadcrumb',
+            field=models.JSONField(default=list, editable=False, help_text='Ancestors and self as {id, name, slug}, root first'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from products.search,
+# so later changes to that module cannot change what this migration does.
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE products_product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(materials, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS product_search_vector "
+    "ON products_product USING GIN (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS product_search_vector",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_product_fts USING fts5(
+        name, short_description, materials, description,
+        content='products_product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_product_fts_ai
+    AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(
+            rowid, name, short_description, materials, description
+        ) VALUES (
+            new.id, new.name, new.short_description, new.materials, new.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_product_fts_ad
+    AFTER DELETE ON products_product BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, name, short_description, materials,
+            description
+        ) VALUES (
+            'delete', old.id, old.name, old.short_description, old.materials,
+            old.description
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_product_fts_au
+    AFTER UPDATE OF name, short_description, materials, description
+    ON products_product BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, name, short_description, materials,
+            description
+        ) VALUES (
+            'delete', old.id, old.name, old.short_description, old.materials,
+            old.description
+        );
+        INSERT INTO products_product_fts(
+            rowid, name, short_description, materials, description
+        ) VALUES (
+            new.id, new.name, new.short_description, new.materials, new.description
+        );
+    END
+    """,
+    "INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS products_product_fts_ai",
+    "DROP TRIGGER IF EXISTS products_product_fts_ad",
+    "DROP TRIGGER IF EXISTS products_product_fts_au",
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+
+def _run(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_INSTALL, "sqlite": SQLITE_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    _run(
+        schema_editor, {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_image_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='variant_matrix',
+            field=models.JSONField(default=dict, editable=False, help_text='Sizes, colors, price range and stock of active variants'),
+        ),
+    ]
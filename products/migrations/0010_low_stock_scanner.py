@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_product_thresholds(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductVariant = apps.get_model("products", "ProductVariant")
+    ProductVariant.objects.update(
+        low_stock_threshold=models.Subquery(
+            Product.objects.filter(pk=models.OuterRef("product_id")).values(
+                "low_stock_threshold"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_variant_matrix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('threshold', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(default=10),
+        ),
+        migrations.RunPython(copy_product_thresholds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock__lte', models.F('low_stock_threshold')), ('track_inventory', True)), fields=['stock'], name='product_low_stock'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock__lte', models.F('low_stock_threshold')), ('track_inventory', True)), fields=['stock'], name='variant_low_stock'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='products.product'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='variant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='products.productvariant'),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['-created_at'], name='low_stock_alert_open'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:41
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def resolve_duplicate_alerts(apps, schema_editor):
+    """Keep the oldest open alert per item and resolve the rest"""
+    LowStockAlert = apps.get_model("products", "LowStockAlert")
+    seen, duplicates = set(), []
+    alerts = (
+        LowStockAlert.objects.filter(resolved_at__isnull=True)
+        .order_by("created_at", "pk")
+        .values_list("pk", "product_id", "variant_id")
+    )
+    for pk, product_id, variant_id in alerts:
+        if (product_id, variant_id) in seen:
+            duplicates.append(pk)
+        seen.add((product_id, variant_id))
+    LowStockAlert.objects.filter(pk__in=duplicates).update(resolved_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_alerts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(models.F('product'), django.db.models.functions.comparison.Coalesce('variant', models.Value(0)), condition=models.Q(('resolved_at__isnull', True)), name='low_stock_alert_open_item'),
+        ),
+    ]
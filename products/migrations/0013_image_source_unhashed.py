@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_low_stock_alert_open_item'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagesource',
+            name='manifest',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sources', to='products.imagemanifest'),
+        ),
+        migrations.AddIndex(
+            model_name='imagesource',
+            index=models.Index(condition=models.Q(('manifest__isnull', True)), fields=['id'], name='image_source_unhashed'),
+        ),
+    ]
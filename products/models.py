@@ -1,8 +1,48 @@
 from django.db import models
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils.text import slugify
 
+from .safety import required_certification_ids
+from .search import search_products
+
+
+class LoadedImageMixin:
+    """Remembers the image file name a row was loaded with
+
+    products.images only queues a file when ``image_name_changed()``, so
+    saving a row without touching its image costs nothing extra.
+    """
+
+    IMAGE_FIELD = "image"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls.IMAGE_FIELD in field_names:
+            instance._loaded_image_name = instance.__dict__[cls.IMAGE_FIELD] or ""
+        return instance
+
+    def image_name(self):
+        return getattr(self, self.IMAGE_FIELD).name or ""
+
+    def image_name_changed(self):
+        loaded = getattr(self, "_loaded_image_name", None)
+        return loaded is None or loaded != self.image_name()
+
 
 class AgeGroup(models.Model):
     """Age groups for baby products"""
@@ -20,9 +60,11 @@ class AgeGroup(models.Model):
         return f"{self.name} ({self.min_months}-{self.max_months} months)"
 
 
-class SafetyCertification(models.Model):
+class SafetyCertification(LoadedImageMixin, models.Model):
     """Safety certifications for baby products"""
 
+    IMAGE_FIELD = "icon"
+
     name = models.CharField(max_length=100, unique=True)
     abbreviation = models.CharField(max_length=20)
     description = models.TextField()
@@ -38,7 +80,7 @@ class SafetyCertification(models.Model):
         return f"{self.name} ({self.abbreviation})"
 
 
-class Category(models.Model):
+class Category(LoadedImageMixin, models.Model):
     """Product categories for baby goods"""
 
     name = models.CharField(max_length=100, unique=True)
@@ -50,6 +92,15 @@ class Category(models.Model):
     )
     is_active = models.BooleanField(default=True)
 
+    # Materialized path ("1/5/12/") and ancestry, maintained on save
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+    breadcrumb = models.JSONField(
+        default=list,
+        editable=False,
+        help_text="Ancestors and self as {id, name, slug}, root first",
+    )
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ["name"]
@@ -60,13 +111,158 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse("catalog:category", kwargs={"slug": self.slug})
 
+    def clean(self):
+        super().clean()
+        self._check_parent()
+
+    def _check_parent(self):
+        if self.pk and self.parent_id:
+            if self.parent_id == self.pk or self.pk in self.parent.ancestor_ids():
+                raise ValidationError(
+                    {"parent": "A category cannot be moved below itself."}
+                )
+
     def save(self, *args, **kwargs):
+        # Also checked here: a cycle would send the subtree rewrite in
+        # _sync_tree() round in circles, and not every caller runs clean()
+        self._check_parent()
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+        self._sync_tree()
+
+    def ancestor_ids(self):
+        """IDs from the root down to and including this category"""
+        if self.path:
+            return [int(pk) for pk in self.path.split("/") if pk]
+        # Rows written without save() (bulk_create) have no path yet
+        ids, node = [], self
+        while node is not None and node.pk not in ids:
+            ids.insert(0, node.pk)
+            node = node.parent
+        return ids
+
+    def _tree_fields(self, parent):
+        crumb = {"id": self.pk, "name": self.name, "slug": self.slug}
+        if parent is None:
+            return f"{self.pk}/", 0, [crumb]
+        return (
+            f"{parent.path}{self.pk}/",
+            parent.depth + 1,
+            parent.breadcrumb + [crumb],
+        )
+
+    def _sync_tree(self):
+        """Refresh path fields for this node and, if they moved, its subtree"""
+        old_path = self.path
+        path, depth, breadcrumb = self._tree_fields(self.parent)
+        if (path, depth, breadcrumb) == (self.path, self.depth, self.breadcrumb):
+            return
+
+        self.path, self.depth, self.breadcrumb = path, depth, breadcrumb
+        Category.objects.filter(pk=self.pk).update(
+            path=path, depth=depth, breadcrumb=breadcrumb
+        )
+        if not old_path:
+            return  # a new node has no descendants yet
+
+        nodes = {self.pk: self}
+        descendants = list(
+            Category.objects.filter(path__startswith=old_path)
+            .exclude(pk=self.pk)
+            .order_by("depth")
+        )
+        for node in descendants:
+            node.path, node.depth, node.breadcrumb = node._tree_fields(
+                nodes[node.parent_id]
+            )
+            nodes[node.pk] = node
+        Category.objects.bulk_update(descendants, ["path", "depth", "breadcrumb"])
 
+    def descendants(self, include_self=False):
+        """All categories below this one, in a single indexed query"""
+        if self.path:
+            queryset = Category.objects.filter(path__startswith=self.path)
+        else:
+            # An empty prefix would match every category, so a node without
+            # a path yet is expanded through the parent links instead
+            queryset = Category.objects.filter(pk__in=self._subtree_ids())
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def _subtree_ids(self):
+        ids = frontier = {self.pk}
+        while frontier := set(
+            Category.objects.filter(parent__in=frontier).values_list("pk", flat=True)
+        ) - ids:
+            ids = ids | frontier
+        return ids
+
+
+def empty_rating_histogram():
+    return [0, 0, 0, 0, 0]
+
+
+class ProductQuerySet(models.QuerySet):
+    """Set-based helpers for product listings"""
+
+    def with_safety_status(self, required_ids=None):
+        """Annotate ``safety_status`` ("complete"/"incomplete") in SQL.
+
+        The required certification IDs are loaded once and the count of
+        certifications each product holds from that set is computed by a
+        correlated subquery, so the cost does not grow with the page size.
+        """
+        if required_ids is None:
+            required_ids = required_certification_ids()
+        if not required_ids:
+            return self.annotate(
+                safety_certs_held=Value(0, output_field=IntegerField()),
+                safety_status=Value("complete"),
+            )
 
-class Product(models.Model):
+        through = Product.safety_certifications.through
+        held = (
+            through.objects.filter(
+                product=OuterRef("pk"), safetycertification__in=required_ids
+            )
+            .order_by()
+            .values("product")
+            .annotate(n=Count("*"))
+            .values("n")
+        )
+        return self.annotate(
+            safety_certs_held=Coalesce(
+                Subquery(held, output_field=IntegerField()), Value(0)
+            ),
+            safety_status=Case(
+                When(
+                    safety_certs_held__gte=len(required_ids),
+                    then=Value("complete"),
+                ),
+                default=Value("incomplete"),
+            ),
+        )
+
+    def in_category_tree(self, category):
+        """Products in ``category`` or any of its subcategories"""
+        if not category.path:
+            return self.filter(category__in=category.descendants(include_self=True))
+        return self.filter(category__path__startswith=category.path)
+
+    def search(self, query):
+        """Ranked full-text search with prefix matching, see products.search"""
+        return search_products(self, query)
+
+    def safety_complete(self):
+        return self.with_safety_status().filter(safety_status="complete")
+
+    def safety_incomplete(self):
+        return self.with_safety_status().filter(safety_status="incomplete")
+
+
+class Product(LoadedImageMixin, models.Model):
     """Main product model for baby goods"""
 
     GENDER_CHOICES = [
@@ -136,16 +332,90 @@ class Product(models.Model):
     meta_title = models.CharField(max_length=70, blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
 
+    # Review aggregates, maintained from approved reviews by products.reviews
+    rating_avg = models.DecimalField(
+        max_digits=3, decimal_places=2, blank=True, null=True, editable=False
+    )
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_histogram = models.JSONField(
+        default=empty_rating_histogram,
+        editable=False,
+        help_text="Approved review counts for 1-5 stars",
+    )
+
+    # Active variant summary, maintained by products.variants
+    variant_matrix = models.JSONField(
+        default=dict,
+        editable=False,
+        help_text="Sizes, colors, price range and stock of active variants",
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Storefront category listings. Partial on is_active rather than
+            # leading with it: Django emits a bare boolean term, which SQLite
+            # cannot match against an index column but does match a condition.
+            models.Index(
+                fields=["category", "-created_at"],
+                name="product_active_cat_created",
+                condition=Q(is_active=True),
+            ),
+            # Keyset pagination over the whole active catalog (products API)
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="product_active_created",
+                condition=Q(is_active=True),
+            ),
+            # Admin changelist: the default ordering over every product,
+            # inactive included, so none of the partial indexes apply
+            models.Index(fields=["-created_at"], name="product_created"),
+            # Small partial index for the home page featured strip
+            models.Index(
+                fields=["-created_at"],
+                name="product_featured_active",
+                condition=Q(is_active=True, is_featured=True),
+            ),
+            # Low-stock scan: holds only the rows at or below their threshold
+            models.Index(
+                fields=["stock"],
+                name="product_low_stock",
+                condition=Q(
+                    is_active=True,
+                    track_inventory=True,
+                    stock__lte=F("low_stock_threshold"),
+                ),
+            ),
+        ]
+
+    # Product columns the variant matrix depends on (see products.variants)
+    VARIANT_MATRIX_FIELDS = ("price", "allow_backorder")
+    IMAGE_FIELD = "featured_image"
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in field_names for name in cls.VARIANT_MATRIX_FIELDS):
+            instance._loaded_matrix_inputs = instance.variant_matrix_inputs()
+        return instance
+
+    def variant_matrix_inputs(self):
+        return tuple(getattr(self, name) for name in self.VARIANT_MATRIX_FIELDS)
+
+    def variant_matrix_inputs_changed(self):
+        """Whether price or backorder differ from when the row was loaded"""
+        loaded = getattr(self, "_loaded_matrix_inputs", None)
+        return loaded is None or loaded != self.variant_matrix_inputs()
+
     def get_absolute_url(self):
         return reverse("catalog:product_detail", kwargs={"slug": self.slug})
 
@@ -170,23 +440,22 @@ class Product(models.Model):
             )
         return 0
 
-    def get_safety_status(self):
+    def get_safety_status(self, required_ids=None):
         """Check if product has required safety certifications"""
-        required_certs = SafetyCertification.objects.filter(is_required=True)
-        product_certs = self.safety_certifications.all()
+        annotated = self.__dict__.get("safety_status")
+        if annotated is not None:
+            return annotated
 
-        if required_certs.count() == 0:
-            return "complete"
-        elif (
-            required_certs.filter(id__in=product_certs).count()
-            == required_certs.count()
-        ):
+        if required_ids is None:
+            required_ids = required_certification_ids()
+        if not required_ids:
             return "complete"
-        else:
-            return "incomplete"
+        # Uses the prefetch cache when the caller prefetched certifications
+        held = {cert.pk for cert in self.safety_certifications.all()}
+        return "complete" if required_ids <= held else "incomplete"
 
 
-class ProductVariant(models.Model):
+class ProductVariant(LoadedImageMixin, models.Model):
     """Product variants for size, color, etc."""
 
     product = models.ForeignKey(
@@ -207,6 +476,7 @@ class ProductVariant(models.Model):
     # Inventory
     stock = models.PositiveIntegerField(default=0)
     track_inventory = models.BooleanField(default=True)
+    low_stock_threshold = models.PositiveIntegerField(default=10)
 
     # Image
     image = models.ImageField(upload_to="products/variants/", blank=True, null=True)
@@ -215,6 +485,22 @@ class ProductVariant(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=["product", "name"],
+                name="variant_product_active",
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=["stock"],
+                name="variant_low_stock",
+                condition=Q(
+                    is_active=True,
+                    track_inventory=True,
+                    stock__lte=F("low_stock_threshold"),
+                ),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.name}"
@@ -228,7 +514,7 @@ class ProductVariant(models.Model):
         return self.stock > 0 or self.product.allow_backorder
 
 
-class ProductImage(models.Model):
+class ProductImage(LoadedImageMixin, models.Model):
     """Product gallery images"""
 
     product = models.ForeignKey(
@@ -266,6 +552,180 @@ class ProductReview(models.Model):
     class Meta:
         ordering = ["-created_at"]
         unique_together = ["product", "user"]
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at"],
+                name="review_product_approved",
+                condition=Q(is_approved=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.user.username} Review"
+
+
+class StockReservation(models.Model):
+    """A hold on stock for a checkout, see products.stock"""
+
+    HELD = "HELD"
+    COMMITTED = "COMMITTED"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
+
+    STATUS_CHOICES = [
+        (HELD, "Held"),
+        (COMMITTED, "Committed"),
+        (RELEASED, "Released"),
+        (EXPIRED, "Expired"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # The sweeper only ever looks at held reservations
+            models.Index(
+                fields=["expires_at"],
+                name="reservation_held_expiry",
+                condition=Q(status="HELD"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Reservation {self.pk} ({self.get_status_display()})"
+
+
+class StockReservationItem(models.Model):
+    """One reserved line; ``deducted`` is what was actually taken from stock"""
+
+    reservation = models.ForeignKey(
+        StockReservation, on_delete=models.CASCADE, related_name="items"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, null=True, blank=True
+    )
+    variant = models.ForeignKey(
+        ProductVariant, on_delete=models.CASCADE, null=True, blank=True
+    )
+    quantity = models.PositiveIntegerField()
+    deducted = models.PositiveIntegerField(
+        default=0, help_text="0 when untracked or backordered"
+    )
+
+    def __str__(self):
+        return f"{self.variant or self.product} x {self.quantity}"
+
+
+class LowStockAlert(models.Model):
+    """A product or variant at or below its threshold, see products.low_stock
+
+    Open while ``resolved_at`` is empty; the scanner only alerts when one
+    is opened.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="low_stock_alerts"
+    )
+    variant = models.ForeignKey(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="low_stock_alerts",
+    )
+    stock = models.PositiveIntegerField()
+    threshold = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at"],
+                name="low_stock_alert_open",
+                condition=Q(resolved_at__isnull=True),
+            ),
+        ]
+        constraints = [
+            # One open alert per item; a product-level alert has no variant,
+            # and NULLs never clash in a unique index, hence the Coalesce
+            models.UniqueConstraint(
+                "product",
+                Coalesce("variant", Value(0)),
+                name="low_stock_alert_open_item",
+                condition=Q(resolved_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variant or self.product}: {self.stock} left"
+
+
+class ImageManifest(models.Model):
+    """Derivatives generated for one image content hash, see products.images"""
+
+    PENDING = "PENDING"
+    READY = "READY"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    source = models.CharField(max_length=255, help_text="Storage name processed")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    derivatives = models.JSONField(
+        default=dict, help_text='{"webp": {"320": "derivatives/..."}, ...}'
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="image_manifest_pending",
+                condition=Q(status="PENDING"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.get_status_display()})"
+
+
+class ImageSource(models.Model):
+    """Maps an uploaded file name to the manifest for its content
+
+    The manifest is empty until ``process_images`` has hashed the file.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    manifest = models.ForeignKey(
+        ImageManifest,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sources",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="image_source_unhashed",
+                condition=Q(manifest__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
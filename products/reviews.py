@@ -0,0 +1,94 @@
+"""Denormalized review aggregates stored on Product.
+
+Only approved reviews count towards ``rating_avg``, ``rating_count`` and
+``rating_histogram``. Changes are applied per affected product from one
+grouped query over the approved-review index, so listings never have to
+aggregate ``ProductReview`` at read time. The product rows are locked
+before their reviews are counted, so concurrent review writes for one
+product are counted one after the other and the last one sees both.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Product, ProductReview, empty_rating_histogram
+
+AGGREGATE_FIELDS = ["rating_avg", "rating_count", "rating_histogram"]
+
+
+def _rating_counts(reviews):
+    """(product_id, rating, count) rows for approved reviews"""
+    return (
+        reviews.filter(is_approved=True)
+        .order_by()
+        .values_list("product_id", "rating")
+        .annotate(n=Count("id"))
+        .order_by("product_id", "rating")
+    )
+
+
+def apply_histogram(product, histogram):
+    count = sum(histogram)
+    product.rating_histogram = histogram
+    product.rating_count = count
+    if count:
+        total = sum(stars * n for stars, n in enumerate(histogram, start=1))
+        product.rating_avg = (Decimal(total) / count).quantize(Decimal("0.01"))
+    else:
+        product.rating_avg = None
+
+
+def _save(products, histograms):
+    for product in products:
+        apply_histogram(product, histograms[product.pk])
+    Product.objects.bulk_update(products, AGGREGATE_FIELDS)
+    return len(products)
+
+
+def _save_histograms(histograms):
+    return _save(list(Product.objects.filter(pk__in=histograms).only("pk")), histograms)
+
+
+def refresh_review_aggregates(product_ids):
+    """Recompute the aggregates for the given products"""
+    product_ids = set(product_ids) - {None}
+    if not product_ids:
+        return 0
+
+    with transaction.atomic():
+        # Locked in pk order, so two refreshes never wait on each other
+        products = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=product_ids)
+            .order_by("pk")
+            .only("pk")
+        )
+        histograms = {product.pk: empty_rating_histogram() for product in products}
+        reviews = ProductReview.objects.filter(product_id__in=histograms)
+        for product_id, rating, n in _rating_counts(reviews):
+            histograms[product_id][rating - 1] = n
+        return _save(products, histograms)
+
+
+def rebuild_review_aggregates(batch_size=1000):
+    """Recompute the aggregates for every product in a single pass"""
+    updated = 0
+    with transaction.atomic():
+        Product.objects.update(
+            rating_avg=None,
+            rating_count=0,
+            rating_histogram=empty_rating_histogram(),
+        )
+        histograms = {}
+        rows = _rating_counts(ProductReview.objects.all())
+        for product_id, rating, n in rows.iterator(chunk_size=batch_size):
+            if product_id not in histograms and len(histograms) >= batch_size:
+                updated += _save_histograms(histograms)
+                histograms = {}
+            histograms.setdefault(product_id, empty_rating_histogram())
+            histograms[product_id][rating - 1] = n
+        if histograms:
+            updated += _save_histograms(histograms)
+    return updated
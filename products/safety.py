@@ -0,0 +1,49 @@
+"""Process-local cache of the required safety certification set.
+
+The set of required certifications changes rarely, so each process keeps
+a memo of the IDs tagged with a version number held in the shared cache.
+Signal handlers bump the version, which makes every process reload the
+set on its next compliance check.
+"""
+
+import threading
+
+from .cache import bump_generations, generations
+
+REQUIRED_CERTS_VERSION_KEY = "products:required-certs:version"
+
+_memo = (None, frozenset())
+_memo_lock = threading.Lock()
+
+
+def _current_version():
+    return generations([REQUIRED_CERTS_VERSION_KEY]).get(REQUIRED_CERTS_VERSION_KEY)
+
+
+def required_certification_ids():
+    """IDs of the certifications every product must hold to be sold"""
+    global _memo
+
+    version = _current_version()
+    memo_version, ids = _memo
+    if version is not None and memo_version == version:
+        return ids
+
+    from .models import SafetyCertification
+
+    with _memo_lock:
+        ids = frozenset(
+            SafetyCertification.objects.filter(is_required=True).values_list(
+                "id", flat=True
+            )
+        )
+        _memo = (version, ids)
+    return ids
+
+
+def invalidate_required_certifications():
+    """Bump the shared version so every process reloads the required set"""
+    global _memo
+
+    bump_generations([REQUIRED_CERTS_VERSION_KEY])
+    _memo = (None, frozenset())
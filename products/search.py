@@ -0,0 +1,235 @@
+"""Ranked full-text product search.
+
+The search document weights ``name`` > ``short_description`` >
+``materials`` > ``description`` and is maintained by the database on
+every write (see migration 0006):
+
+* PostgreSQL: a stored generated ``tsvector`` column with a GIN index.
+* SQLite: an external-content FTS5 table kept in sync by triggers.
+  SQLite migrations that rebuild ``products_product`` drop its triggers,
+  so they are restored after every ``migrate``.
+
+Other backends fall back to ``icontains`` matching without ranking.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "products_product_fts"
+PG_CONFIG = "english"
+# Column weights for SQLite bm25(), in FTS table column order
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_FTS_COLUMNS = "name, short_description, materials, description"
+_FTS_NEW = "new.id, new.name, new.short_description, new.materials, new.description"
+_FTS_OLD = "old.id, old.name, old.short_description, old.materials, old.description"
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE products_product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(materials, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS product_search_vector "
+    "ON products_product USING GIN (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS product_search_vector",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS}, content='products_product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+"""
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW});
+        END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+            VALUES ('delete', {_FTS_OLD});
+        END
+    """,
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF {_FTS_COLUMNS} ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+            VALUES ('delete', {_FTS_OLD});
+            INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW});
+        END
+    """,
+}
+
+
+def _sqlite_objects(cursor, kind):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = %s", [kind])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def install_search_backend(connection):
+    """Create the search column/index (PostgreSQL) or FTS5 table (SQLite)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+        elif connection.vendor == "sqlite":
+            cursor.execute(SQLITE_TABLE)
+            repair_search_backend(connection)
+
+
+def repair_search_backend(connection):
+    """Restore SQLite sync triggers lost when a migration rebuilt the table"""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if FTS_TABLE not in _sqlite_objects(cursor, "table"):
+            return
+        missing = SQLITE_TRIGGERS.keys() - _sqlite_objects(cursor, "trigger")
+        for name in sorted(missing):
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_backend(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for statement in POSTGRES_UNINSTALL:
+                cursor.execute(statement)
+        elif connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def search_terms(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _tsquery(terms):
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _fts_match(terms):
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _term_condition(term):
+    return (
+        Q(name__icontains=term)
+        | Q(short_description__icontains=term)
+        | Q(materials__icontains=term)
+        | Q(description__icontains=term)
+    )
+
+
+def _postgres_search(queryset, terms):
+    tsquery = _tsquery(terms)
+    table = queryset.model._meta.db_table
+    return (
+        queryset.filter(
+            RawSQL(
+                f'"{table}"."search_vector" @@ to_tsquery(%s, %s)',
+                [PG_CONFIG, tsquery],
+                output_field=BooleanField(),
+            )
+        )
+        .annotate(
+            search_rank=RawSQL(
+                f'ts_rank("{table}"."search_vector", to_tsquery(%s, %s))',
+                [PG_CONFIG, tsquery],
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-search_rank", "-created_at")
+    )
+
+
+def _sqlite_search(queryset, terms):
+    match = _fts_match(terms)
+    table = queryset.model._meta.db_table
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    # bm25() is only available in a query that joins the FTS table itself
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        select={"search_rank": f"-bm25({FTS_TABLE}, {weights})"},
+        order_by=["-search_rank", "-created_at"],
+    )
+
+
+def _fallback_search(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(_term_condition(term))
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_products(queryset, query):
+    """Filter ``queryset`` to products matching ``query``, best match first
+
+    Every word must match, and the last characters of each word may be
+    omitted (prefix matching), so "org cott" finds "Organic Cotton".
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return _postgres_search(queryset, terms)
+    if vendor == "sqlite":
+        return _sqlite_search(queryset, terms)
+    return _fallback_search(queryset, terms)
+
+
+def search_condition(queryset, query):
+    """A ``Q`` for the products matching ``query``, without ranking
+
+    Use it to combine search with other conditions. A ``pk__in`` over
+    ``search_products()`` does not work: its raw SQL names the product
+    table, which inside the subquery refers to the outer query, so the
+    match is re-run for every outer row.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return Q(pk__in=[])
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        table = queryset.model._meta.db_table
+        return Q(
+            RawSQL(
+                f'"{table}"."search_vector" @@ to_tsquery(%s, %s)',
+                [PG_CONFIG, _tsquery(terms)],
+                output_field=BooleanField(),
+            )
+        )
+    if vendor == "sqlite":
+        return Q(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [_fts_match(terms)],
+            )
+        )
+    condition = Q()
+    for term in terms:
+        condition &= _term_condition(term)
+    return condition
@@ -0,0 +1,484 @@
+"""Deterministic synthetic catalog for benchmarks.
+
+``CatalogSeeder(seed).run(products)`` fills an empty database with a
+nested category tree, age groups, safety certifications and products
+with variants, gallery images and reviews. Everything is drawn from one
+``random.Random(seed)`` in a fixed order, and timestamps are computed
+rather than taken from the clock, so the same seed and product count
+give the same catalog on every machine and every commit.
+
+The distributions are skewed the way a real catalog is: a few leaf
+categories hold most of the products (Zipf), prices are log-normal, and
+review counts are heavy-tailed (Pareto), so most products have none and
+a few have hundreds. Rows are written with ``bulk_create`` in batches;
+review aggregates and variant matrices are computed as the products are
+generated, so nothing has to be rebuilt afterwards.
+"""
+
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.utils.text import slugify
+
+from .cache import invalidate_models
+from .facets import invalidate_facet_index
+from .homepage import invalidate_home
+from .models import (
+    AgeGroup,
+    Category,
+    Product,
+    ProductImage,
+    ProductReview,
+    ProductVariant,
+    SafetyCertification,
+    empty_rating_histogram,
+)
+from .reviews import apply_histogram
+from .variants import build_matrix
+
+DEFAULT_SEED = 20240101
+SHOPPER_PREFIX = "seed-shopper-"
+CATALOG_START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+CATALOG_DAYS = 3 * 365
+
+AGE_GROUPS = [
+    ("0-3 months", 0, 3),
+    ("3-6 months", 3, 6),
+    ("6-12 months", 6, 12),
+    ("12-24 months", 12, 24),
+    ("2-4 years", 24, 48),
+    ("4+ years", 48, 96),
+]
+SIZES = ["NB", "0-3M", "3-6M", "6-12M", "12-18M", "18-24M", "2T", "3T", "4T"]
+
+# (name, abbreviation, required)
+CERTIFICATIONS = [
+    ("Juvenile Products Manufacturers Association", "JPMA", True),
+    ("ASTM F963 Toy Safety", "ASTM", True),
+    ("CPSIA Lead and Phthalates", "CPSIA", True),
+    ("Global Organic Textile Standard", "GOTS", False),
+    ("OEKO-TEX Standard 100", "OEKO-TEX", False),
+    ("Greenguard Gold", "GREENGUARD", False),
+    ("EN 71 Safety of Toys", "EN71", False),
+]
+
+# Roots and their children; every child gets one leaf per LEAF_STYLES entry
+CATEGORY_TREE = {
+    "Nursery": ["Cribs", "Bassinets", "Changing Tables", "Crib Mattresses", "Mobiles"],
+    "Strollers": ["Full-Size Strollers", "Jogging Strollers", "Umbrella Strollers"],
+    "Car Seats": ["Infant Car Seats", "Convertible Car Seats", "Booster Seats"],
+    "Feeding": ["Bottles", "High Chairs", "Bibs", "Breast Pumps", "Sippy Cups"],
+    "Clothing": ["Bodysuits", "Sleepers", "Outerwear", "Socks", "Hats"],
+    "Bath": ["Baby Tubs", "Hooded Towels", "Washcloths", "Bath Toys"],
+    "Diapering": ["Cloth Diapers", "Diaper Bags", "Changing Pads", "Wipes"],
+    "Toys": ["Rattles", "Teethers", "Activity Gyms", "Soft Toys", "Stacking Toys"],
+    "Sleep": ["Swaddles", "Sleep Sacks", "Sound Machines", "Crib Sheets"],
+    "Safety": ["Baby Gates", "Monitors", "Outlet Covers", "Cabinet Locks"],
+    "Carriers": ["Soft Carriers", "Wraps", "Hip Seats"],
+    "Health": ["Thermometers", "Nasal Aspirators", "Grooming Kits"],
+}
+LEAF_STYLES = ["Classic", "Organic", "Travel", "Deluxe"]
+
+ADJECTIVES = [
+    "Cozy", "Gentle", "Snuggly", "Little", "Happy", "Dreamy", "Tiny", "Soft",
+    "Sunny", "Sleepy", "Cuddly", "Bright", "Calm", "Sweet", "Mini", "Petite",
+]
+MATERIALS = [
+    "Organic Cotton", "Bamboo", "Merino Wool", "Muslin", "Silicone",
+    "Beechwood", "Stainless Steel", "Recycled Polyester", "Linen", "Fleece",
+]
+COLORS = ["White", "Grey", "Sage", "Blush", "Navy", "Oat", "Mustard", "Sky"]
+COUNTRIES = ["USA", "Canada", "Portugal", "Germany", "Denmark", "China", "India"]
+FEATURES = [
+    "easy to clean",
+    "machine washable",
+    "free of BPA and phthalates",
+    "designed with paediatricians",
+    "lightweight and foldable",
+    "breathable for warm nights",
+    "built to grow with your baby",
+    "gentle on sensitive skin",
+]
+REVIEW_TITLES = [
+    "Love it", "Worth every penny", "Does the job", "Not what I expected",
+    "Great quality", "Our favourite", "Returned it", "Perfect gift",
+]
+
+# (value, weight) tables
+GENDERS = [("U", 60), ("F", 20), ("M", 20)]
+CONDITIONS = [("NEW", 88), ("LIKE_NEW", 7), ("GOOD", 4), ("FAIR", 1)]
+VARIANT_COUNTS = [(0, 40), (2, 20), (3, 20), (4, 10), (6, 10)]
+IMAGE_COUNTS = [(0, 10), (1, 30), (2, 25), (3, 20), (5, 15)]
+RATINGS = [(1, 4), (2, 4), (3, 8), (4, 22), (5, 62)]
+CERTIFICATION_COUNTS = [(0, 30), (1, 35), (2, 25), (3, 10)]
+
+CATEGORY_SKEW = 1.1
+REVIEW_TAIL = 2.0
+MAX_REVIEWS = 1000
+
+
+@dataclass
+class SeedStats:
+    categories: int = 0
+    products: int = 0
+    variants: int = 0
+    images: int = 0
+    reviews: int = 0
+    batches: int = 0
+
+
+class CatalogNotEmpty(Exception):
+    pass
+
+
+def _table(pairs):
+    values = [value for value, _ in pairs]
+    cum_weights = list(accumulate(weight for _, weight in pairs))
+    return values, cum_weights
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Keep the ``created_at`` values we set instead of the current time"""
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class CatalogSeeder:
+    def __init__(self, seed=DEFAULT_SEED, batch_size=2000):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.stats = SeedStats()
+        self.variant_pk = 0
+        self.tables = {
+            name: _table(pairs)
+            for name, pairs in {
+                "gender": GENDERS,
+                "condition": CONDITIONS,
+                "variants": VARIANT_COUNTS,
+                "images": IMAGE_COUNTS,
+                "rating": RATINGS,
+                "certifications": CERTIFICATION_COUNTS,
+            }.items()
+        }
+
+    def pick(self, table):
+        values, cum_weights = self.tables[table]
+        return self.random.choices(values, cum_weights=cum_weights)[0]
+
+    def create_reference_data(self):
+        self.age_groups = AgeGroup.objects.bulk_create(
+            [
+                AgeGroup(name=name, min_months=low, max_months=high)
+                for name, low, high in AGE_GROUPS
+            ]
+        )
+        self.certifications = SafetyCertification.objects.bulk_create(
+            [
+                SafetyCertification(
+                    name=name,
+                    abbreviation=abbreviation,
+                    description=f"Certified to the {name} requirements.",
+                    is_required=required,
+                )
+                for name, abbreviation, required in CERTIFICATIONS
+            ]
+        )
+
+    def create_categories(self):
+        """Three levels, root/child/leaf; products go into the leaves"""
+        levels = [[(name, None) for name in CATEGORY_TREE]]
+        levels.append(
+            [(child, root) for root, children in CATEGORY_TREE.items() for child in children]
+        )
+        levels.append(
+            [(f"{style} {child}", child) for child, _ in levels[1] for style in LEAF_STYLES]
+        )
+        created = {}
+        for level in levels:
+            nodes = Category.objects.bulk_create(
+                [
+                    Category(
+                        name=name,
+                        slug=slugify(name),
+                        description=f"{name} for babies and toddlers.",
+                        parent=created.get(parent),
+                    )
+                    for name, parent in level
+                ]
+            )
+            # bulk_create skips save(), so fill in the materialized paths
+            for node in nodes:
+                node.path, node.depth, node.breadcrumb = node._tree_fields(node.parent)
+                created[node.name] = node
+            Category.objects.bulk_update(nodes, ["path", "depth", "breadcrumb"])
+        self.stats.categories = len(created)
+
+        # A few leaves hold most of the catalog
+        leaves = [created[name] for name, _ in levels[2]]
+        self.random.shuffle(leaves)
+        self.leaves = leaves
+        self.leaf_weights = list(
+            accumulate(1 / rank**CATEGORY_SKEW for rank in range(1, len(leaves) + 1))
+        )
+
+    def create_shoppers(self, count):
+        User.objects.bulk_create(
+            [
+                # "!" marks an unusable password
+                User(username=f"{SHOPPER_PREFIX}{number}", password="!")
+                for number in range(count)
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        self.shopper_ids = list(
+            User.objects.filter(username__startswith=SHOPPER_PREFIX)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:count]
+        )
+
+    def product(self, number, category, created_at):
+        rng = self.random
+        kind = category.parent.name
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {kind}"
+        features = rng.sample(FEATURES, 3)
+        price = Decimal(min(max(rng.lognormvariate(3.3, 0.8), 3), 2000)).quantize(
+            Decimal("0.01")
+        )
+        roll = rng.random()
+        if roll < 0.08:
+            stock = 0
+        elif roll < 0.2:
+            stock = rng.randint(1, 10)
+        else:
+            stock = rng.randint(11, 500)
+        sku = f"SEED-{number:07d}"
+        return Product(
+            # Explicit IDs, like loaddata, so runs match row for row
+            pk=number + 1,
+            name=name,
+            slug=f"{slugify(name)}-{number}",
+            description=(
+                f"Our {name.lower()} is {features[0]}, {features[1]} and "
+                f"{features[2]}. Part of the {category.name} range."
+            ),
+            short_description=f"{kind}, {features[0]}",
+            price=price,
+            compare_at_price=(price * Decimal("1.25")).quantize(Decimal("0.01"))
+            if rng.random() < 0.2
+            else None,
+            sku=sku,
+            track_inventory=rng.random() < 0.95,
+            stock=stock,
+            allow_backorder=rng.random() < 0.03,
+            category=category,
+            gender=self.pick("gender"),
+            materials=rng.choice(MATERIALS),
+            country_of_origin=rng.choice(COUNTRIES),
+            featured_image=f"products/seed/{sku}.jpg" if rng.random() < 0.9 else "",
+            is_active=rng.random() < 0.97,
+            is_featured=rng.random() < 0.005,
+            condition=self.pick("condition"),
+            created_at=created_at,
+        )
+
+    def related_rows(self, product):
+        """Through rows, variants, images and reviews of an unsaved product
+
+        Also fills in the product's review aggregates and variant matrix,
+        which ``bulk_create`` would otherwise leave for a rebuild.
+        """
+        rng = self.random
+        rows = {"age_groups": [], "certifications": [], "variants": []}
+        first = rng.randrange(len(self.age_groups))
+        for group in self.age_groups[first : first + rng.randint(1, 2)]:
+            rows["age_groups"].append(
+                Product.age_groups.through(product_id=product.pk, agegroup_id=group.pk)
+            )
+        for certification in rng.sample(self.certifications, self.pick("certifications")):
+            rows["certifications"].append(
+                Product.safety_certifications.through(
+                    product_id=product.pk, safetycertification_id=certification.pk
+                )
+            )
+
+        matrix_rows = []
+        sizes = rng.sample(SIZES, min(self.pick("variants"), len(SIZES)))
+        for number, size in enumerate(sizes):
+            color = rng.choice(COLORS)
+            self.variant_pk += 1
+            variant = ProductVariant(
+                pk=self.variant_pk,
+                product_id=product.pk,
+                name=f"{color} / {size}",
+                sku=f"{product.sku}-{number}",
+                size=size,
+                color=color,
+                price=product.price + 5 if rng.random() < 0.1 else None,
+                stock=rng.randint(0, 60),
+                is_active=rng.random() < 0.95,
+            )
+            rows["variants"].append(variant)
+            if variant.is_active:
+                matrix_rows.append(
+                    (
+                        product.pk,
+                        variant.pk,
+                        variant.size,
+                        variant.color,
+                        variant.price,
+                        variant.stock,
+                        variant.track_inventory,
+                        product.price,
+                        product.allow_backorder,
+                    )
+                )
+        product.variant_matrix = build_matrix(matrix_rows)
+
+        rows["images"] = [
+            ProductImage(
+                product_id=product.pk,
+                image=f"products/seed/{product.sku}-{number}.jpg",
+                alt_text=product.name,
+                sort_order=number,
+            )
+            for number in range(self.pick("images"))
+        ]
+
+        count = min(
+            int(rng.paretovariate(REVIEW_TAIL)) - 1, MAX_REVIEWS, len(self.shopper_ids)
+        )
+        rows["reviews"] = []
+        histogram = empty_rating_histogram()
+        for user_id in rng.sample(self.shopper_ids, count):
+            review = ProductReview(
+                product_id=product.pk,
+                user_id=user_id,
+                rating=self.pick("rating"),
+                title=rng.choice(REVIEW_TITLES),
+                verified_purchase=rng.random() < 0.6,
+                helpful_count=int(rng.paretovariate(1.5)) - 1,
+                is_approved=rng.random() < 0.92,
+                created_at=product.created_at + timedelta(days=rng.randint(1, 365)),
+            )
+            review.content = f"{review.rating} stars. {rng.choice(FEATURES).capitalize()}."
+            rows["reviews"].append(review)
+            if review.is_approved:
+                histogram[review.rating - 1] += 1
+        apply_histogram(product, histogram)
+        return rows
+
+    def write_batch(self, first, count, total):
+        rng = self.random
+        categories = rng.choices(self.leaves, cum_weights=self.leaf_weights, k=count)
+        step = CATALOG_DAYS * 86400 / total
+        products = [
+            self.product(
+                number,
+                category,
+                CATALOG_START + timedelta(seconds=number * step + rng.random() * step),
+            )
+            for number, category in zip(range(first, first + count), categories)
+        ]
+        rows = {}
+        for product in products:
+            for name, related in self.related_rows(product).items():
+                rows.setdefault(name, []).extend(related)
+
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            Product.age_groups.through.objects.bulk_create(rows["age_groups"])
+            Product.safety_certifications.through.objects.bulk_create(
+                rows["certifications"]
+            )
+            ProductVariant.objects.bulk_create(rows["variants"], batch_size=self.batch_size)
+            ProductImage.objects.bulk_create(rows["images"], batch_size=self.batch_size)
+            ProductReview.objects.bulk_create(rows["reviews"], batch_size=self.batch_size)
+
+        self.stats.batches += 1
+        self.stats.products += count
+        self.stats.variants += len(rows["variants"])
+        self.stats.images += len(rows["images"])
+        self.stats.reviews += len(rows["reviews"])
+
+    def reset_sequences(self):
+        """Move the ID sequences past the explicit product and variant IDs"""
+        connection = connections[router.db_for_write(Product)]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Product, ProductVariant]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def create_pages(self):
+        """A home page whose StreamField features the first active products"""
+        from wagtail.models import Page
+
+        HomePage = apps.get_model("catalog", "HomePage")
+        featured = Product.objects.filter(is_active=True).order_by("pk")[:24]
+        page = HomePage(
+            title="Seeded home",
+            slug="seeded-home",
+            featured_products=[
+                {
+                    "type": "featured_products",
+                    "value": [
+                        {"type": "item", "value": {"product": product.pk}}
+                        for product in featured
+                    ],
+                }
+            ],
+        )
+        Page.get_first_root_node().add_child(instance=page)
+
+    def run(self, products, shoppers=None, progress=None):
+        if Product.objects.exists() or Category.objects.exists():
+            raise CatalogNotEmpty("The catalog is not empty; seed a fresh database")
+
+        with _explicit_timestamps(Product, ProductReview):
+            with transaction.atomic():
+                self.create_reference_data()
+                self.create_categories()
+                self.create_shoppers(
+                    shoppers if shoppers is not None else max(100, products // 20)
+                )
+            for first in range(0, products, self.batch_size):
+                self.write_batch(first, min(self.batch_size, products - first), products)
+                if progress:
+                    progress(self.stats)
+
+        self.reset_sequences()
+        if apps.is_installed("catalog"):
+            self.create_pages()
+
+        invalidate_facet_index()
+        invalidate_home()
+        invalidate_models(
+            Product,
+            ProductVariant,
+            ProductImage,
+            ProductReview,
+            Category,
+            AgeGroup,
+            SafetyCertification,
+            Product.age_groups.through,
+            Product.safety_certifications.through,
+        )
+        return self.stats
@@ -0,0 +1,158 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_models
+from .facets import invalidate_facet_index
+from .homepage import invalidate_home
+from .images import IMAGE_FIELDS, register_image
+from .models import (
+    AgeGroup,
+    Category,
+    Product,
+    ProductReview,
+    ProductVariant,
+    SafetyCertification,
+)
+from .reviews import refresh_review_aggregates
+from .safety import invalidate_required_certifications
+from .search import repair_search_backend
+from .variants import refresh_variant_matrix
+
+
+@receiver(post_save, sender=SafetyCertification)
+@receiver(post_delete, sender=SafetyCertification)
+def safety_certification_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_required_certifications)
+
+
+@receiver(m2m_changed, sender=Product.safety_certifications.through)
+def product_certifications_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(invalidate_required_certifications)
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_product(sender, instance, raw=False, **kwargs):
+    # A review moved to another product must also leave the old one's counts
+    if instance.pk and not raw:
+        instance._previous_product_id = (
+            ProductReview.objects.filter(pk=instance.pk)
+            .values_list("product_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def product_review_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Product):
+        return  # the product itself is being deleted
+    previous = getattr(instance, "_previous_product_id", None)
+    refresh_review_aggregates({instance.product_id, previous})
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def product_variant_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Product):
+        return  # the product itself is being deleted
+    refresh_variant_matrix([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def product_variant_prices_changed(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    # Variant prices fall back to the product price, and backorder applies
+    # to every variant; a new product has no variants yet
+    if raw or created:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        Product.VARIANT_MATRIX_FIELDS
+    ):
+        return
+    if instance.variant_matrix_inputs_changed():
+        refresh_variant_matrix([instance.pk])
+        instance._loaded_matrix_inputs = instance.variant_matrix_inputs()
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    repair_search_backend(connections[using])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def facet_source_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_facet_index)
+
+
+@receiver(m2m_changed, sender=Product.age_groups.through)
+@receiver(m2m_changed, sender=Product.safety_certifications.through)
+def product_facet_m2m_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(invalidate_facet_index)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=AgeGroup)
+@receiver(post_delete, sender=AgeGroup)
+def home_source_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_home)
+
+
+def queue_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and instance.IMAGE_FIELD not in update_fields:
+        return
+    if not instance.image_name_changed():
+        return
+    name = instance.image_name()
+    instance._loaded_image_name = name
+    if name:
+        transaction.on_commit(partial(register_image, name))
+
+
+for image_model, _ in IMAGE_FIELDS:
+    post_save.connect(
+        queue_image_derivatives,
+        sender=image_model,
+        dispatch_uid=f"queue_image_derivatives_{image_model.__name__}",
+    )
+
+
+def cached_model_changed(sender, **kwargs):
+    transaction.on_commit(partial(invalidate_models, sender))
+
+
+def cached_m2m_changed(sender, instance, action, model, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        models = (sender, type(instance), model)
+        transaction.on_commit(partial(invalidate_models, *models))
+
+
+for cached_model in apps.get_app_config("products").get_models():
+    name = cached_model.__name__
+    post_save.connect(
+        cached_model_changed,
+        sender=cached_model,
+        dispatch_uid=f"cached_model_saved_{name}",
+    )
+    post_delete.connect(
+        cached_model_changed,
+        sender=cached_model,
+        dispatch_uid=f"cached_model_deleted_{name}",
+    )
+    for m2m_field in cached_model._meta.local_many_to_many:
+        m2m_changed.connect(
+            cached_m2m_changed,
+            sender=m2m_field.remote_field.through,
+            dispatch_uid=f"cached_m2m_changed_{name}_{m2m_field.name}",
+        )
@@ -0,0 +1,225 @@
+"""Concurrency-safe stock reservations for products and variants.
+
+Stock is only ever changed with conditional ``UPDATE ... SET stock =
+stock - n WHERE stock >= n`` statements, so concurrent checkouts cannot
+oversell and nothing reads stock into Python to write it back. Rows are
+touched in a fixed order (products, then variants, each by primary key)
+so multi-item reservations cannot deadlock each other. Inactive products
+and variants cannot be reserved.
+
+Items that are not inventory-tracked are reserved without touching
+stock. An item that falls back to backorder takes what is on hand, read
+under a row lock, and backorders only the rest;
+``StockReservationItem.deducted`` records what was actually taken so
+release returns exactly that.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_models, products_written
+from .models import (
+    Product,
+    ProductVariant,
+    StockReservation,
+    StockReservationItem,
+)
+from .variants import refresh_variant_matrix_for_variants
+
+DEFAULT_TTL = timedelta(minutes=15)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, item, requested):
+        self.item = item
+        self.requested = requested
+        # Label and pk only: formatting must not load related rows
+        super().__init__(
+            f"Not enough stock for {item._meta.label} {item.pk}: "
+            f"requested {requested}"
+        )
+
+
+class ReservationError(Exception):
+    pass
+
+
+def _normalize(items):
+    """Merge ``(product_or_variant, quantity)`` pairs into sorted lock order
+
+    Returns ``((kind, pk), quantity, obj)`` with the caller's first
+    instance for each item.
+    """
+    totals = defaultdict(int)
+    objects = {}
+    for obj, quantity in items:
+        if quantity <= 0:
+            raise ValueError("Reserved quantities must be positive")
+        if isinstance(obj, ProductVariant):
+            key = (1, obj.pk)
+        elif isinstance(obj, Product):
+            key = (0, obj.pk)
+        else:
+            raise TypeError(f"Cannot reserve {obj!r}")
+        totals[key] += quantity
+        objects.setdefault(key, obj)
+    return [(key, total, objects[key]) for key, total in sorted(totals.items())]
+
+
+def _take(model, item, quantity):
+    """Deduct stock atomically; returns the quantity taken from stock"""
+    row = model.objects.filter(pk=item.pk, is_active=True)
+    taken = row.filter(track_inventory=True, stock__gte=quantity).update(
+        stock=F("stock") - quantity
+    )
+    if taken:
+        return quantity
+
+    if model is ProductVariant:
+        backorder = Q(product__allow_backorder=True)
+    else:
+        backorder = Q(allow_backorder=True)
+    unlimited = (
+        row.filter(Q(track_inventory=False) | backorder)
+        .select_for_update(of=("self",))
+        .values_list("track_inventory", "stock")
+        .first()
+    )
+    if unlimited is None:
+        raise InsufficientStock(item, quantity)
+    tracked, on_hand = unlimited
+    if not tracked or not on_hand:
+        return 0
+    # The row is locked, so the stock read above is still what is on hand
+    row.update(stock=F("stock") - on_hand)
+    return on_hand
+
+
+def reserve(items, ttl=None):
+    """Hold stock for ``items``, a list of ``(product_or_variant, quantity)``
+
+    Either every item is reserved or none is (InsufficientStock).
+    """
+    ttl = ttl or getattr(settings, "STOCK_RESERVATION_TTL", DEFAULT_TTL)
+    lines = _normalize(items)
+
+    with transaction.atomic():
+        reservation = StockReservation.objects.create(
+            expires_at=timezone.now() + ttl
+        )
+        reserved = []
+        for (kind, pk), quantity, item in lines:
+            model = ProductVariant if kind else Product
+            deducted = _take(model, item, quantity)
+            reserved.append(
+                StockReservationItem(
+                    reservation=reservation,
+                    product_id=None if kind else pk,
+                    variant_id=pk if kind else None,
+                    quantity=quantity,
+                    deducted=deducted,
+                )
+            )
+        StockReservationItem.objects.bulk_create(reserved)
+        refresh_variant_matrix_for_variants(
+            pk for (kind, pk), _, _ in lines if kind
+        )
+        # Stock is changed with queryset updates, which send no signals
+        products_written(pk for (kind, pk), _, _ in lines if not kind)
+        transaction.on_commit(partial(invalidate_models, Product, ProductVariant))
+    return reservation
+
+
+def commit(reservation):
+    """Turn a live hold into a sale; stock was already deducted"""
+    committed = StockReservation.objects.filter(
+        pk=reservation.pk,
+        status=StockReservation.HELD,
+        expires_at__gt=timezone.now(),
+    ).update(status=StockReservation.COMMITTED)
+    if not committed:
+        raise ReservationError(f"Reservation {reservation.pk} is no longer held")
+    reservation.status = StockReservation.COMMITTED
+    return reservation
+
+
+def _restock(reservation_ids):
+    """Return deducted stock for the given reservations in bulk"""
+    rows = (
+        StockReservationItem.objects.filter(
+            reservation_id__in=reservation_ids, deducted__gt=0
+        )
+        .values_list("product_id", "variant_id")
+        .annotate(total=Sum("deducted"))
+        .order_by("product_id", "variant_id")
+    )
+    totals = {Product: {}, ProductVariant: {}}
+    for product_id, variant_id, total in rows:
+        if variant_id:
+            totals[ProductVariant][variant_id] = total
+        else:
+            totals[Product][product_id] = total
+
+    for model in (Product, ProductVariant):
+        by_pk = totals[model]
+        if by_pk:
+            model.objects.filter(pk__in=by_pk).update(
+                stock=F("stock")
+                + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in sorted(by_pk.items())],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+    refresh_variant_matrix_for_variants(totals[ProductVariant])
+    products_written(totals[Product])
+    transaction.on_commit(partial(invalidate_models, Product, ProductVariant))
+
+
+def release(reservation):
+    """Cancel a held reservation and return its stock"""
+    with transaction.atomic():
+        released = StockReservation.objects.filter(
+            pk=reservation.pk, status=StockReservation.HELD
+        ).update(status=StockReservation.RELEASED)
+        if not released:
+            raise ReservationError(f"Reservation {reservation.pk} is no longer held")
+        _restock([reservation.pk])
+    reservation.status = StockReservation.RELEASED
+    return reservation
+
+
+def release_expired(now=None, batch_size=500):
+    """Expire lapsed holds in batches and return their stock
+
+    Returns the number of reservations reclaimed. Each hold is claimed
+    with a conditional status update, so a reservation released or
+    committed concurrently is never restocked twice.
+    """
+    now = now or timezone.now()
+    reclaimed = 0
+    while True:
+        with transaction.atomic():
+            candidates = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(status=StockReservation.HELD, expires_at__lte=now)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not candidates:
+                return reclaimed
+            claimed = [
+                pk
+                for pk in candidates
+                if StockReservation.objects.filter(
+                    pk=pk, status=StockReservation.HELD
+                ).update(status=StockReservation.EXPIRED)
+            ]
+            _restock(claimed)
+        reclaimed += len(claimed)
@@ -0,0 +1,42 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from products.images import srcset as build_srcset
+
+register = template.Library()
+
+
+@register.filter
+def srcset(field_file, fmt="webp"):
+    """``<img srcset="{{ product.featured_image|srcset }}">``"""
+    return build_srcset(field_file, fmt)
+
+
+@register.simple_tag
+def picture(field_file, alt="", sizes="100vw", css_class=""):
+    """A ``<picture>`` with AVIF/WebP sources and a JPEG fallback
+
+    Falls back to the original upload until derivatives are ready.
+    """
+    if not field_file:
+        return ""
+    sources = [
+        (f"image/{fmt}", value)
+        for fmt in ("avif", "webp")
+        if (value := build_srcset(field_file, fmt))
+    ]
+    fallback = build_srcset(field_file, "jpeg")
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" '
+        'loading="lazy" decoding="async"></picture>',
+        format_html_join(
+            "",
+            '<source type="{}" srcset="{}" sizes="{}">',
+            ((mime, value, sizes) for mime, value in sources),
+        ),
+        field_file.url,
+        fallback,
+        sizes,
+        alt,
+        css_class,
+    )
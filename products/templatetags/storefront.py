@@ -0,0 +1,13 @@
+from django import template
+from django.urls import NoReverseMatch
+
+register = template.Library()
+
+
+@register.filter
+def absolute_url(obj):
+    """``obj.get_absolute_url()``, or "" while its page route is not mounted"""
+    try:
+        return obj.get_absolute_url()
+    except NoReverseMatch:
+        return ""
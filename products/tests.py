@@ -1,3 +1,1293 @@
-from django.test import TestCase
+import gzip
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import resolve, reverse, reverse_lazy
+from django.utils import timezone
+from PIL import Image as PILImage
+from wagtail.models import Page, Site
+
+from babygoods.perf import RequestProfileMiddleware
+from babygoods.startup import StartupTimer, warm_up
+from babygoods.routers import PrimaryReplicaMiddleware, PrimaryReplicaRouter
+from catalog.models import ProductDetailPage
+from catalog.page_cache import SURROGATE_KEY_HEADER, SurrogateKeyCacheMiddleware
+
+from . import facets, homepage, low_stock
+from .cache import GENERATION_KEY, cached_queryset
+from .exporter import export_catalog, iter_items
+from .facets import FACETS, PRICE_BANDS, FacetIndex, get_facet_index
+from .homepage import home_version
+from .images import hash_sources, manifest_for, register_image
+from .importer import CatalogImporter, read_rows
+from .models import (
+    AgeGroup,
+    Category,
+    ImageSource,
+    LowStockAlert,
+    Product,
+    ProductReview,
+    ProductVariant,
+    SafetyCertification,
+    StockReservation,
+)
+from .reviews import rebuild_review_aggregates
+from .safety import invalidate_required_certifications
+from .search import FTS_TABLE, search_condition, search_products
+from .seed import CatalogNotEmpty, CatalogSeeder
+from .stock import (
+    InsufficientStock,
+    ReservationError,
+    commit,
+    release,
+    release_expired,
+    reserve,
+)
+from .variants import deferred_matrix_refresh
+
+
+def make_product(sku, **kwargs):
+    category, _ = Category.objects.get_or_create(name="Nursery")
+    defaults = {
+        "name": sku,
+        "slug": sku,
+        "description": "",
+        "short_description": "",
+        "price": 10,
+        "materials": "",
+        "category": category,
+    }
+    defaults.update(kwargs)
+    return Product.objects.create(sku=sku, **defaults)
+
+
+class SafetyStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_required_certifications()
+        astm, cpsc, gots = (
+            SafetyCertification.objects.create(
+                name=name, abbreviation=name, is_required=required
+            )
+            for name, required in (("ASTM", True), ("CPSC", True), ("GOTS", False))
+        )
+        make_product("certified").safety_certifications.set([astm, cpsc, gots])
+        make_product("partial").safety_certifications.set([astm, gots])
+        make_product("bare")
+
+    def statuses(self):
+        products = Product.objects.with_safety_status()
+        for product in Product.objects.prefetch_related("safety_certifications"):
+            # The SQL annotation agrees with the per-object check
+            self.assertEqual(
+                products.get(pk=product.pk).safety_status,
+                product.get_safety_status(),
+            )
+        return dict(products.values_list("sku", "safety_status"))
+
+    def test_missing_required_certifications(self):
+        self.assertEqual(
+            self.statuses(),
+            {"certified": "complete", "partial": "incomplete", "bare": "incomplete"},
+        )
+        held = dict(
+            Product.objects.with_safety_status().values_list("sku", "safety_certs_held")
+        )
+        self.assertEqual(held, {"certified": 2, "partial": 1, "bare": 0})
+
+    def test_nothing_required(self):
+        SafetyCertification.objects.update(is_required=False)
+        invalidate_required_certifications()
+        self.assertEqual(
+            self.statuses(),
+            {"certified": "complete", "partial": "complete", "bare": "complete"},
+        )
+
+    def test_admin_filter(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pw")
+        )
+        url = reverse("admin:products_product_changelist")
+        for value, expected in (
+            ("complete", {"certified"}),
+            ("incomplete", {"partial", "bare"}),
+            ("", {"certified", "partial", "bare"}),
+        ):
+            with self.subTest(value=value):
+                params = {"safety_status": value} if value else {}
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                rows = response.context["cl"].result_list
+                self.assertEqual({product.sku for product in rows}, expected)
+
+
+class ExplainQueriesCommandTests(TestCase):
+    def setUp(self):
+        make_product("cot")
+
+    def test_prints_a_plan_per_access_path(self):
+        out = io.StringIO()
+        call_command("explain_queries", repeat=1, stdout=out)
+        self.assertIn("category listing", out.getvalue())
+        self.assertIn("best of 1:", out.getvalue())
+
+    def test_analyze_is_rejected_outside_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("EXPLAIN ANALYZE is supported")
+        with self.assertRaisesMessage(CommandError, "--analyze needs PostgreSQL"):
+            call_command("explain_queries", analyze=True, stdout=io.StringIO())
+
+
+class ReviewAggregateTests(TestCase):
+    def setUp(self):
+        self.cot = make_product("cot")
+        self.bib = make_product("bib")
+        self.users = [User.objects.create(username=f"parent{n}") for n in range(3)]
+
+    def review(self, user, rating, product=None, approved=True):
+        return ProductReview.objects.create(
+            product=product or self.cot,
+            user=user,
+            rating=rating,
+            title="",
+            content="",
+            is_approved=approved,
+        )
+
+    def stats(self, product):
+        product.refresh_from_db()
+        return product.rating_count, product.rating_avg, product.rating_histogram
+
+    def test_only_approved_reviews_count(self):
+        self.review(self.users[0], 5)
+        pending = self.review(self.users[1], 2, approved=False)
+        self.assertEqual(self.stats(self.cot), (1, Decimal("5.00"), [0, 0, 0, 0, 1]))
+
+        pending.is_approved = True
+        pending.save()
+        self.assertEqual(self.stats(self.cot), (2, Decimal("3.50"), [0, 1, 0, 0, 1]))
+
+        pending.delete()
+        self.assertEqual(self.stats(self.cot), (1, Decimal("5.00"), [0, 0, 0, 0, 1]))
+
+    def test_moving_a_review_refreshes_both_products(self):
+        review = self.review(self.users[0], 4)
+        review.product = self.bib
+        review.save()
+        self.assertEqual(self.stats(self.cot), (0, None, [0, 0, 0, 0, 0]))
+        self.assertEqual(self.stats(self.bib), (1, Decimal("4.00"), [0, 0, 0, 1, 0]))
+
+    def test_admin_moderation_actions(self):
+        for user, rating in zip(self.users, (1, 3, 5)):
+            self.review(user, rating, approved=False)
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        url = reverse("admin:products_productreview_changelist")
+        ids = list(ProductReview.objects.values_list("pk", flat=True))
+
+        self.client.post(url, {"action": "approve_reviews", "_selected_action": ids})
+        self.assertEqual(self.stats(self.cot), (3, Decimal("3.00"), [1, 0, 1, 0, 1]))
+
+        self.client.post(url, {"action": "reject_reviews", "_selected_action": ids[:1]})
+        self.assertEqual(self.stats(self.cot)[0], 2)
+
+    def test_rebuild_matches_refresh(self):
+        self.review(self.users[0], 2)
+        self.review(self.users[1], 5, product=self.bib)
+        Product.objects.update(rating_count=0, rating_avg=None)
+        self.assertEqual(rebuild_review_aggregates(), 2)
+        self.assertEqual(self.stats(self.cot), (1, Decimal("2.00"), [0, 1, 0, 0, 0]))
+
+
+class CategoryTreeTests(TestCase):
+    def test_reparent_rewrites_the_subtree(self):
+        gear = Category.objects.create(name="Gear")
+        feeding = Category.objects.create(name="Feeding")
+        chairs = Category.objects.create(name="Chairs", parent=gear)
+        boosters = Category.objects.create(name="Boosters", parent=chairs)
+
+        chairs.parent = feeding
+        chairs.save()
+
+        boosters.refresh_from_db()
+        self.assertEqual(boosters.path, f"{feeding.pk}/{chairs.pk}/{boosters.pk}/")
+        self.assertEqual(boosters.depth, 2)
+        self.assertEqual(
+            [crumb["slug"] for crumb in boosters.breadcrumb],
+            ["feeding", "chairs", "boosters"],
+        )
+        self.assertFalse(gear.descendants().exists())
+        self.assertEqual(
+            set(feeding.descendants().values_list("name", flat=True)),
+            {"Chairs", "Boosters"},
+        )
+
+    def test_rename_updates_descendant_breadcrumbs(self):
+        gear = Category.objects.create(name="Gear")
+        strollers = Category.objects.create(name="Strollers", parent=gear)
+
+        gear.name = "Travel Gear"
+        gear.save()
+
+        strollers.refresh_from_db()
+        self.assertEqual(strollers.breadcrumb[0]["name"], "Travel Gear")
+
+    def test_cannot_move_below_itself(self):
+        gear = Category.objects.create(name="Gear")
+        chairs = Category.objects.create(name="Chairs", parent=gear)
+
+        for parent in (gear, chairs):
+            gear.parent = parent
+            with self.assertRaises(ValidationError):
+                gear.clean()
+            with self.assertRaises(ValidationError):
+                gear.save()
+        gear.refresh_from_db()
+        self.assertIsNone(gear.parent_id)
+
+    def test_categories_without_a_path(self):
+        gear = Category.objects.create(name="Gear")
+        (prams,) = Category.objects.bulk_create(
+            [Category(name="Prams", slug="prams", parent=gear)]
+        )
+        (twins,) = Category.objects.bulk_create(
+            [Category(name="Twins", slug="twins", parent=prams)]
+        )
+        make_product("cot")
+        make_product("pram", category=prams)
+        make_product("double", category=twins)
+
+        self.assertEqual(
+            set(
+                Product.objects.in_category_tree(prams).values_list("sku", flat=True)
+            ),
+            {"pram", "double"},
+        )
+        self.assertEqual(list(prams.descendants()), [twins])
+        self.assertEqual(twins.ancestor_ids(), [gear.pk, prams.pk, twins.pk])
+
+        gear.parent = twins
+        with self.assertRaises(ValidationError):
+            gear.save()
+
+
+class ProductListApiTests(TestCase):
+    url = reverse_lazy("products:api_product_list")
+
+    def setUp(self):
+        # Two products share a timestamp so the id tiebreak is exercised
+        start = timezone.now() - timedelta(days=1)
+        for n, offset in enumerate([0, 1, 1, 2, 3]):
+            product = make_product(f"sku-{n}")
+            Product.objects.filter(pk=product.pk).update(
+                created_at=start - timedelta(minutes=offset)
+            )
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.client.get(self.url, {"fields": "sku", "limit": 2}).json()
+        make_product("sku-new")
+        second = self.client.get(first["next"]).json()
+        third = self.client.get(second["next"]).json()
+
+        pages = (first, second, third)
+        skus = [row["sku"] for page in pages for row in page["results"]]
+        self.assertEqual(skus, ["sku-0", "sku-2", "sku-1", "sku-3", "sku-4"])
+        self.assertIsNone(third["next"])
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({"cursor": "not-a-cursor"}, {"fields": "sku,secret"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+
+
+class VariantMatrixTests(TestCase):
+    def setUp(self):
+        self.product = make_product("bib", price=8)
+        ProductVariant.objects.create(
+            product=self.product, name="Red", sku="bib-red", color="Red", stock=1
+        )
+
+    def stored_matrix(self):
+        return Product.objects.get(pk=self.product.pk).variant_matrix
+
+    def test_refreshed_only_when_its_inputs_change(self):
+        Product.objects.filter(pk=self.product.pk).update(variant_matrix={})
+        product = Product.objects.get(pk=self.product.pk)
+
+        product.name = "Bib"
+        product.save()
+        self.assertEqual(self.stored_matrix(), {})
+
+        product.price = 9
+        product.save()
+        self.assertEqual(self.stored_matrix()["min_price"], "9.00")
+
+    def test_deferred_refresh_runs_once_on_exit(self):
+        with deferred_matrix_refresh():
+            for color in ("Blue", "Green"):
+                ProductVariant.objects.create(
+                    product=self.product, name=color, sku=f"bib-{color}", color=color
+                )
+            self.assertEqual(self.stored_matrix()["colors"], ["Red"])
+        self.assertEqual(self.stored_matrix()["colors"], ["Red", "Blue", "Green"])
+
+    def test_api_variants_read_the_matrix(self):
+        url = reverse_lazy("products:api_product_list")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "sku,variants"})
+        (variant,) = response.json()["results"][0]["variants"]
+        self.assertEqual(
+            variant,
+            {
+                "id": self.product.variants.get().pk,
+                "size": "",
+                "color": "Red",
+                "price": "8.00",
+                "in_stock": True,
+            },
+        )
+
+
+class ProductDetailApiTests(TestCase):
+    def test_detail_and_unknown_product(self):
+        product = make_product("cot")
+        related = make_product("cot-sheet")
+        ProductVariant.objects.create(
+            product=product, name="Oak", sku="cot-oak", color="Oak", stock=1
+        )
+
+        url = reverse("products:api_product_detail", args=[product.slug])
+        data = self.client.get(url).json()
+        self.assertEqual([v["color"] for v in data["variants"]], ["Oak"])
+        self.assertEqual([p["id"] for p in data["related"]], [related.pk])
+        self.assertIsNone(data["page"])
+
+        url = reverse("products:api_product_detail", args=["missing"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+class StockReservationTests(TestCase):
+    def test_reserve_commit_and_release(self):
+        product = make_product("crib", stock=5)
+        variant = ProductVariant.objects.create(
+            product=product, name="Blue", sku="crib-blue", stock=2
+        )
+
+        held = reserve([(product, 3), (variant, 2)])
+        product.refresh_from_db()
+        variant.refresh_from_db()
+        self.assertEqual((product.stock, variant.stock), (2, 0))
+
+        commit(held)
+        with self.assertRaises(ReservationError):
+            release(held)
+
+        other = reserve([(product, 2)])
+        release(other)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 2)
+
+    def test_insufficient_stock_rolls_back_every_item(self):
+        product = make_product("stroller", stock=5)
+        scarce = make_product("car-seat", stock=1)
+
+        with self.assertRaises(InsufficientStock):
+            reserve([(product, 2), (scarce, 2)])
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sold_out_variant_raises_insufficient_stock(self):
+        product = make_product("swing", stock=5)
+        variant = ProductVariant.objects.create(
+            product=product, name="Grey", sku="swing-grey", stock=0
+        )
+
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve([(product, 1), (variant, 1)])
+        self.assertIs(raised.exception.item, variant)
+        self.assertIn(f"products.ProductVariant {variant.pk}", str(raised.exception))
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 5)
+
+    def test_untracked_items_leave_stock_alone(self):
+        untracked = make_product("bib", stock=2, track_inventory=False)
+
+        reserve([(untracked, 4)])
+        untracked.refresh_from_db()
+        self.assertEqual(untracked.stock, 2)
+
+    def test_backorder_takes_what_is_on_hand(self):
+        backorder = make_product("bouncer", stock=1, allow_backorder=True)
+
+        held = reserve([(backorder, 3)])
+        backorder.refresh_from_db()
+        self.assertEqual(backorder.stock, 0)
+        self.assertEqual(list(held.items.values_list("quantity", "deducted")), [(3, 1)])
+
+        release(held)
+        backorder.refresh_from_db()
+        self.assertEqual(backorder.stock, 1)
+
+    def test_inactive_items_cannot_be_reserved(self):
+        product = make_product("rocker", stock=5)
+        variant = ProductVariant.objects.create(
+            product=product, name="Oak", sku="rocker-oak", stock=5, is_active=False
+        )
+        for item in (variant, make_product("old", stock=5, is_active=False)):
+            with self.subTest(item=item), self.assertRaises(InsufficientStock):
+                reserve([(item, 1)])
+        variant.refresh_from_db()
+        self.assertEqual(variant.stock, 5)
+
+    def test_matrix_refresh_reads_stock_when_it_runs(self):
+        product = make_product("crib", stock=0)
+        variant = ProductVariant.objects.create(
+            product=product, name="Blue", sku="crib-blue", stock=2
+        )
+        with self.captureOnCommitCallbacks() as first:
+            reserve([(variant, 1)])
+        with self.captureOnCommitCallbacks() as second:
+            reserve([(variant, 1)])
+
+        # The earlier refresh runs last, yet must not restore stale stock
+        for callback in second + first:
+            callback()
+        product.refresh_from_db()
+        self.assertFalse(product.variant_matrix["in_stock"])
+
+    def test_sweeper_returns_expired_holds_once(self):
+        product = make_product("monitor", stock=4)
+        expired = reserve([(product, 3)], ttl=timedelta(seconds=-1))
+        live = reserve([(product, 1)])
+
+        self.assertEqual(release_expired(), 1)
+        self.assertEqual(release_expired(), 0)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 3)
+        with self.assertRaises(ReservationError):
+            commit(expired)
+        commit(live)
+
+
+class StockReservationStressTests(TransactionTestCase):
+    THREADS = 8
+    MAX_ATTEMPTS = 500
+
+    def test_concurrent_reservations_never_oversell(self):
+        product = make_product("high-chair", stock=50)
+        variant = ProductVariant.objects.create(
+            product=product, name="Oak", sku="high-chair-oak", stock=30
+        )
+        successes = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                # Keep buying until sold out; lock timeouts are simply retried
+                for _ in range(self.MAX_ATTEMPTS):
+                    try:
+                        reserve([(variant, 1), (product, 1)])
+                    except InsufficientStock:
+                        return
+                    except OperationalError:
+                        continue
+                    with lock:
+                        successes.append(1)
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        product.refresh_from_db()
+        variant.refresh_from_db()
+        self.assertEqual(len(successes), 30)
+        self.assertEqual(variant.stock, 0)
+        self.assertEqual(product.stock, 20)
+        self.assertEqual(StockReservation.objects.count(), 30)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.onesie = make_product("onesie", name="Organic Cotton Onesie")
+        self.stroller = make_product(
+            "stroller", name="City Stroller", materials="Aluminium frame"
+        )
+
+    def search(self, query):
+        queryset = Product.objects.all()
+        found = set(search_products(queryset, query).values_list("sku", flat=True))
+        condition = search_condition(queryset, query)
+        self.assertEqual(
+            set(queryset.filter(condition).values_list("sku", flat=True)), found
+        )
+        return found
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search("org cott"), {"onesie"})
+        self.assertEqual(self.search("alumin"), {"stroller"})
+        self.assertEqual(self.search("org stroll"), set())
+
+    def test_stemming(self):
+        self.assertEqual(self.search("strollers"), {"stroller"})
+        self.assertEqual(self.search("onesies"), {"onesie"})
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in (
+            '"cotton" OR "stroller"',
+            "cotton OR stroller*",
+            "NEAR(cotton stroller)",
+            "name:cotton -onesie",
+            '"',
+            "^org",
+        ):
+            with self.subTest(query=query):
+                self.assertNotIn("stroller", self.search(query))
+        self.assertEqual(self.search('^org" cott*'), {"onesie"})
+        self.assertEqual(self.search("* ( ) :"), set())
+
+    def test_index_follows_writes(self):
+        cot = make_product("cot", name="Travel Cot")
+        self.assertEqual(self.search("travel"), {"cot"})
+
+        cot.name = "Bedside Crib"
+        cot.save()
+        self.assertEqual(self.search("travel"), set())
+        self.assertEqual(self.search("bedside"), {"cot"})
+
+        Product.objects.filter(pk=cot.pk).update(description="Rocks gently")
+        self.assertEqual(self.search("rocking"), {"cot"})
+
+        cot.delete()
+        self.assertEqual(self.search("bedside"), set())
+
+    def test_post_migrate_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {FTS_TABLE}_ai")
+        make_product("cot", name="Travel Cot")
+        self.assertEqual(self.search("travel"), set())
+
+        emit_post_migrate_signal(0, False, connection.alias)
+        self.assertEqual(self.search("travel"), {"cot"})
+        make_product("crib", name="Travel Crib")
+        self.assertEqual(self.search("travel"), {"cot", "crib"})
+
+
+def orm_facet_counts(products):
+    """Facet counts for ``products`` computed with plain ORM aggregates"""
+    counts = {
+        field: dict(products.order_by().values_list(field).annotate(n=Count("id")))
+        for field in ("gender", "condition")
+    }
+    m2m = (("age_group", AgeGroup), ("certification", SafetyCertification))
+    for facet, model in m2m:
+        counts[facet] = dict(
+            model.objects.annotate(n=Count("products", filter=Q(products__in=products)))
+            .filter(n__gt=0)
+            .values_list("pk", "n")
+        )
+    counts["price_band"] = {}
+    for label, low, high in PRICE_BANDS:
+        band = products.filter(price__gte=low)
+        if high is not None:
+            band = band.filter(price__lt=high)
+        if n := band.count():
+            counts["price_band"][label] = n
+    counts["category"] = {}
+    for category in Category.objects.all():
+        # Walk the parent links so the expectation does not rely on ``path``
+        subtree = frontier = {category.pk}
+        while frontier := set(
+            Category.objects.filter(parent__in=frontier).values_list("pk", flat=True)
+        ):
+            subtree = subtree | frontier
+        if n := products.filter(category__in=subtree).count():
+            counts["category"][category.pk] = n
+    return counts
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        self.nursery = Category.objects.create(name="Nursery")
+        self.cots = Category.objects.create(name="Cots", parent=self.nursery)
+        self.feeding = Category.objects.create(name="Feeding")
+        newborn = AgeGroup.objects.create(name="Newborn", min_months=0, max_months=3)
+        toddler = AgeGroup.objects.create(name="Toddler", min_months=12, max_months=36)
+        astm = SafetyCertification.objects.create(name="ASTM", abbreviation="ASTM")
+
+        self.cot = make_product("cot", price=180, category=self.cots, gender="U")
+        self.cot.age_groups.set([newborn, toddler])
+        self.cot.safety_certifications.set([astm])
+        self.bottle = make_product("bottle", price=12, category=self.feeding)
+        self.bottle.age_groups.set([newborn])
+        self.bib = make_product("bib", price=8, category=self.feeding, gender="F")
+        make_product("old", price=40, category=self.cots, is_active=False)
+
+    def assertMatchesOrm(self):
+        counts = FacetIndex.build().query({}).counts
+        active = Product.objects.filter(is_active=True)
+        self.assertEqual(counts, orm_facet_counts(active))
+
+    def test_counts_match_orm(self):
+        self.assertMatchesOrm()
+
+        result = FacetIndex.build().query({"gender": ["F"], "price_band": ["under-25"]})
+        matching = Product.objects.filter(is_active=True, gender="F", price__lt=25)
+        self.assertEqual(result.product_ids, [self.bib.pk])
+        expected = orm_facet_counts(matching)
+        for facet in FACETS:
+            if facet not in ("gender", "price_band"):
+                self.assertEqual(result.counts[facet], expected[facet], facet)
+
+    def test_counts_follow_product_and_category_changes(self):
+        self.bottle.category = self.cots
+        self.bottle.price = 60
+        self.bottle.save()
+        self.assertMatchesOrm()
+
+        self.feeding.parent = self.cots
+        self.feeding.save()
+        self.assertMatchesOrm()
+
+        self.cots.delete()
+        self.assertMatchesOrm()
+
+    def test_categories_without_a_path_are_counted(self):
+        (bulk,) = Category.objects.bulk_create(
+            [Category(name="Bulk", slug="bulk", parent=self.cots)]
+        )
+        self.assertEqual(bulk.path, "")
+        make_product("bulk-cot", price=90, category=bulk)
+
+        self.assertMatchesOrm()
+        counts = FacetIndex.build().query({}).counts["category"]
+        self.assertEqual(counts[bulk.pk], 1)
+        self.assertEqual(counts[self.nursery.pk], 2)
+
+
+@override_settings(PRODUCT_FACET_REFRESH_SECONDS=0)
+class FacetIndexRefreshTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(facets, "_memo", (None, 0.0, None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rebuilt_in_the_background_after_a_change(self):
+        cot = make_product("cot", price=180)
+        index = get_facet_index()
+        self.assertEqual(index.query({}).total, 1)
+
+        cot.price = 20
+        cot.save()
+        make_product("bib", price=8, gender="F")
+        # The previous index is served while a thread builds the next one
+        self.assertIs(get_facet_index(), index)
+        for thread in threading.enumerate():
+            if thread.name == "facet-index":
+                thread.join()
+
+        rebuilt = get_facet_index()
+        self.assertIsNot(rebuilt, index)
+        active = Product.objects.filter(is_active=True)
+        self.assertEqual(rebuilt.query({}).counts, orm_facet_counts(active))
+        self.assertIs(get_facet_index(), rebuilt)
+
+
+class CatalogImporterTests(TestCase):
+    HEADER = "sku,name,price,category,parent_sku,stock,age_groups\n"
+
+    def setUp(self):
+        Category.objects.create(name="Nursery")
+        AgeGroup.objects.create(name="Newborn", min_months=0, max_months=2)
+
+    def run_import(self, body, fmt="csv"):
+        errors = []
+        importer = CatalogImporter(
+            batch_size=2, on_error=lambda *error: errors.append(error)
+        )
+        stats = importer.run(read_rows(io.StringIO(body), fmt))
+        return stats, errors
+
+    def test_bad_rows_are_reported_with_line_numbers(self):
+        stats, errors = self.run_import(
+            self.HEADER
+            + "crib,Crib,199,Nursery,,3,Newborn\n"
+            + "mobile,Mobile,abc,Nursery,,1,\n"
+            + "crib-oak,Oak,,,crib,2,\n"
+            + "lamp,Lamp,20,Lighting,,1,\n"
+            + "crib-ash,Ash,,,cradle,2,\n"
+        )
+
+        self.assertEqual([line for line, _ in errors], [3, 5, 6])
+        self.assertIn("price is not a number", errors[0][1])
+        self.assertIn("Unknown category", errors[1][1])
+        self.assertIn("Unknown parent_sku", errors[2][1])
+        self.assertEqual((stats.products, stats.variants, stats.errors), (1, 1, 3))
+        crib = Product.objects.get(sku="crib")
+        self.assertEqual([a.name for a in crib.age_groups.all()], ["Newborn"])
+        self.assertEqual([v.sku for v in crib.variants.all()], ["crib-oak"])
+
+    def test_reimport_updates_by_sku(self):
+        self.run_import(self.HEADER + "crib,Crib,199,Nursery,,3,Newborn\n")
+        stats, errors = self.run_import(
+            '{"sku": "crib", "name": "Crib", "price": "149", "category": "Nursery"}\n'
+            "{not json}\n",
+            fmt="jsonl",
+        )
+
+        self.assertEqual([line for line, _ in errors], [2])
+        crib = Product.objects.get(sku="crib")
+        self.assertEqual((crib.price, crib.stock), (149, 0))
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_links_are_replaced_only_when_their_column_is_present(self):
+        self.run_import(self.HEADER + "crib,Crib,199,Nursery,,3,Newborn\n")
+        crib = Product.objects.get(sku="crib")
+        crib.safety_certifications.add(
+            SafetyCertification.objects.create(name="ASTM", abbreviation="ASTM")
+        )
+
+        self.run_import("sku,name,price,category\ncrib,Crib,149,Nursery\n")
+        self.assertEqual(crib.age_groups.count(), 1)
+        self.assertEqual(crib.safety_certifications.count(), 1)
+
+        self.run_import(self.HEADER + "crib,Crib,149,Nursery,,3,\n")
+        self.assertFalse(crib.age_groups.exists())
+        self.assertEqual(crib.safety_certifications.count(), 1)
+
+    def test_variant_low_stock_threshold(self):
+        self.run_import(
+            "sku,name,price,category,parent_sku,low_stock_threshold\n"
+            "crib,Crib,199,Nursery,,\n"
+            "crib-oak,Oak,,,crib,4\n"
+            "crib-ash,Ash,,,crib,\n"
+        )
+        thresholds = dict(
+            ProductVariant.objects.values_list("sku", "low_stock_threshold")
+        )
+        self.assertEqual(thresholds, {"crib-oak": 4, "crib-ash": 10})
+
+
+class CatalogExportTests(TestCase):
+    base_url = "https://shop.example/"
+
+    def items(self):
+        return {item["id"]: item for item in iter_items(self.base_url, chunk_size=1)}
+
+    def test_links_resolve(self):
+        with_page = make_product("cot")
+        without_page = make_product("bib")
+        page = ProductDetailPage(title="Cot", slug="cot", product=with_page)
+        Site.objects.get(is_default_site=True).root_page.add_child(instance=page)
+
+        items = self.items()
+        for product in (with_page, without_page):
+            link = items[product.sku]["link"]
+            self.assertTrue(link.startswith(self.base_url), link)
+            match = resolve(link.removeprefix(self.base_url.rstrip("/")))
+            if product is with_page:
+                self.assertEqual(match.url_name, "wagtail_serve")
+                self.assertEqual(link, self.base_url + "cot/")
+            else:
+                self.assertEqual(match.url_name, "api_product_detail")
+                self.assertEqual(match.kwargs, {"slug": "bib"})
+
+    def test_variants_on_sale(self):
+        product = make_product("cot", price=80, compare_at_price=100)
+        for sku, price in (("cot-oak", None), ("cot-ash", 90), ("cot-elm", 120)):
+            ProductVariant.objects.create(
+                product=product, name=sku, sku=sku, price=price
+            )
+
+        items = self.items()
+        prices = {sku: (items[sku]["price"], items[sku]["sale_price"]) for sku in items}
+        self.assertEqual(
+            prices,
+            {
+                "cot-oak": ("100.00", "80.00"),
+                "cot-ash": ("100.00", "90.00"),
+                "cot-elm": ("120.00", ""),
+            },
+        )
+
+    @override_settings(MERCHANT_FEED_CURRENCY="EUR")
+    def test_feed_currency_comes_from_settings(self):
+        make_product("cot", price=80)
+        feed = b"".join(export_catalog("xml", self.base_url)).decode()
+        self.assertIn("<g:price>80.00 EUR</g:price>", feed)
+        self.assertNotIn("USD", feed)
+
+
+@mock.patch("babygoods.routers.replica_aliases", lambda: ["replica_1"])
+class PrimaryReplicaRoutingTests(SimpleTestCase):
+    def route(self, request, write=False):
+        """Where the request's reads go before and after an optional write"""
+        router = PrimaryReplicaRouter()
+
+        def view(request):
+            before = router.db_for_read(Product)
+            if write:
+                self.assertEqual(router.db_for_write(Product), "default")
+            return before, router.db_for_read(Product)
+
+        return PrimaryReplicaMiddleware(view)(request)
+
+    def test_reads_follow_a_write_to_the_primary(self):
+        request = RequestFactory().get("/shop/")
+        self.assertEqual(self.route(request), ("replica_1", "replica_1"))
+        self.assertEqual(self.route(request, write=True), ("replica_1", "default"))
+
+    def test_unsafe_methods_and_editor_paths_use_the_primary(self):
+        factory = RequestFactory()
+        for request in (factory.post("/shop/"), factory.get("/admin/")):
+            self.assertEqual(self.route(request), ("default", "default"))
+
+    def test_outside_a_request_everything_uses_the_primary(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Product), "default")
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        cache.clear()
+
+    def store_image(self, name, size=(40, 30), color="red"):
+        buffer = io.BytesIO()
+        PILImage.new("RGB", size, color).save(buffer, format="PNG")
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def save(self, instance, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save(**kwargs)
+
+    def test_registered_only_when_the_name_changes(self):
+        product = Product.objects.get(pk=make_product("cot").pk)
+        with mock.patch("products.signals.register_image") as register:
+            self.save(product)
+            register.assert_not_called()
+
+            product.featured_image = "products/featured/cot.jpg"
+            self.save(product)
+            self.save(product)
+            product.featured_image = "products/featured/cot-2.jpg"
+            self.save(product, update_fields=["name"])
+        register.assert_called_once_with("products/featured/cot.jpg")
+
+    def test_registration_does_not_read_the_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product("cot", featured_image="products/featured/missing.jpg")
+        source = ImageSource.objects.get()
+        self.assertEqual(source.name, "products/featured/missing.jpg")
+        self.assertIsNone(source.manifest_id)
+        self.assertIsNone(manifest_for(source.name))
+
+    def test_hashing_shares_manifests_and_drops_missing_files(self):
+        first = self.store_image("products/gallery/a.png")
+        copy = self.store_image("products/gallery/b.png")
+        other = self.store_image("products/gallery/c.png", color="blue")
+        for name in (first, copy, other, "products/gallery/missing.png"):
+            register_image(name)
+
+        self.assertEqual(hash_sources(batch_size=2), 3)
+        manifests = dict(ImageSource.objects.values_list("name", "manifest_id"))
+        self.assertEqual(set(manifests), {first, copy, other})
+        self.assertEqual(manifests[first], manifests[copy])
+        self.assertNotEqual(manifests[first], manifests[other])
+        self.assertEqual(hash_sources(), 0)
+
+    def test_thumbnail_rejects_decompression_bombs(self):
+        name = self.store_image("products/featured/big.png", size=(100, 100))
+        url = reverse(
+            "products:thumbnail", kwargs={"width": 50, "height": 50, "name": name}
+        )
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pw")
+        )
+        with mock.patch.object(PILImage, "MAX_IMAGE_PIXELS", 1000):
+            self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class HomePageTests(TestCase):
+    url = reverse_lazy("home")
+
+    def setUp(self):
+        cache.clear()
+        self.product = make_product("cot", name="Travel Cot", is_featured=True)
+
+    def get(self, encoding="", **headers):
+        return self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding, **headers)
+
+    def test_encoding_is_negotiated(self):
+        decoders = {None: bytes, "gzip": gzip.decompress}
+        if homepage.brotli is not None:
+            decoders["br"] = homepage.brotli.decompress
+        etags = set()
+        for accept, expected in (
+            ("", None),
+            ("identity", None),
+            ("gzip, deflate", "gzip"),
+            ("br;q=1.0, gzip;q=0.8", "br" if "br" in decoders else "gzip"),
+        ):
+            with self.subTest(accept=accept):
+                response = self.get(accept)
+                self.assertEqual(response.get("Content-Encoding"), expected)
+                self.assertIn(b"Travel Cot", decoders[expected](response.content))
+                self.assertIn("Accept-Encoding", response["Vary"])
+                etags.add(response["ETag"])
+        # One ETag per representation
+        self.assertEqual(len(etags), len(decoders))
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get("gzip")["ETag"]
+        response = self.get("gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        # The gzip ETag does not validate the identity representation
+        self.assertEqual(self.get("", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_product_change_gives_a_new_etag(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Bedside Crib"
+            self.product.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "Bedside Crib")
+
+
+class LowStockScanTests(TestCase):
+    def setUp(self):
+        self.cot = make_product("cot", stock=2, low_stock_threshold=5)
+        make_product("bib", stock=50, low_stock_threshold=5)
+        # Stock is held by the variants; the product's own stock stays 0
+        self.stroller = make_product("stroller", stock=0, low_stock_threshold=5)
+        self.blue = ProductVariant.objects.create(
+            product=self.stroller,
+            name="Blue",
+            sku="stroller-blue",
+            stock=1,
+            low_stock_threshold=5,
+        )
+        ProductVariant.objects.create(
+            product=self.stroller,
+            name="Red",
+            sku="stroller-red",
+            stock=20,
+            low_stock_threshold=5,
+        )
+
+    def set_stock(self, product, stock):
+        Product.objects.filter(pk=product.pk).update(stock=stock)
+
+    def open_items(self):
+        rows = low_stock.open_alerts().values_list("product_id", "variant_id", "stock")
+        return {(product, variant): stock for product, variant, stock in rows}
+
+    def test_scan_diffs_against_open_alerts(self):
+        cot, blue = (self.cot.pk, None), (self.stroller.pk, self.blue.pk)
+        result = low_stock.scan()
+        self.assertEqual(
+            {(a.product_id, a.variant_id) for a in result.opened}, {cot, blue}
+        )
+        self.assertEqual((result.resolved, result.open_count), (0, 2))
+
+        # Nothing changed: nothing new to report
+        result = low_stock.scan()
+        self.assertEqual((result.opened, result.resolved), ([], 0))
+
+        # Still low: the open alert is kept current without a new one
+        self.set_stock(self.cot, 1)
+        self.assertEqual(low_stock.scan().opened, [])
+        self.assertEqual(self.open_items(), {cot: 1, blue: 1})
+
+        self.set_stock(self.cot, 30)
+        result = low_stock.scan()
+        self.assertEqual((result.opened, result.resolved), ([], 1))
+        self.assertEqual(self.open_items(), {blue: 1})
+
+        # Low again: a fresh alert is opened and reported
+        self.set_stock(self.cot, 0)
+        result = low_stock.scan()
+        self.assertEqual([a.product_id for a in result.opened], [self.cot.pk])
+        self.assertIn("OUT  cot", low_stock.format_digest(result))
+        self.assertEqual(LowStockAlert.objects.filter(product=self.cot).count(), 2)
+
+    def test_products_with_variants_are_judged_by_their_variants(self):
+        self.assertNotIn((self.stroller.pk, None), low_stock.low_stock_items())
+
+        self.stroller.variants.update(is_active=False)
+        self.assertIn((self.stroller.pk, None), low_stock.low_stock_items())
+
+    def test_one_open_alert_per_item(self):
+        low_stock.scan()
+        for variant in (None, self.blue):
+            with self.subTest(variant=variant), self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    LowStockAlert.objects.create(
+                        product=self.stroller if variant else self.cot,
+                        variant=variant,
+                        stock=0,
+                        threshold=5,
+                    )
+        low_stock.open_alerts().update(resolved_at=timezone.now())
+        LowStockAlert.objects.create(product=self.cot, stock=0, threshold=5)
+
+    def test_overlapping_scan_does_not_open_duplicates(self):
+        # Another scan commits an alert for the cot between our read and insert
+        bulk_update = LowStockAlert.objects.bulk_update
+
+        def overlap(*args, **kwargs):
+            LowStockAlert.objects.create(product=self.cot, stock=2, threshold=5)
+            return bulk_update(*args, **kwargs)
+
+        with mock.patch.object(LowStockAlert.objects, "bulk_update", overlap):
+            result = low_stock.scan()
+        self.assertEqual(
+            [(a.product_id, a.variant_id) for a in result.opened],
+            [(self.stroller.pk, self.blue.pk)],
+        )
+        self.assertEqual(LowStockAlert.objects.filter(product=self.cot).count(), 1)
+
+
+class StartupTests(SimpleTestCase):
+    def test_phases_are_timed_and_reported(self):
+        timer = StartupTimer()
+        with timer.phase("apps"):
+            pass
+        with self.assertRaises(ValueError), timer.phase("warmup"):
+            raise ValueError  # a failed phase is still recorded
+        timer.notes.append("warmup GET /: 200 OK")
+
+        self.assertEqual([name for name, _ in timer.phases], ["apps", "warmup"])
+        stream = io.StringIO()
+        timer.report(stream)
+        self.assertRegex(
+            stream.getvalue(),
+            r"^\[\d+\] startup \d+ ms: apps \d+ ms, warmup \d+ ms "
+            r"\(warmup GET /: 200 OK\)\n$",
+        )
+
+    @override_settings(ALLOWED_HOSTS=[".example.com", "shop.example.com"])
+    def test_warm_up_sends_one_get_and_closes_the_response(self):
+        seen = {}
+
+        class Response(list):
+            def close(self):
+                seen["closed"] = True
+
+        def application(environ, start_response):
+            seen.update(environ)
+            start_response("200 OK", [])
+            return Response([b"body"])
+
+        status = warm_up(application, "/api/products/?limit=1")
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(
+            (seen["REQUEST_METHOD"], seen["PATH_INFO"], seen["QUERY_STRING"]),
+            ("GET", "/api/products/", "limit=1"),
+        )
+        self.assertEqual(seen["HTTP_HOST"], "shop.example.com")
+        self.assertTrue(seen["closed"])
+
+
+class RequestProfileTests(SimpleTestCase):
+    def profile(self, request):
+        async def view(request):
+            return HttpResponse()
+
+        return async_to_sync(RequestProfileMiddleware(view))(request)
+
+    def test_anonymous_requests_do_not_load_the_user(self):
+        request = RequestFactory().get("/")
+        request.auser = mock.AsyncMock(return_value=AnonymousUser())
+        response = self.profile(request)
+        request.auser.assert_not_called()
+        self.assertNotIn("Server-Timing", response)
+
+    def test_staff_user_loaded_by_the_view_is_reused(self):
+        request = RequestFactory().get("/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+        request.user = User(is_staff=True)
+        request.auser = mock.AsyncMock()
+        response = self.profile(request)
+        request.auser.assert_not_called()
+        self.assertIn("Server-Timing", response)
+
+    def test_signed_in_user_is_loaded_once_when_needed(self):
+        request = RequestFactory().get("/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+        request.auser = mock.AsyncMock(return_value=User(is_staff=True))
+        response = self.profile(request)
+        request.auser.assert_awaited_once()
+        self.assertIn("Server-Timing", response)
+
+
+class CacheGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def categories(self):
+        return cached_queryset("test:categories", Category.objects.order_by("name"))
+
+    def test_save_invalidates_dependent_querysets(self):
+        Category.objects.create(name="Bath")
+        self.assertEqual([c.name for c in self.categories()], ["Bath"])
+        with self.assertNumQueries(0):
+            self.categories()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Toys")
+        self.assertEqual([c.name for c in self.categories()], ["Bath", "Toys"])
+
+    def test_evicted_counter_never_matches_old_entries(self):
+        self.categories()
+        cache.delete(GENERATION_KEY.format("products.category"))
+        with self.assertNumQueries(1):
+            self.categories()
+
+    def test_product_writes_bump_the_home_version(self):
+        version = home_version()
+        self.assertEqual(home_version(), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product("rattle")
+        self.assertNotEqual(home_version(), version)
+
+
+class PageCachePurgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def serve(self, key):
+        """Serve a page tagged ``key`` and return its X-Page-Cache result"""
+
+        def view(request):
+            response = HttpResponse("page")
+            response[SURROGATE_KEY_HEADER] = key
+            return response
+
+        middleware = SurrogateKeyCacheMiddleware(view)
+        return middleware(self.factory.get(f"/{key}/"))["X-Page-Cache"]
+
+    def assertPurgedBy(self, keys, write):
+        for key in keys:
+            self.assertEqual((self.serve(key), self.serve(key)), ("miss", "hit"))
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        for key in keys:
+            self.assertEqual(self.serve(key), "miss", key)
+
+    def test_product_save(self):
+        product = make_product("cot")
+        product.name = "Travel cot"
+        self.assertPurgedBy(
+            [f"product:{product.pk}", f"category:{product.category_id}"], product.save
+        )
+
+    def test_stock_reservation(self):
+        product = make_product("cot", stock=3)
+        variant = ProductVariant.objects.create(
+            product=product, name="White", sku="cot-white", stock=3
+        )
+        self.assertPurgedBy([f"product:{product.pk}"], lambda: reserve([(variant, 1)]))
+
+    def test_import_moving_category(self):
+        product = make_product("cot")
+        moved_from = product.category_id
+        moved_to = Category.objects.create(name="Travel").pk
+        rows = [(2, {"sku": "cot", "name": "Cot", "price": "80", "category": "Travel"})]
+        self.assertPurgedBy(
+            [f"product:{product.pk}", f"category:{moved_from}", f"category:{moved_to}"],
+            lambda: CatalogImporter().run(rows),
+        )
+
+
+class CatalogSeederTests(TestCase):
+    PRODUCTS = 120
+
+    def snapshot(self):
+        return list(
+            Product.objects.order_by("pk").values_list(
+                "sku", "price", "category__slug", "rating_count", "variant_matrix"
+            )
+        )
+
+    def test_same_seed_same_catalog(self):
+        CatalogSeeder(seed=7, batch_size=50).run(self.PRODUCTS, shoppers=40)
+        first = self.snapshot()
+        with self.assertRaises(CatalogNotEmpty):
+            CatalogSeeder(seed=7).run(1)
+
+        Page.objects.filter(slug="seeded-home").delete()
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+        AgeGroup.objects.all().delete()
+        SafetyCertification.objects.all().delete()
+        CatalogSeeder(seed=7, batch_size=50).run(self.PRODUCTS, shoppers=40)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_aggregates_match_a_rebuild(self):
+        CatalogSeeder(batch_size=50).run(self.PRODUCTS, shoppers=40)
+        seeded = list(
+            Product.objects.order_by("pk").values_list(
+                "rating_avg", "rating_count", "rating_histogram"
+            )
+        )
+        rebuild_review_aggregates()
+        rebuilt = list(
+            Product.objects.order_by("pk").values_list(
+                "rating_avg", "rating_count", "rating_histogram"
+            )
+        )
+        self.assertEqual(rebuilt, seeded)
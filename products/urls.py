@@ -0,0 +1,22 @@
+from django.urls import path
+
+from . import views
+
+app_name = "products"
+
+urlpatterns = [
+    path("products/", views.product_list_api, name="api_product_list"),
+    path("products/facets/", views.product_facets_api, name="api_product_facets"),
+    path(
+        "products/<slug:slug>/",
+        views.product_detail_api,
+        name="api_product_detail",
+    ),
+    path("cache/stats/", views.cache_stats_api, name="cache_stats"),
+    path("exports/catalog.<str:fmt>", views.catalog_export, name="catalog_export"),
+    path(
+        "thumbnails/<int:width>x<int:height>/<path:name>",
+        views.thumbnail,
+        name="thumbnail",
+    ),
+]
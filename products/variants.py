@@ -0,0 +1,211 @@
+"""Denormalized variant matrix stored on Product.
+
+``Product.variant_matrix`` summarizes the active variants so listings and
+detail pages never scan ``ProductVariant`` rows::
+
+    {
+        "sizes": ["0-3m", "3-6m"],
+        "colors": ["Blue", "Pink"],
+        "min_price": "12.00",
+        "max_price": "15.00",
+        "in_stock": true,
+        "variants": [[variant_id, size_index, color_index, "price", 1], ...]
+    }
+
+Each variant row holds indexes into ``sizes`` and ``colors`` (``null``
+when blank), its effective price and a 0/1 in-stock flag. Products
+without active variants store ``{}``. Matrices are rebuilt per affected
+product from one query over the active-variant index; inside
+``deferred_matrix_refresh()`` the refreshes are collected and run once
+on exit, so saving a product with N inline variants rebuilds it once.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .cache import invalidate_models, products_written
+from .models import Product, ProductVariant
+
+VARIANT_COLUMNS = [
+    "product_id",
+    "pk",
+    "size",
+    "color",
+    "price",
+    "stock",
+    "track_inventory",
+    "product__price",
+    "product__allow_backorder",
+]
+
+
+_deferred = ContextVar("deferred_matrix_refresh", default=None)
+
+
+def _index(values, value):
+    if not value:
+        return None
+    if value not in values:
+        values.append(value)
+    return values.index(value)
+
+
+def build_matrix(rows):
+    """Matrix for one product from its ``VARIANT_COLUMNS`` rows"""
+    if not rows:
+        return {}
+    sizes, colors, variants = [], [], []
+    prices = []
+    for _, pk, size, color, price, stock, tracked, base_price, backorder in rows:
+        price = price if price else base_price
+        in_stock = not tracked or stock > 0 or backorder
+        prices.append(price)
+        variants.append(
+            [pk, _index(sizes, size), _index(colors, color), str(price), int(in_stock)]
+        )
+    return {
+        "sizes": sizes,
+        "colors": colors,
+        "min_price": str(min(prices)),
+        "max_price": str(max(prices)),
+        "in_stock": any(row[4] for row in variants),
+        "variants": variants,
+    }
+
+
+def matrix_variants(matrix):
+    """The variants of a stored matrix as dicts, for API output"""
+    if not matrix:
+        return []
+    sizes, colors = matrix["sizes"], matrix["colors"]
+    return [
+        {
+            "id": pk,
+            "size": sizes[size] if size is not None else "",
+            "color": colors[color] if color is not None else "",
+            "price": price,
+            "in_stock": bool(in_stock),
+        }
+        for pk, size, color, price, in_stock in matrix["variants"]
+    ]
+
+
+def _variant_rows(product_ids):
+    return (
+        ProductVariant.objects.filter(product_id__in=product_ids, is_active=True)
+        .order_by("product_id", "pk")
+        .values_list(*VARIANT_COLUMNS)
+    )
+
+
+def _save_matrices(rows_by_product):
+    """Store the matrices that differ from the saved ones; returns how many"""
+    products = Product.objects.filter(pk__in=rows_by_product).only(
+        "pk", "variant_matrix"
+    )
+    changed = []
+    for product in products:
+        matrix = build_matrix(rows_by_product[product.pk])
+        if matrix != product.variant_matrix:
+            product.variant_matrix = matrix
+            changed.append(product)
+    Product.objects.bulk_update(changed, ["variant_matrix"])
+    # bulk_update sends no signals
+    products_written(product.pk for product in changed)
+    return len(changed)
+
+
+def refresh_variant_matrix(product_ids):
+    """Recompute the matrix for the given products"""
+    pending = _deferred.get()
+    if pending is not None:
+        pending.update(product_ids)
+        return 0
+    rows_by_product = {pk: [] for pk in product_ids}
+    if not rows_by_product:
+        return 0
+    for row in _variant_rows(rows_by_product):
+        rows_by_product[row[0]].append(row)
+    return _save_matrices(rows_by_product)
+
+
+@contextmanager
+def deferred_matrix_refresh():
+    """Collect matrix refreshes in the block and run them once at its end"""
+    if _deferred.get() is not None:
+        yield  # nested: the outer block refreshes
+        return
+    pending = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    refresh_variant_matrix(pending)
+
+
+def refresh_variant_matrix_for_variants(variant_ids):
+    """Refresh after commit, for stock changes made with queryset updates"""
+    variant_ids = set(variant_ids)
+    if not variant_ids:
+        return
+
+    def refresh():
+        product_ids = set(
+            ProductVariant.objects.filter(pk__in=variant_ids).values_list(
+                "product_id", flat=True
+            )
+        )
+        with transaction.atomic():
+            # Lock the products before reading stock. A reservation that
+            # commits meanwhile queues its own refresh behind this lock, so
+            # the last matrix written is built from the latest stock.
+            list(
+                Product.objects.select_for_update()
+                .filter(pk__in=product_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            refresh_variant_matrix(product_ids)
+        # Stock may change without changing the matrix
+        products_written(product_ids)
+
+    # robust: a failed refresh must not fail the stock change that committed
+    transaction.on_commit(refresh, robust=True)
+
+
+def rebuild_variant_matrices(batch_size=1000):
+    """Recompute the matrix for every product in a single pass
+
+    Returns the number of products whose matrix changed.
+    """
+    updated = 0
+    with transaction.atomic():
+        rows_by_product = {}
+        rows = ProductVariant.objects.filter(is_active=True).order_by(
+            "product_id", "pk"
+        )
+        for row in rows.values_list(*VARIANT_COLUMNS).iterator(chunk_size=batch_size):
+            if row[0] not in rows_by_product and len(rows_by_product) >= batch_size:
+                updated += _save_matrices(rows_by_product)
+                rows_by_product = {}
+            rows_by_product.setdefault(row[0], []).append(row)
+        if rows_by_product:
+            updated += _save_matrices(rows_by_product)
+        # Products whose last active variant is gone
+        stale = list(
+            Product.objects.exclude(variant_matrix={})
+            .exclude(
+                pk__in=ProductVariant.objects.filter(is_active=True).values(
+                    "product_id"
+                )
+            )
+            .values_list("pk", flat=True)
+        )
+        Product.objects.filter(pk__in=stale).update(variant_matrix={})
+        products_written(stale)
+        updated += len(stale)
+    invalidate_models(Product)
+    return updated
@@ -1,3 +1,399 @@
-from django.shortcuts import render
+import base64
+import binascii
+import re
+from datetime import datetime
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.validators import slug_re
+from django.db.models import Prefetch, Q
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from PIL import Image
+
+from .cache import cache_stats, cached_queryset
+from .exporter import FORMATS, export_catalog
+from .facets import FACETS, facet_search
+from .homepage import get_home_page
+from .images import THUMBNAIL_SIZES, get_thumbnail
+from .models import Category, Product, ProductImage, ProductReview
+from .variants import matrix_variants
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+REVIEW_LIMIT = 10
+RELATED_LIMIT = 4
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
+HOME_MAX_AGE = 60
+
+re_accepts_br = re.compile(r"\bbr\b")
+re_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def _file_url(field):
+    return field.url if field else None
+
+
+def _image_data(image):
+    return {"url": _file_url(image.image), "alt_text": image.alt_text}
+
+
+# Public field name -> (model columns to load, serializer)
+PRODUCT_FIELDS = {
+    "id": ([], lambda p: p.pk),
+    "name": (["name"], lambda p: p.name),
+    "slug": (["slug"], lambda p: p.slug),
+    "sku": (["sku"], lambda p: p.sku),
+    "short_description": (["short_description"], lambda p: p.short_description),
+    "description": (["description"], lambda p: p.description),
+    "price": (["price"], lambda p: str(p.price)),
+    "compare_at_price": (
+        ["compare_at_price"],
+        lambda p: str(p.compare_at_price) if p.compare_at_price else None,
+    ),
+    "stock": (["stock"], lambda p: p.stock),
+    "in_stock": (["stock", "allow_backorder"], lambda p: p.is_in_stock),
+    "gender": (["gender"], lambda p: p.gender),
+    "condition": (["condition"], lambda p: p.condition),
+    "materials": (["materials"], lambda p: p.materials),
+    "rating_avg": (
+        ["rating_avg"],
+        lambda p: str(p.rating_avg) if p.rating_avg is not None else None,
+    ),
+    "rating_count": (["rating_count"], lambda p: p.rating_count),
+    "featured_image": (["featured_image"], lambda p: _file_url(p.featured_image)),
+    "created_at": ([], lambda p: p.created_at.isoformat()),
+    "category": (
+        ["category__name", "category__slug"],
+        lambda p: {"name": p.category.name, "slug": p.category.slug},
+    ),
+    # Read from the stored matrix; no variant query
+    "variants": (["variant_matrix"], lambda p: matrix_variants(p.variant_matrix)),
+    "images": ([], lambda p: [_image_data(i) for i in p.images.all()]),
+    # Precomputed sizes x colors, price range and stock; no variant query
+    "variant_matrix": (["variant_matrix"], lambda p: p.variant_matrix),
+}
+DEFAULT_FIELDS = ["id", "name", "slug", "price", "in_stock", "featured_image"]
+# Images are fetched separately by the detail view
+DETAIL_FIELDS = [name for name in PRODUCT_FIELDS if name != "images"]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def encode_cursor(product):
+    raw = f"{product.created_at.isoformat()}|{product.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise BadRequest("Invalid cursor") from exc
+
+
+def _requested_fields(request):
+    raw = request.GET.get("fields")
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = sorted(set(fields) - PRODUCT_FIELDS.keys())
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError as exc:
+        raise BadRequest("limit must be an integer") from exc
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _columns(fields):
+    columns = {"id", "created_at"}
+    for name in fields:
+        columns.update(PRODUCT_FIELDS[name][0])
+    return columns
+
+
+def product_list_queryset(fields):
+    """Active products loading only the columns the requested fields need"""
+    columns = _columns(fields)
+
+    queryset = Product.objects.filter(is_active=True).order_by("-created_at", "-id")
+    if "category" in fields:
+        queryset = queryset.select_related("category")
+    if "images" in fields:
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                "images",
+                queryset=ProductImage.objects.only(
+                    "product_id", "image", "alt_text", "sort_order"
+                ),
+            )
+        )
+    return queryset.only(*columns)
+
+
+def category_by_slug(slug):
+    if not slug_re.match(slug):
+        return None
+    return cached_queryset(
+        f"products:category:{slug}",
+        lambda: Category.objects.only("slug", "path").filter(slug=slug).first(),
+        deps=[Category],
+    )
+
+
+@require_GET
+def product_list_api(request):
+    """Read-only product catalog with keyset pagination on (created_at, id)
+
+    Query parameters: ``fields`` (comma separated), ``limit``, ``cursor``
+    and ``category`` (slug; includes subcategories).
+    """
+    try:
+        fields = _requested_fields(request)
+        limit = _page_size(request)
+        queryset = product_list_queryset(fields)
+
+        category_slug = request.GET.get("category")
+        if category_slug:
+            category = category_by_slug(category_slug)
+            if category is None:
+                return JsonResponse({"error": "Unknown category"}, status=404)
+            queryset = queryset.in_category_tree(category)
+
+        cursor = request.GET.get("cursor")
+        if cursor:
+            created_at, pk = decode_cursor(cursor)
+            # The leading range term keeps the predicate sargable for the index
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(pk__lt=pk)
+            )
+    except BadRequest as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    # Fetch one extra row to know whether another page exists
+    products = list(queryset[: limit + 1])
+    has_next = len(products) > limit
+    products = products[:limit]
+
+    next_url = None
+    if has_next:
+        params = request.GET.copy()
+        params["cursor"] = encode_cursor(products[-1])
+        next_url = f"{reverse('products:api_product_list')}?{params.urlencode()}"
+
+    results = [
+        {name: PRODUCT_FIELDS[name][1](product) for name in fields}
+        for product in products
+    ]
+    return JsonResponse({"results": results, "next": next_url})
+
+
+def _review_data(review):
+    return {
+        "rating": review.rating,
+        "title": review.title,
+        "content": review.content,
+        "author": review.user.first_name or review.user.username,
+        "verified_purchase": review.verified_purchase,
+        "created_at": review.created_at.isoformat(),
+    }
+
+
+def _product_page(product, request):
+    """The live Wagtail page for the product, when the catalog is installed"""
+    if not apps.is_installed("catalog"):
+        return None
+    page_model = apps.get_model("catalog", "ProductDetailPage")
+    page = (
+        page_model.objects.live()
+        .filter(product=product)
+        .only("title", "url_path")
+        .first()
+    )
+    if page is None:
+        return None
+    return {"id": page.pk, "title": page.title, "url": page.get_url(request)}
+
+
+def _product_detail(slug, request):
+    product = Product.objects.select_related("category").get(
+        slug=slug, is_active=True
+    )
+    images = ProductImage.objects.filter(product=product).only("image", "alt_text")
+    reviews = (
+        ProductReview.objects.filter(product=product, is_approved=True)
+        .select_related("user")
+        .only(
+            "rating",
+            "title",
+            "content",
+            "verified_purchase",
+            "created_at",
+            "user__first_name",
+            "user__username",
+        )
+    )
+    # Newest in the same category, from the product_active_cat_created index
+    related = (
+        Product.objects.filter(is_active=True, category_id=product.category_id)
+        .exclude(pk=product.pk)
+        .order_by("-created_at")
+        .only(*_columns(DEFAULT_FIELDS))
+    )
+
+    data = {name: PRODUCT_FIELDS[name][1](product) for name in DETAIL_FIELDS}
+    data.update(
+        {
+            "images": [_image_data(image) for image in images],
+            "reviews": [_review_data(review) for review in reviews[:REVIEW_LIMIT]],
+            "related": [
+                {name: PRODUCT_FIELDS[name][1](p) for name in DEFAULT_FIELDS}
+                for p in related[:RELATED_LIMIT]
+            ],
+            "page": _product_page(product, request),
+        }
+    )
+    return data
+
+
+@require_GET
+async def product_detail_api(request, slug):
+    """Active product with images, reviews, related products and page
+
+    Django runs async ORM calls one at a time in a single thread, so the
+    five lookups are made in one ``sync_to_async`` call rather than
+    handing off to that thread once per query.
+    """
+    try:
+        data = await sync_to_async(_product_detail)(slug, request)
+    except Product.DoesNotExist:
+        return JsonResponse({"error": "Unknown product"}, status=404)
+    return JsonResponse(data)
+
+
+# Facets whose values are primary keys rather than codes
+ID_FACETS = {"category", "age_group", "certification"}
+
+
+@require_GET
+def product_facets_api(request):
+    """Matching product count and per-value counts for every facet
+
+    Each facet is a repeatable query parameter, e.g.
+    ``?gender=F&gender=U&age_group=3&price_band=25-50``.
+    """
+    filters = {}
+    for facet in FACETS:
+        values = request.GET.getlist(facet)
+        if facet in ID_FACETS:
+            try:
+                values = [int(value) for value in values]
+            except ValueError:
+                return JsonResponse({"error": f"{facet} must be IDs"}, status=400)
+        filters[facet] = values
+
+    result = facet_search(filters)
+    return JsonResponse({"count": result.total, "facets": result.counts})
+
+
+@staff_member_required
+@require_GET
+def catalog_export(request, fmt):
+    """Stream the full catalog export; ``?gzip=1`` compresses on the fly"""
+    if fmt not in FORMATS:
+        raise Http404("Unknown export format")
+    compress = request.GET.get("gzip") == "1"
+    base_url = request.build_absolute_uri("/")
+    response = StreamingHttpResponse(
+        export_catalog(fmt, base_url, compress=compress),
+        content_type=FORMATS[fmt],
+    )
+    filename = f"catalog.{fmt}" + (".gz" if compress else "")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+@require_GET
+def thumbnail(request, width, height, name):
+    """Admin preview thumbnail, rendered into media storage on first request
+
+    Uploaded file names are never reused, so the response can be cached
+    by the browser for a year.
+    """
+    if (width, height) not in THUMBNAIL_SIZES:
+        raise Http404("Unsupported thumbnail size")
+    try:
+        if not default_storage.exists(name):
+            raise Http404("No such image")
+        target = get_thumbnail(name, width, height)
+    except Image.DecompressionBombError:
+        return HttpResponseBadRequest("Image is too large to render")
+    except (SuspiciousFileOperation, OSError) as exc:
+        raise Http404("Cannot render thumbnail") from exc
+    response = FileResponse(
+        default_storage.open(target, "rb"), content_type="image/webp"
+    )
+    response["Cache-Control"] = f"private, max-age={THUMBNAIL_MAX_AGE}, immutable"
+    return response
+
+
+@staff_member_required
+@require_GET
+def cache_stats_api(request):
+    """Queryset cache counters, for monitoring"""
+    return JsonResponse(cache_stats())
+
+
+@require_GET
+def home(request):
+    """Storefront home page, served from the pre-compressed page cache"""
+    page = get_home_page()
+    accept = request.headers.get("Accept-Encoding", "")
+    if "br" in page and re_accepts_br.search(accept):
+        encoding = "br"
+    elif re_accepts_gzip.search(accept):
+        encoding = "gzip"
+    else:
+        encoding = "identity"
+
+    # Each encoding is its own representation, so it gets its own ETag
+    etag = page["etag"]
+    if encoding != "identity":
+        etag = f'{etag[:-1]}-{encoding}"'
+    last_modified = int(page["last_modified"])
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = HttpResponse(page[encoding])
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = f"public, max-age={HOME_MAX_AGE}"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
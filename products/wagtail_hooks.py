@@ -0,0 +1,33 @@
+from django.db.models import Count, Q
+from wagtail import hooks
+from wagtail.admin.ui.components import Component
+
+from .choosers import product_chooser_viewset
+from .low_stock import open_alerts
+
+
+class LowStockPanel(Component):
+    name = "low_stock"
+    template_name = "products/low_stock_panel.html"
+    order = 150
+    limit = 20
+
+    def get_context_data(self, parent_context):
+        context = super().get_context_data(parent_context)
+        counts = open_alerts().aggregate(
+            open_count=Count("pk"), out_of_stock_count=Count("pk", filter=Q(stock=0))
+        )
+        context.update(counts)
+        context["alerts"] = open_alerts().order_by("-created_at")[: self.limit]
+        return context
+
+
+@hooks.register("register_admin_viewset")
+def register_product_chooser_viewset():
+    return product_chooser_viewset
+
+
+@hooks.register("construct_homepage_panels")
+def add_low_stock_panel(request, panels):
+    if request.user.has_perm("products.view_lowstockalert"):
+        panels.append(LowStockPanel())